@@ -0,0 +1,231 @@
+# Account registry with hash indexes (email -> account, name -> accounts)
+# Iterates in creation order like the old accounts list did
+# A snapshot can be attached as a lazy backing store (see Snapshot.py):
+# its rows only become account objects when they are first looked up
+from contextlib import nullcontext
+
+
+class AccountRegistry:
+    def __init__(self):
+        self.__accounts = {}   # id(account) -> account
+        self.__by_email = {}   # email -> account
+        self.__by_name = {}    # name -> {id(account): account}
+        self.__detach_snapshot()
+
+    def __detach_snapshot(self):
+        self.__snapshot = None
+        self.__materialize = None
+        self.__lock = nullcontext()
+        self.__loaded = None       # 1 per snapshot row once it became an object
+        self.__unloaded = 0
+        self.__row_accounts = {}   # snapshot row -> live account
+        self.__account_rows = {}   # id(account) -> snapshot row
+
+    def __len__(self):
+        return len(self.__accounts) + self.__unloaded
+
+    def __iter__(self):
+        if self.__snapshot is None:
+            return iter(list(self.__accounts.values()))
+        return self.__all_accounts()
+
+    def __contains__(self, account):
+        return id(account) in self.__accounts
+
+    def __repr__(self):
+        return f"AccountRegistry({len(self)} accounts)"
+
+    # Register a new account (email must be unique)
+    def add(self, account):
+        if id(account) in self.__accounts:
+            return
+        email = account.email
+        if email in self.__by_email or self.__unloaded_row(email) is not None:
+            raise ValueError("An account with this email already exists")
+        self.__accounts[id(account)] = account
+        self.__by_email[email] = account
+        self.__by_name.setdefault(account.get_name(), {})[id(account)] = account
+
+    # Kept so code written against the old list keeps working
+    append = add
+
+    def remove(self, account):
+        if id(account) not in self.__accounts:
+            raise ValueError("Account is not registered")
+        del self.__accounts[id(account)]
+        del self.__by_email[account.email]
+        row = self.__account_rows.pop(id(account), None)
+        if row is not None:
+            del self.__row_accounts[row]
+        name = account.get_name()
+        bucket = self.__by_name[name]
+        del bucket[id(account)]
+        if not bucket:
+            del self.__by_name[name]
+
+    def clear(self):
+        self.__accounts.clear()
+        self.__by_email.clear()
+        self.__by_name.clear()
+        self.__detach_snapshot()
+
+    # Move an account to a new email key (called before the email changes)
+    def change_email(self, account, new_email):
+        if id(account) not in self.__accounts:
+            return
+        old_email = account.email
+        if new_email == old_email:
+            return
+        if new_email in self.__by_email or self.__unloaded_row(new_email) is not None:
+            raise ValueError("An account with this email already exists")
+        del self.__by_email[old_email]
+        self.__by_email[new_email] = account
+
+    def find_by_email(self, email):
+        account = self.__by_email.get(email)
+        if account is None and self.__snapshot is not None:
+            row = self.__unloaded_row(email)
+            if row is not None:
+                account = self.__load(row)
+        return account
+
+    # Email check without building an account from the snapshot
+    def has_email(self, email):
+        return email in self.__by_email or self.__unloaded_row(email) is not None
+
+    # First account created with this name (same result as the old scan)
+    def find_by_name(self, name):
+        if self.__snapshot is not None:
+            # Snapshot rows are older than anything created since
+            for row in self.__snapshot.rows_by_name(name):
+                if not self.__loaded[row]:
+                    return self.__load(row)
+                account = self.__row_accounts.get(row)
+                if account is not None:
+                    return account
+        bucket = self.__by_name.get(name)
+        if bucket:
+            return next(iter(bucket.values()))
+        return None
+
+    def find_all_by_name(self, name):
+        if self.__snapshot is not None:
+            for row in self.__snapshot.rows_by_name(name):
+                if not self.__loaded[row]:
+                    self.__load(row)
+        return list(self.__by_name.get(name, {}).values())
+
+    # ---- lazy snapshot backing ----
+    # materialize(record) must build and register the account object;
+    # with a lock, concurrent lookups of the same row build it only once
+    def attach_snapshot(self, snapshot, materialize, lock=None):
+        if self.__accounts or self.__snapshot is not None:
+            raise ValueError("A snapshot can only be attached to an empty registry")
+        self.__snapshot = snapshot
+        self.__materialize = materialize
+        if lock is not None:
+            self.__lock = lock
+        self.__loaded = bytearray(snapshot.count)
+        self.__unloaded = snapshot.count
+
+    def __unloaded_row(self, email):
+        if self.__snapshot is None:
+            return None
+        row = self.__snapshot.find_email(email)
+        if row is None or self.__loaded[row]:
+            return None
+        return row
+
+    def __load(self, row):
+        with self.__lock:
+            if self.__loaded[row]:
+                return self.__row_accounts.get(row)
+            self.__loaded[row] = 1
+            self.__unloaded -= 1
+            try:
+                account = self.__materialize(self.__snapshot.record(row))
+            except BaseException:
+                self.__loaded[row] = 0
+                self.__unloaded += 1
+                raise
+            self.__row_accounts[row] = account
+            self.__account_rows[id(account)] = row
+            return account
+
+    # Snapshot rows first (they are older), then accounts created since.
+    # Rows are loaded one at a time as the iteration reaches them.
+    def __all_accounts(self):
+        snapshot = self.__snapshot
+        for row in range(snapshot.count):
+            if self.__snapshot is not snapshot:
+                return      # cleared meanwhile
+            if not self.__loaded[row]:
+                yield self.__load(row)
+            else:
+                account = self.__row_accounts.get(row)
+                if account is not None:
+                    yield account
+        yield from [account for account in self.__accounts.values() if id(account) not in self.__account_rows]
+
+    # Like iteration, but rows not loaded yet come as the store's record
+    # tuples instead of accounts, so a full pass (an export, say) doesn't
+    # build an object per row
+    def records(self):
+        if self.__snapshot is None:
+            yield from list(self.__accounts.values())
+            return
+        snapshot = self.__snapshot
+        for row in range(snapshot.count):
+            if self.__snapshot is not snapshot:
+                return
+            if not self.__loaded[row]:
+                yield snapshot.record(row)
+            else:
+                account = self.__row_accounts.get(row)
+                if account is not None:
+                    yield account
+        yield from [account for account in self.__accounts.values() if id(account) not in self.__account_rows]
+
+
+# Benchmark: indexed lookups vs. the old linear scan
+if __name__ == "__main__":
+    import random
+    import time
+    from bank import BankSystem, SavingAccount, CheckingAccount
+
+    def linear_find(email):
+        for account in BankSystem.accounts:
+            if account.email == email:
+                return account
+        return None
+
+    print(f"{'accounts':>10} {'by email':>12} {'by name':>12} {'linear scan':>14}")
+    for size in (1_000, 10_000, 100_000, 1_000_000):
+        BankSystem.accounts.clear()
+        BankSystem.number_of_accounts = 0
+        for i in range(size):
+            if i % 2:
+                SavingAccount(f"user{i}", 100 + i, f"user{i}@bank.com", "pw")
+            else:
+                CheckingAccount(f"user{i}", 100 + i, f"user{i}@bank.com", "pw")
+
+        keys = [random.randrange(size) for _ in range(100_000)]
+        emails = [f"user{i}@bank.com" for i in keys]
+        names = [f"user{i}" for i in keys]
+
+        start = time.perf_counter()
+        for email in emails:
+            BankSystem.find_account_by_email(email)
+        by_email = (time.perf_counter() - start) / len(emails) * 1e9
+
+        start = time.perf_counter()
+        for name in names:
+            BankSystem.find_account_by_name(name)
+        by_name = (time.perf_counter() - start) / len(names) * 1e9
+
+        start = time.perf_counter()
+        for email in emails[:20]:
+            linear_find(email)
+        linear = (time.perf_counter() - start) / 20 * 1e9
+
+        print(f"{size:>10,} {by_email:>9.0f} ns {by_name:>9.0f} ns {linear / 1000:>11.0f} us")
@@ -0,0 +1,145 @@
+import threading
+from bisect import bisect_right
+
+# Bank-wide running totals, updated as balances change so the GUI never
+# has to walk every account. All amounts are in minor units (cents).
+#   - per account type: count and total balance
+#   - balance histogram over fixed bucket edges
+#   - money flows since start: deposits, withdrawals, interest, fees, transfers
+# recount() rebuilds the balance figures from the accounts and reports drift.
+
+# Bucket i holds balances in [EDGES[i-1], EDGES[i]), in major units
+BUCKET_EDGES = (100, 1_000, 10_000, 100_000, 1_000_000)
+FLOWS = ("deposits", "withdrawals", "interest", "fees", "transfers")
+
+
+def bucket_labels(edges=BUCKET_EDGES):
+    bounds = [0, *edges]
+    labels = [f"${low:,}-{high:,}" for low, high in zip(bounds, bounds[1:])]
+    return labels + [f"${bounds[-1]:,}+"]
+
+
+class BankAggregates:
+    def __init__(self, minor_unit=100, edges=BUCKET_EDGES):
+        self.edges = tuple(edge * minor_unit for edge in edges)
+        self.labels = bucket_labels(edges)
+        self.__lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.balance = 0
+        self.by_type = {}                          # kind -> [count, balance]
+        self.histogram = [0] * (len(self.edges) + 1)
+        self.flows = dict.fromkeys(FLOWS, 0)       # flow -> total amount
+        self.flow_counts = dict.fromkeys(FLOWS, 0)
+
+    def __bucket(self, minor):
+        return bisect_right(self.edges, minor)
+
+    # ---- updates (called by BankSystem) ----
+    def add(self, kind, minor):
+        with self.__lock:
+            self.count += 1
+            self.balance += minor
+            totals = self.by_type.setdefault(kind, [0, 0])
+            totals[0] += 1
+            totals[1] += minor
+            self.histogram[self.__bucket(minor)] += 1
+
+    def remove(self, kind, minor):
+        with self.__lock:
+            self.count -= 1
+            self.balance -= minor
+            totals = self.by_type[kind]
+            totals[0] -= 1
+            totals[1] -= minor
+            self.histogram[self.__bucket(minor)] -= 1
+
+    # One account's balance went from old to new
+    def move(self, kind, old, new):
+        with self.__lock:
+            self.balance += new - old
+            self.by_type[kind][1] += new - old
+            before, after = self.__bucket(old), self.__bucket(new)
+            if before != after:
+                self.histogram[before] -= 1
+                self.histogram[after] += 1
+
+    def record(self, flow, minor):
+        with self.__lock:
+            self.flows[flow] += minor
+            self.flow_counts[flow] += 1
+
+    # ---- O(1) reads ----
+    def total_balance(self):
+        return self.balance
+
+    def type_count(self, kind):
+        return self.by_type.get(kind, (0, 0))[0]
+
+    def type_balance(self, kind):
+        return self.by_type.get(kind, (0, 0))[1]
+
+    def buckets(self):
+        return list(zip(self.labels, self.histogram))
+
+    # Rebuild the balance figures from scratch
+    # Returns the differences found (empty when the running totals were right)
+    def recount(self, accounts):
+        fresh = BankAggregates(minor_unit=1, edges=self.edges)
+        for account in accounts:
+            fresh.add(account.kind, account.get_posted_balance_minor())
+        return self.correct(fresh)
+
+    # Take the balance figures from a freshly built BankAggregates (see EndOfDay.py)
+    def correct(self, fresh):
+        with self.__lock:
+            drift = {}
+            for field in ("count", "balance", "by_type", "histogram"):
+                expected, actual = getattr(fresh, field), getattr(self, field)
+                if expected != actual:
+                    drift[field] = (actual, expected)
+                    setattr(self, field, expected)
+        return drift
+
+
+# Benchmark: dashboard totals from a full scan vs. the running aggregates
+if __name__ == "__main__":
+    import random
+    import time
+    from bank import BankSystem, SavingAccount, CheckingAccount
+
+    rng = random.Random(3)
+    print(f"{'accounts':>10} {'scan':>12} {'aggregates':>12}")
+    for count in (1_000, 10_000, 100_000):
+        BankSystem.accounts.clear()
+        BankSystem.aggregates.reset()
+        accounts = []
+        for i in range(count):
+            if i % 2:
+                accounts.append(SavingAccount(f"user{i}", rng.uniform(1, 200_000), f"user{i}@bank.com", "pw"))
+            else:
+                accounts.append(CheckingAccount(f"user{i}", rng.uniform(10, 5_000), f"user{i}@bank.com", "pw", 1))
+        for i in range(count):
+            accounts[i].deposit(rng.uniform(1, 500))
+            accounts[i].withdraw(rng.uniform(1, 500))
+            if i % 2:
+                accounts[i].add_interest()
+            accounts[i].transfer(accounts[i - 1], rng.uniform(1, 100), "pw")
+
+        start = time.perf_counter()
+        scanned = sum(acc.get_balance() for acc in BankSystem.accounts)
+        savings = sum(1 for acc in BankSystem.accounts if acc.kind == "savings")
+        scan = time.perf_counter() - start
+
+        start = time.perf_counter()
+        total = BankSystem.money.to_major(BankSystem.aggregates.total_balance())
+        BankSystem.aggregates.type_count("savings")
+        cached = time.perf_counter() - start
+
+        assert BankSystem.aggregates.recount(BankSystem.accounts) == {}
+        assert abs(total - scanned) < 0.01 * count
+        print(f"{count:>10,} {scan * 1e6:>10.0f}us {cached * 1e6:>10.1f}us")
+    print(BankSystem.aggregates.buckets())
+    print(BankSystem.aggregates.flows)
@@ -0,0 +1,88 @@
+import argparse
+import asyncio
+import json
+import time
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+# One client connection: create + login, then pipelined deposits/withdrawals/balances
+async def run_client(host, port, client_id, requests, depth, latencies):
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+    email = f"load{client_id}-{time.time_ns()}@bank.com"
+    setup = [
+        {"id": "c", "op": "create", "type": "checking", "name": f"Load {client_id}",
+         "balance": 1_000_000, "email": email, "password": "pw", "transaction_fee": 1},
+        {"id": "l", "op": "login", "email": email, "password": "pw"},
+    ]
+    for request in setup:
+        writer.write(json.dumps(request).encode() + b"\n")
+    await writer.drain()
+    for _ in setup:
+        response = json.loads(await reader.readline())
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+
+    ops = ("deposit", "withdraw", "balance")
+    sent = {}
+    next_id = 0
+    received = 0
+    errors = 0
+    while received < requests:
+        # Keep up to `depth` requests in flight on this connection
+        while next_id < requests and next_id - received < depth:
+            request = {"id": next_id, "op": ops[next_id % 3], "amount": 5}
+            sent[next_id] = time.perf_counter()
+            writer.write(json.dumps(request).encode() + b"\n")
+            next_id += 1
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - sent.pop(response["id"]))
+        errors += not response["ok"]
+        received += 1
+    writer.close()
+    await writer.wait_closed()
+    return errors
+
+
+async def run_load(host, port, clients, requests, depth):
+    latencies = []
+    start = time.perf_counter()
+    errors = await asyncio.gather(*(run_client(host, port, i, requests, depth, latencies)
+                                    for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    total = clients * requests
+    print(f"clients: {clients}  pipeline depth: {depth}  requests: {total:,}  errors: {sum(errors)}")
+    print(f"throughput: {total / elapsed:,.0f} req/s")
+    print(f"latency p50: {percentile(latencies, 0.50) * 1000:.2f} ms  "
+          f"p99: {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+
+async def main(args):
+    server = None
+    if args.serve:
+        # Run a server in this process (handy for a quick local check)
+        from BankServer import BankServer
+        server = await BankServer(args.host, 0).start()
+        args.port = server.port
+    await run_load(args.host, args.port, args.clients, args.requests, args.depth)
+    if server is not None:
+        print(f"server batches: {server.batches:,} ({server.requests / server.batches:.1f} requests/batch)")
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator for BankServer")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per client")
+    parser.add_argument("--depth", type=int, default=16, help="pipelined requests per client")
+    parser.add_argument("--serve", action="store_true", help="start a server in-process")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,376 @@
+import argparse
+import asyncio
+import json
+import math
+
+from bank import BankSystem, SavingAccount, CheckingAccount
+from Credentials import verify_async
+
+# Line-delimited JSON protocol over TCP
+#
+#   request:  {"id": 1, "op": "deposit", "amount": 25}
+#   response: {"id": 1, "ok": true, "result": 125.0}
+#             {"id": 1, "ok": false, "error": "Please login first"}
+#
+# ops: create, login, logout, deposit, withdraw, transfer, balance, lookup
+# login returns a session token; transfer accepts "token" instead of "password".
+# deposit, withdraw and transfer take an optional "key": a retry with the same
+# key gets the first outcome back instead of moving the money again.
+# Password checks (login, and transfers sent with "password") run in the KDF
+# thread pool, not in the batcher.
+# Requests may be pipelined; responses come back in request order.
+# Requests from all clients are queued and applied to the core in batches,
+# each batch journaled as one record; a batch's responses are only sent once
+# the journal has it on disk. If the journal can't be written, every request
+# from then on is refused: memory may be ahead of what is on disk.
+
+
+MAX_BALANCE = 1_000_000_000_000     # opening balances above this are refused
+MAX_RATE = 1.0                      # interest rates are fractions: 0.03 is 3%
+# Request key the reader sets once a transfer's password was checked in the
+# KDF pool; JSON keys are strings, so a client can't send it
+PASSWORD_CHECKED = object()
+
+
+class RequestError(Exception):
+    pass
+
+
+# Per-connection state
+class Session:
+    def __init__(self):
+        self.account = None
+        self.token = None
+
+    def require_login(self):
+        if self.account is None:
+            raise RequestError("Please login first")
+        return self.account
+
+
+def _amount(request):
+    amount = request.get("amount")
+    if isinstance(amount, bool) or not isinstance(amount, (int, float)) or not math.isfinite(amount):
+        raise RequestError("Invalid amount")
+    return amount
+
+
+# A finite number in [low, high], else RequestError with the field's name
+def _number(request, field, default, low, high):
+    value = request.get(field, default)
+    if (isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value)
+            or not low <= value <= high):
+        raise RequestError(f"Invalid {field}")
+    return value
+
+
+def _describe(account):
+    info = {"name": account.get_name(), "email": account.email}
+    if isinstance(account, SavingAccount):
+        info["type"] = "savings"
+        info["interest_rate"] = account.interest_rate
+    elif isinstance(account, CheckingAccount):
+        info["type"] = "checking"
+        info["transaction_fee"] = account.transaction_fee
+    else:
+        info["type"] = "standard"
+    return info
+
+
+# Every field is checked before an account object exists
+def op_create(session, request):
+    kind = request.get("type", "savings")
+    if kind not in ("savings", "checking"):
+        raise RequestError(f"Unknown account type: {kind}")
+    email, password = request.get("email"), request.get("password")
+    if not isinstance(email, str) or not email or not isinstance(password, str) or not password:
+        raise RequestError("Email and password are required")
+    balance = _number(request, "balance", None, 0, MAX_BALANCE)
+    args = (request.get("name"), balance, email, password)
+    if kind == "savings":
+        account = SavingAccount(*args, _number(request, "interest_rate", 0.03, 0, MAX_RATE))
+    else:
+        account = CheckingAccount(*args, _number(request, "transaction_fee", 5, 0, MAX_BALANCE))
+    return _describe(account)
+
+
+# Runs on the connection's reader after the password was verified in the pool
+def finish_login(session, request, account, verified):
+    response = {"id": request.get("id"), "ok": verified}
+    if verified:
+        session.account = account
+        session.token = BankSystem.sessions.issue(account)
+        response["result"] = dict(_describe(account), token=session.token)
+    else:
+        response["error"] = "Invalid password!" if account else "Account not found!"
+    return response
+
+
+def op_logout(session, request):
+    BankSystem.sessions.revoke(session.token)
+    session.account = None
+    session.token = None
+    return True
+
+
+def op_deposit(session, request):
+    account = session.require_login()
+    if not account.deposit(_amount(request), key=request.get("key")):
+        raise RequestError("Invalid deposit amount!")
+    return account.get_balance()
+
+
+def op_withdraw(session, request):
+    account = session.require_login()
+    if not account.withdraw(_amount(request), key=request.get("key")):
+        raise RequestError("Insufficient funds or invalid amount!")
+    return account.get_balance()
+
+
+def op_transfer(session, request):
+    account = session.require_login()
+    recipient = BankSystem.find_account_by_email(request.get("to"))
+    if recipient is None:
+        raise RequestError("Recipient account not found!")
+    token = request.get("token")
+    one_off = None
+    if token is None:
+        # A password was already verified by the reader; stand in a one-off token for it
+        if not request.get(PASSWORD_CHECKED):
+            raise RequestError("Authentication failed")
+        token = one_off = BankSystem.sessions.issue(account)
+    try:
+        result = account.transfer(recipient, _amount(request), token=token, key=request.get("key"))
+    finally:
+        if one_off is not None:
+            BankSystem.sessions.revoke(one_off)
+    if not result.startswith("Transferred"):
+        raise RequestError(result)
+    return result
+
+
+def op_balance(session, request):
+    return session.require_login().get_balance()
+
+
+def op_lookup(session, request):
+    if "email" in request:
+        account = BankSystem.find_account_by_email(request["email"])
+    else:
+        account = BankSystem.find_account_by_name(request.get("name"))
+    if account is None:
+        raise RequestError("Account not found!")
+    return _describe(account)
+
+
+OPERATIONS = {
+    "create": op_create,
+    "logout": op_logout,
+    "deposit": op_deposit,
+    "withdraw": op_withdraw,
+    "transfer": op_transfer,
+    "balance": op_balance,
+    "lookup": op_lookup,
+}
+
+
+def handle(session, request):
+    """Run one request against the core and build its response"""
+    response = {"id": request.get("id")}
+    try:
+        operation = OPERATIONS.get(request.get("op"))
+        if operation is None:
+            raise RequestError(f"Unknown op: {request.get('op')}")
+        response["result"] = operation(session, request)
+        response["ok"] = True
+    except (RequestError, ValueError) as e:
+        response["ok"] = False
+        response["error"] = str(e)
+    except Exception as e:  # never let one bad request stop the batcher
+        response["ok"] = False
+        response["error"] = f"Internal error: {e!r}"
+    return response
+
+
+class BankServer:
+    def __init__(self, host="127.0.0.1", port=8765, max_batch=1024):
+        self.host = host
+        self.port = port
+        self.max_batch = max_batch
+        self.batches = 0
+        self.requests = 0
+        self.error = None       # the storage error that stopped the server, if any
+        self.__queue = None
+        self.__server = None
+        self.__batcher = None
+        self.__clients = set()
+
+    async def start(self):
+        self.__queue = asyncio.Queue()
+        self.__batcher = asyncio.create_task(self.__run_batches())
+        self.__server = await asyncio.start_server(self.__serve_client, self.host, self.port,
+                                                   limit=1 << 20)
+        self.port = self.__server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        await self.__server.serve_forever()
+
+    async def close(self):
+        self.__server.close()
+        # Let connected clients finish what they already sent
+        if self.__clients:
+            await asyncio.wait(self.__clients, timeout=1)
+        for task in self.__clients:
+            task.cancel()
+        self.__batcher.cancel()
+        await self.__server.wait_closed()
+
+    # Apply everything that is queued as one batch, then wait for more.
+    # Responses wait until the journal has the batch on disk; the flush runs
+    # in a thread so other clients keep being read meanwhile.
+    async def __run_batches(self):
+        queue = self.__queue
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            responses = []
+            if self.error is None:
+                try:
+                    # Leaving the transaction can raise too (an earlier writer error)
+                    with BankSystem.transaction():
+                        for session, request, future in batch:
+                            if not future.cancelled():
+                                responses.append((future, handle(session, request)))
+                    journal = BankSystem.journal
+                    if journal is not None:
+                        await loop.run_in_executor(None, journal.flush)
+                except Exception as e:
+                    self.error = e
+            if self.error is not None:
+                message = f"Internal error: journal write failed: {self.error!r}"
+                responses = [(future, {"id": request.get("id"), "ok": False, "error": message})
+                             for session, request, future in batch]
+            for future, response in responses:
+                if not future.done():
+                    future.set_result(response)
+            self.batches += 1
+            self.requests += len(batch)
+
+    async def __serve_client(self, reader, writer):
+        session = Session()
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        self.__clients.add(task)
+        last = None
+        responses = asyncio.Queue()
+        sender = asyncio.create_task(self.__send_responses(responses, writer))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                future = loop.create_future()
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as e:
+                    future.set_result({"id": None, "ok": False, "error": f"Bad request: {e}"})
+                else:
+                    if request.get("op") == "login":
+                        # Earlier requests must see the old session, so wait for them
+                        if last is not None:
+                            await asyncio.wait([last])
+                        future.set_result(await self.__login(session, request))
+                    else:
+                        if request.get("op") == "transfer" and "token" not in request:
+                            # Later requests are read only after this check, so order is kept
+                            request[PASSWORD_CHECKED] = await self.__verify(session.account,
+                                                                            request.get("password"))
+                        self.__queue.put_nowait((session, request, future))
+                responses.put_nowait(future)
+                last = future
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            responses.put_nowait(None)
+            try:
+                await sender
+            finally:
+                writer.close()
+                self.__clients.discard(task)
+
+    # Password check in the KDF pool
+    @staticmethod
+    async def __verify(account, password):
+        if account is None or not isinstance(password, str):
+            return False
+        return await asyncio.wrap_future(verify_async(password, account.password))
+
+    @staticmethod
+    async def __login(session, request):
+        account = BankSystem.find_account_by_email(request.get("email"))
+        verified = await BankServer.__verify(account, request.get("password"))
+        return finish_login(session, request, account, verified)
+
+    # Write responses in request order; drain once per burst, not per line
+    @staticmethod
+    async def __send_responses(responses, writer):
+        try:
+            while True:
+                future = await responses.get()
+                if future is None:
+                    break
+                writer.write(json.dumps(await future).encode() + b"\n")
+                if responses.empty():
+                    await writer.drain()
+        except ConnectionError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless bank server (line-delimited JSON over TCP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--journal", help="journal file to replay and append to")
+    parser.add_argument("--db", help="SQLite database to load lazily and write through to")
+    parser.add_argument("--limits", help="JSON file of velocity rules (see Velocity.py)")
+    parser.add_argument("--hash-passwords", action="store_true", help="store new passwords as scrypt hashes")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this local port")
+    args = parser.parse_args()
+    BankSystem.hash_passwords = args.hash_passwords
+    if args.limits:
+        from Velocity import VelocityLimits
+        BankSystem.limits = VelocityLimits.load(args.limits, minor_unit=BankSystem.money.minor_unit)
+    if args.db:
+        from SqliteStore import open_sqlite
+        open_sqlite(args.db, BankSystem, SavingAccount, CheckingAccount, wait=False)
+    elif args.journal:
+        from Journal import open_journal
+        # The batcher flushes once per batch before it answers
+        open_journal(args.journal, BankSystem, SavingAccount, CheckingAccount, wait=False)
+    if args.metrics_port is not None:
+        from Metrics import METRICS
+        METRICS.enable(BankSystem, SavingAccount, CheckingAccount)
+        METRICS.serve(port=args.metrics_port)
+        print(f"Metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+
+    async def run():
+        server = await BankServer(args.host, args.port).start()
+        print(f"Bank server listening on {server.host}:{server.port}")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if BankSystem.journal is not None:
+            BankSystem.journal.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,109 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from typing import Optional
-
-class BankSystem:
-    number_of_accounts = 0 
-    accounts = []  
-    
-    # Initialize account info
-    def __init__(self, name, balance, email, password):
-        self.__set_balance(balance) 
-        self.__set_name(name)
-        self.email = email
-        self.password = password 
-        BankSystem.number_of_accounts += 1  
-        BankSystem.accounts.append(self)
-   
-    # Check password
-    def authenticate(self, password):
-        return password == self.password
-    
-    # Set balance (must be positive)
-    def __set_balance(self, balance):
-        if isinstance(balance, (int, float)) and balance > 0:
-            self.__balance = balance
-        else:
-            raise ValueError("Invalid balance: must be a positive number")
-    
-    def get_balance(self):
-        return self.__balance
-    # Set name (must be string)    
-    def __set_name(self, name):
-        if isinstance(name, str) and name.strip():
-            self.__name = name
-        else:
-            raise ValueError("Invalid name: must be text")
-   
-    def get_name(self):
-        return self.__name
-    
-    def deposit(self, amount):   
-        if amount > 0:
-            self.__balance += amount
-            return True
-        return False
-    
-    def withdraw(self, amount):
-        if 0 < amount <= self.__balance:
-            self.__balance -= amount
-            return True
-        return False
-    # Transfer money between accounts    
-    def transfer(self, to_account, amount, password):
-        if not self.authenticate(password):
-            return "Authentication failed"
-        if amount <= 0:
-            return "Invalid transfer amount"
-        if self.get_balance() < amount:
-            return "Insufficient funds"
-        self.withdraw(amount)
-        to_account.deposit(amount)
-        return f"Transferred ${amount:.2f} from {self.get_name()} to {to_account.get_name()}"
-    
-    @classmethod
-    def find_account_by_email(cls, email):
-        for account in cls.accounts:
-            if account.email == email:
-                return account
-        return None
-    
-    @classmethod
-    def find_account_by_name(cls, name):
-        for account in cls.accounts:
-            if account.get_name() == name:
-                return account
-        return None
-
-# Inherits from BankSystem (adds interest)
-class SavingAccount(BankSystem):
-    def __init__(self, name, balance, email, password, interest_rate=0.03):
-        super().__init__(name, balance, email, password)
-        self.interest_rate = interest_rate
-    
-    def add_interest(self):
-        interest = self.get_balance() * self.interest_rate
-        self.deposit(interest)
-        return interest
-    
-    def get_account_type(self):
-        return f"Savings (Rate: {self.interest_rate*100}%)"
-
-# Inherits from BankSystem (adds transaction fee)
-class CheckingAccount(BankSystem):
-    def __init__(self, name, balance, email, password, transaction_fee=5):
-        super().__init__(name, balance, email, password)
-        self.transaction_fee = transaction_fee
-
-    def withdraw(self, amount):
-        total = amount + self.transaction_fee
-        if amount > 0 and total <= self.get_balance():
-            super().withdraw(total)
-            return True
-        return False
-    
-    def get_account_type(self):
-        return f"Checking (Fee: ${self.transaction_fee})"
+from bank import BankSystem, SavingAccount, CheckingAccount
+from TkExecutor import TkExecutor
+from History import describe
 
 class BankGUI:
     def __init__(self, root):
@@ -112,8 +12,14 @@ class BankGUI:
         self.root.geometry("900x650")
         self.root.configure(bg='#f0f0f0')
         
-        # Current logged-in account
+        # Current logged-in account and its session token
         self.current_account = None
+        self.session_token = None
+        
+        # Banking work runs on worker threads; these buttons wait while it does
+        self.executor = TkExecutor(root)
+        self.executor.on_busy(self.set_busy)
+        self.action_buttons = []
         
         self.create_widgets()
     
@@ -145,54 +51,76 @@ class BankGUI:
         create_frame = tk.LabelFrame(self.left_frame, text="Create New Account", bg='#f0f0f0')
         create_frame.pack(fill=tk.X, padx=10, pady=5)
         
-        tk.Button(create_frame, text="Create Savings Account", 
+        self.add_action_button(tk.Button(create_frame, text="Create Savings Account", 
                  command=self.create_savings_account, bg='#4CAF50', fg='white',
-                 font=("Arial", 10, "bold")).pack(pady=5, padx=10, fill=tk.X)
+                 font=("Arial", 10, "bold"))).pack(pady=5, padx=10, fill=tk.X)
         
-        tk.Button(create_frame, text="Create Checking Account", 
+        self.add_action_button(tk.Button(create_frame, text="Create Checking Account", 
                  command=self.create_checking_account, bg='#2196F3', fg='white',
-                 font=("Arial", 10, "bold")).pack(pady=5, padx=10, fill=tk.X)
+                 font=("Arial", 10, "bold"))).pack(pady=5, padx=10, fill=tk.X)
         
         # Login Section
         login_frame = tk.LabelFrame(self.left_frame, text="Account Login", bg='#f0f0f0')
         login_frame.pack(fill=tk.X, padx=10, pady=5)
         
-        tk.Button(login_frame, text="Login to Account", 
+        self.add_action_button(tk.Button(login_frame, text="Login to Account", 
                  command=self.login_account, bg='#FF9800', fg='white',
-                 font=("Arial", 10, "bold")).pack(pady=5, padx=10, fill=tk.X)
+                 font=("Arial", 10, "bold"))).pack(pady=5, padx=10, fill=tk.X)
         
-        tk.Button(login_frame, text="Logout", 
+        self.add_action_button(tk.Button(login_frame, text="Logout", 
                  command=self.logout_account, bg='#F44336', fg='white',
-                 font=("Arial", 10, "bold")).pack(pady=5, padx=10, fill=tk.X)
+                 font=("Arial", 10, "bold"))).pack(pady=5, padx=10, fill=tk.X)
         
         # Transaction Section
         transaction_frame = tk.LabelFrame(self.left_frame, text="Transactions", bg='#f0f0f0')
         transaction_frame.pack(fill=tk.X, padx=10, pady=5)
         
-        tk.Button(transaction_frame, text="Deposit Money", 
+        self.add_action_button(tk.Button(transaction_frame, text="Deposit Money", 
                  command=self.deposit_money, bg='#8BC34A', fg='white',
-                 font=("Arial", 10, "bold")).pack(pady=2, padx=10, fill=tk.X)
+                 font=("Arial", 10, "bold"))).pack(pady=2, padx=10, fill=tk.X)
         
-        tk.Button(transaction_frame, text="Withdraw Money", 
+        self.add_action_button(tk.Button(transaction_frame, text="Withdraw Money", 
                  command=self.withdraw_money, bg='#FF5722', fg='white',
-                 font=("Arial", 10, "bold")).pack(pady=2, padx=10, fill=tk.X)
+                 font=("Arial", 10, "bold"))).pack(pady=2, padx=10, fill=tk.X)
         
-        tk.Button(transaction_frame, text="Transfer Money", 
+        self.add_action_button(tk.Button(transaction_frame, text="Transfer Money", 
                  command=self.transfer_money, bg='#9C27B0', fg='white',
-                 font=("Arial", 10, "bold")).pack(pady=2, padx=10, fill=tk.X)
+                 font=("Arial", 10, "bold"))).pack(pady=2, padx=10, fill=tk.X)
         
         # Special Operations Section
         special_frame = tk.LabelFrame(self.left_frame, text="Special Operations", bg='#f0f0f0')
         special_frame.pack(fill=tk.X, padx=10, pady=5)
         
-        tk.Button(special_frame, text="Add Interest (Savings)", 
+        self.add_action_button(tk.Button(special_frame, text="Add Interest (Savings)", 
                  command=self.add_interest, bg='#607D8B', fg='white',
-                 font=("Arial", 10, "bold")).pack(pady=2, padx=10, fill=tk.X)
+                 font=("Arial", 10, "bold"))).pack(pady=2, padx=10, fill=tk.X)
         
         tk.Button(special_frame, text="View All Accounts", 
                  command=self.view_all_accounts, bg='#795548', fg='white',
                  font=("Arial", 10, "bold")).pack(pady=2, padx=10, fill=tk.X)
     
+    def add_action_button(self, button):
+        self.action_buttons.append(button)
+        return button
+    
+    # Pending state while an operation is on a worker thread
+    def set_busy(self, pending):
+        state = tk.DISABLED if pending else tk.NORMAL
+        for button in self.action_buttons:
+            button.config(state=state)
+        self.root.config(cursor="watch" if pending else "")
+        if pending:
+            self.status_indicator.config(text="⏳ Processing...", fg='#f39c12')
+        else:
+            self.update_info_display()
+    
+    # Run core work off the Tk thread; done(result) runs back on it
+    def run_async(self, work, done, *args):
+        self.executor.submit(work, *args, callback=done, errback=self.show_error)
+    
+    def show_error(self, error):
+        messagebox.showerror("Error", str(error))
+    
     def create_right_panel(self):
         # Main container with gradient-like background
         self.account_info_frame = tk.Frame(self.right_frame, bg='#f8f9fa')
@@ -214,6 +142,16 @@ class BankGUI:
         # Create account info labels
         self.create_account_info_widgets()
         
+        # Recent activity of the logged-in account (see History.py)
+        activity_frame = tk.LabelFrame(self.account_info_frame, text="🧾 Recent Activity", 
+                                      font=("Arial", 9, "bold"), bg='#f8f9fa', fg='#2c3e50')
+        activity_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
+        
+        self.activity_list = tk.Listbox(activity_frame, height=5, font=("Courier", 9), 
+                                        bg='white', fg='#2c3e50', relief=tk.FLAT, 
+                                        highlightthickness=0, activestyle='none')
+        self.activity_list.pack(fill=tk.X, padx=5, pady=5)
+        
         # Stats frame at bottom
         self.stats_frame = tk.Frame(self.account_info_frame, bg='#ecf0f1', height=80, relief=tk.GROOVE, bd=1)
         self.stats_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
@@ -313,8 +251,17 @@ class BankGUI:
             # Update status
             self.status_indicator.config(text="🟢 Logged In", fg='#27ae60')
             
+            # Last few transactions, newest first
+            self.activity_list.delete(0, tk.END)
+            recent = BankSystem.history.recent(self.current_account, 20) if BankSystem.history else []
+            for entry in recent:
+                self.activity_list.insert(tk.END, describe(entry, BankSystem.money))
+            if not recent:
+                self.activity_list.insert(tk.END, "No transactions yet")
+            
             # Update stats
-            self.stats_label.config(text=f"📊 Total Accounts in System: {BankSystem.number_of_accounts}")
+            self.stats_label.config(text=f"📊 Total Accounts in System: {BankSystem.number_of_accounts}"
+                                         f"\n💰 Bank Total: ${BankSystem.money.format(BankSystem.aggregates.total_balance())}")
             
             # Change balance color based on amount
             balance = self.current_account.get_balance()
@@ -348,40 +295,39 @@ class BankGUI:
             balance_container.config(bg='#95a5a6')
             balance_container.children['!label'].config(bg='#95a5a6')
             
+            self.activity_list.delete(0, tk.END)
+            
             # Update stats
             self.stats_label.config(text=f"📊 Total Accounts in System: {BankSystem.number_of_accounts}\n🔐 Please log in to access your account")
     
     def create_savings_account(self):
         dialog = AccountCreationDialog(self.root, "Create Savings Account")
         if dialog.result:
-            try:
-                data = dialog.result
-                interest_rate = simpledialog.askfloat("Interest Rate", 
-                                                    "Enter interest rate (e.g., 0.05 for 5%):", 
-                                                    minvalue=0.01, maxvalue=1.0)
-                if interest_rate:
-                    account = SavingAccount(data['name'], data['balance'], 
-                                          data['email'], data['password'], interest_rate)
+            data = dialog.result
+            interest_rate = simpledialog.askfloat("Interest Rate", 
+                                                "Enter interest rate (e.g., 0.05 for 5%):", 
+                                                minvalue=0.01, maxvalue=1.0)
+            if interest_rate:
+                # Creating hashes the password, so it runs on a worker
+                def done(account):
                     messagebox.showinfo("Success", f"Savings account created for {data['name']}!")
                     self.update_info_display()
-            except ValueError as e:
-                messagebox.showerror("Error", str(e))
+                self.run_async(SavingAccount, done, data['name'], data['balance'], 
+                               data['email'], data['password'], interest_rate)
     
     def create_checking_account(self):
         dialog = AccountCreationDialog(self.root, "Create Checking Account")
         if dialog.result:
-            try:
-                data = dialog.result
-                fee = simpledialog.askfloat("Transaction Fee", 
-                                          "Enter transaction fee:", 
-                                          minvalue=0, maxvalue=100)
-                if fee is not None:
-                    account = CheckingAccount(data['name'], data['balance'], 
-                                            data['email'], data['password'], fee)
+            data = dialog.result
+            fee = simpledialog.askfloat("Transaction Fee", 
+                                      "Enter transaction fee:", 
+                                      minvalue=0, maxvalue=100)
+            if fee is not None:
+                def done(account):
                     messagebox.showinfo("Success", f"Checking account created for {data['name']}!")
                     self.update_info_display()
-            except ValueError as e:
-                messagebox.showerror("Error", str(e))
+                self.run_async(CheckingAccount, done, data['name'], data['balance'], 
+                               data['email'], data['password'], fee)
     
     def login_account(self):
         email = simpledialog.askstring("Login", "Enter your email:")
@@ -389,19 +335,28 @@ class BankGUI:
             account = BankSystem.find_account_by_email(email)
             if account:
                 password = simpledialog.askstring("Login", "Enter your password:", show='*')
-                if password and account.authenticate(password):
-                    self.current_account = account
-                    messagebox.showinfo("Success", f"Welcome, {account.get_name()}!")
-                    self.update_info_display()
-                else:
+                if not password:
                     messagebox.showerror("Error", "Invalid password!")
+                    return
+                
+                def done(token):
+                    if token:
+                        self.current_account = account
+                        self.session_token = token
+                        messagebox.showinfo("Success", f"Welcome, {account.get_name()}!")
+                        self.update_info_display()
+                    else:
+                        messagebox.showerror("Error", "Invalid password!")
+                self.run_async(account.login, done, password)
             else:
                 messagebox.showerror("Error", "Account not found!")
     
     def logout_account(self):
         if self.current_account:
             name = self.current_account.get_name()
+            BankSystem.sessions.revoke(self.session_token)
             self.current_account = None
+            self.session_token = None
             messagebox.showinfo("Logout", f"Goodbye, {name}!")
             self.update_info_display()
         else:
@@ -414,11 +369,13 @@ class BankGUI:
         
         amount = simpledialog.askfloat("Deposit", "Enter amount to deposit:", minvalue=0.01)
         if amount:
-            if self.current_account.deposit(amount):
-                messagebox.showinfo("Success", f"${amount:.2f} deposited successfully!")
-                self.update_info_display()
-            else:
-                messagebox.showerror("Error", "Invalid deposit amount!")
+            def done(ok):
+                if ok:
+                    messagebox.showinfo("Success", f"${amount:.2f} deposited successfully!")
+                    self.update_info_display()
+                else:
+                    messagebox.showerror("Error", "Invalid deposit amount!")
+            self.run_async(self.current_account.deposit, done, amount)
     
     def withdraw_money(self):
         if not self.current_account:
@@ -427,15 +384,19 @@ class BankGUI:
         
         amount = simpledialog.askfloat("Withdraw", "Enter amount to withdraw:", minvalue=0.01)
         if amount:
-            if self.current_account.withdraw(amount):
-                if isinstance(self.current_account, CheckingAccount):
-                    messagebox.showinfo("Success", 
-                                      f"${amount:.2f} withdrawn (+ ${self.current_account.transaction_fee} fee)!")
+            account = self.current_account
+            
+            def done(ok):
+                if ok:
+                    if isinstance(account, CheckingAccount):
+                        messagebox.showinfo("Success", 
+                                          f"${amount:.2f} withdrawn (+ ${account.transaction_fee} fee)!")
+                    else:
+                        messagebox.showinfo("Success", f"${amount:.2f} withdrawn successfully!")
+                    self.update_info_display()
                 else:
-                    messagebox.showinfo("Success", f"${amount:.2f} withdrawn successfully!")
-                self.update_info_display()
-            else:
-                messagebox.showerror("Error", "Insufficient funds or invalid amount!")
+                    messagebox.showerror("Error", "Insufficient funds or invalid amount!")
+            self.run_async(account.withdraw, done, amount)
     
     def transfer_money(self):
         if not self.current_account:
@@ -455,14 +416,28 @@ class BankGUI:
         if not amount:
             return
         
-        password = simpledialog.askstring("Transfer", "Enter your password for confirmation:", show='*')
-        if password:
-            result = self.current_account.transfer(recipient, amount, password)
+        # The login session authorizes the transfer; ask again only once it expired
+        account = self.current_account
+        password = None
+        if BankSystem.sessions.check(self.session_token) is not account:
+            password = simpledialog.askstring("Transfer", "Session expired. Enter your password for confirmation:", show='*')
+            if not password:
+                return
+        token = self.session_token
+        
+        # Re-login (scrypt) and the transfer itself both run on the worker
+        def work():
+            new_token = (account.login(password) or token) if password else token
+            return new_token, account.transfer(recipient, amount, password, token=new_token)
+        
+        def done(outcome):
+            self.session_token, result = outcome
             if "transferred" in result.lower():
                 messagebox.showinfo("Success", result)
                 self.update_info_display()
             else:
                 messagebox.showerror("Error", result)
+        self.run_async(work, done)
     
     def add_interest(self):
         if not self.current_account:
@@ -470,9 +445,10 @@ class BankGUI:
             return
         
         if isinstance(self.current_account, SavingAccount):
-            interest = self.current_account.add_interest()
-            messagebox.showinfo("Success", f"Interest of ${interest:.2f} added to your account!")
-            self.update_info_display()
+            def done(interest):
+                messagebox.showinfo("Success", f"Interest of ${interest:.2f} added to your account!")
+                self.update_info_display()
+            self.run_async(self.current_account.add_interest, done)
         else:
             messagebox.showwarning("Warning", "Interest can only be added to savings accounts!")
     
@@ -507,9 +483,13 @@ class BankGUI:
         title_label.pack(side=tk.LEFT, padx=20, pady=20)
         
         # Stats in header
-        total_balance = sum(acc.get_balance() for acc in BankSystem.accounts)
+        # Running totals (see Aggregates.py), no scan over the accounts
+        totals = BankSystem.aggregates
+        total_balance = BankSystem.money.format(totals.total_balance())
         stats_label = tk.Label(header_content, 
-                              text=f"📊 {len(BankSystem.accounts)} Accounts\n💰 Total: ${total_balance:,.2f}", 
+                              text=f"📊 {totals.count} Accounts "
+                                   f"({totals.type_count('savings')} savings, {totals.type_count('checking')} checking)"
+                                   f"\n💰 Total: ${total_balance}", 
                               font=("Arial", 12, "bold"), fg='#ecf0f1', bg='#2c3e50', justify=tk.RIGHT)
         stats_label.pack(side=tk.RIGHT, padx=20, pady=20)
         
@@ -517,30 +497,9 @@ class BankGUI:
         main_frame = tk.Frame(accounts_window, bg='#f8f9fa')
         main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # Create canvas and scrollbar for custom scrolling
-        canvas = tk.Canvas(main_frame, bg='#f8f9fa', highlightthickness=0)
-        scrollbar = tk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = tk.Frame(canvas, bg='#f8f9fa')
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        # Pack scrollbar and canvas
-        scrollbar.pack(side="right", fill="y")
-        canvas.pack(side="left", fill="both", expand=True)
-        
-        # Create account cards
-        self.create_account_cards(scrollable_frame)
-        
-        # Bind mousewheel to canvas
-        def _on_mousewheel(event):
-            canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-        canvas.bind_all("<MouseWheel>", _on_mousewheel)
+        # Virtualized list: only the visible cards exist, scrolling rebinds them
+        account_list = AccountListView(main_frame, lambda: self.current_account)
+        account_list.pack(fill=tk.BOTH, expand=True)
         
         # Footer with close button
         footer_frame = tk.Frame(accounts_window, bg='#ecf0f1', height=60)
@@ -553,126 +512,207 @@ class BankGUI:
         close_btn.pack(side=tk.RIGHT, padx=20, pady=15)
         
         refresh_btn = tk.Button(footer_frame, text="🔄 Refresh", 
-                               command=lambda: self.refresh_accounts_view(scrollable_frame),
+                               command=lambda: self.refresh_accounts_view(account_list),
                                bg='#3498db', fg='white', font=("Arial", 12, "bold"),
                                padx=30, pady=10)
         refresh_btn.pack(side=tk.RIGHT, padx=10, pady=15)
     
-    def create_account_cards(self, parent_frame):
-        # Clear existing cards
-        for widget in parent_frame.winfo_children():
-            widget.destroy()
-            
-        for i, account in enumerate(BankSystem.accounts):
-            # Determine card colors based on account type
-            if isinstance(account, SavingAccount):
-                card_color = '#27ae60'  # Green for savings
-                icon = '💰'
-                type_text = f"Savings Account\nInterest Rate: {account.interest_rate*100}%"
-            elif isinstance(account, CheckingAccount):
-                card_color = '#3498db'  # Blue for checking
-                icon = '💳'
-                type_text = f"Checking Account\nTransaction Fee: ${account.transaction_fee}"
-            else:
-                card_color = '#95a5a6'  # Gray for basic
-                icon = '🏛️'
-                type_text = "Standard Account"
-            
-            # Main card frame
-            card_frame = tk.Frame(parent_frame, bg='white', relief=tk.RAISED, bd=2)
-            card_frame.pack(fill=tk.X, padx=10, pady=8)
-            
-            # Card header with colored strip
-            header_strip = tk.Frame(card_frame, bg=card_color, height=5)
-            header_strip.pack(fill=tk.X)
-            
-            # Card content
-            content_frame = tk.Frame(card_frame, bg='white', pady=15, padx=20)
-            content_frame.pack(fill=tk.X)
-            
-            # Top row: Icon, Name, and Balance
-            top_row = tk.Frame(content_frame, bg='white')
-            top_row.pack(fill=tk.X, pady=(0, 10))
-            
-            # Icon and name on left
-            left_section = tk.Frame(top_row, bg='white')
-            left_section.pack(side=tk.LEFT, fill=tk.X, expand=True)
-            
-            icon_label = tk.Label(left_section, text=icon, font=("Arial", 24), bg='white')
-            icon_label.pack(side=tk.LEFT, padx=(0, 10))
-            
-            name_section = tk.Frame(left_section, bg='white')
-            name_section.pack(side=tk.LEFT, fill=tk.X, expand=True)
-            
-            name_label = tk.Label(name_section, text=account.get_name(), 
-                                 font=("Arial", 16, "bold"), bg='white', fg='#2c3e50')
-            name_label.pack(anchor=tk.W)
-            
-            email_label = tk.Label(name_section, text=f"📧 {account.email}", 
-                                  font=("Arial", 10), bg='white', fg='#7f8c8d')
-            email_label.pack(anchor=tk.W)
-            
-            # Balance on right
-            balance_section = tk.Frame(top_row, bg='white')
-            balance_section.pack(side=tk.RIGHT)
-            
-            balance_label = tk.Label(balance_section, text=f"${account.get_balance():,.2f}", 
-                                   font=("Arial", 18, "bold"), bg='white', fg=card_color)
-            balance_label.pack()
-            
-            # Bottom section: Account type and status
-            bottom_row = tk.Frame(content_frame, bg='white')
-            bottom_row.pack(fill=tk.X, pady=(5, 0))
-            
-            # Account type info
-            type_info_frame = tk.Frame(bottom_row, bg='#f8f9fa', relief=tk.GROOVE, bd=1)
-            type_info_frame.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 10))
-            
-            type_label = tk.Label(type_info_frame, text=type_text, 
-                                 font=("Arial", 9), bg='#f8f9fa', fg='#2c3e50', justify=tk.LEFT)
-            type_label.pack(padx=10, pady=5)
-            
-            # Status indicator
-            status_frame = tk.Frame(bottom_row, bg='white')
-            status_frame.pack(side=tk.RIGHT)
-            
-            # Check if this is the currently logged-in account
-            if self.current_account and self.current_account == account:
-                status_text = "🟢 Active"
-                status_color = '#27ae60'
-            else:
-                status_text = "⚫ Inactive"
-                status_color = '#95a5a6'
-            
-            status_label = tk.Label(status_frame, text=status_text, 
-                                   font=("Arial", 10, "bold"), bg='white', fg=status_color)
-            status_label.pack()
-            
-            # Add hover effects
-            def on_enter(e, frame=card_frame):
-                frame.config(relief=tk.RAISED, bd=3)
-            
-            def on_leave(e, frame=card_frame):
-                frame.config(relief=tk.RAISED, bd=2)
-            
-            card_frame.bind("<Enter>", on_enter)
-            card_frame.bind("<Leave>", on_leave)
-            
-            # Make all child widgets also respond to hover
-            for child in self.get_all_children(card_frame):
-                child.bind("<Enter>", on_enter)
-                child.bind("<Leave>", on_leave)
-    
-    def get_all_children(self, widget):
+    @staticmethod
+    def get_all_children(widget):
         """Recursively get all child widgets"""
         children = [widget]
         for child in widget.winfo_children():
-            children.extend(self.get_all_children(child))
+            children.extend(BankGUI.get_all_children(child))
         return children
     
-    def refresh_accounts_view(self, scrollable_frame):
+    def refresh_accounts_view(self, account_list):
         """Refresh the accounts view"""
-        self.create_account_cards(scrollable_frame)
+        account_list.refresh()
+
+# One account card; built once and rebound to other accounts while scrolling
+class AccountCard:
+    def __init__(self, parent):
+        self.account = None
+        self.shown = {}  # label -> last text/colour, so rebinding only touches what changed
+        
+        # Main card frame
+        self.frame = tk.Frame(parent, bg='white', relief=tk.RAISED, bd=2)
+        
+        # Card header with colored strip
+        self.header_strip = tk.Frame(self.frame, bg='#95a5a6', height=5)
+        self.header_strip.pack(fill=tk.X)
+        
+        # Card content
+        content_frame = tk.Frame(self.frame, bg='white', pady=15, padx=20)
+        content_frame.pack(fill=tk.X)
+        
+        # Top row: Icon, Name, and Balance
+        top_row = tk.Frame(content_frame, bg='white')
+        top_row.pack(fill=tk.X, pady=(0, 10))
+        
+        # Icon and name on left
+        left_section = tk.Frame(top_row, bg='white')
+        left_section.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        self.icon_label = tk.Label(left_section, text='🏛️', font=("Arial", 24), bg='white')
+        self.icon_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        name_section = tk.Frame(left_section, bg='white')
+        name_section.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        self.name_label = tk.Label(name_section, text="", 
+                                   font=("Arial", 16, "bold"), bg='white', fg='#2c3e50')
+        self.name_label.pack(anchor=tk.W)
+        
+        self.email_label = tk.Label(name_section, text="", 
+                                    font=("Arial", 10), bg='white', fg='#7f8c8d')
+        self.email_label.pack(anchor=tk.W)
+        
+        # Balance on right
+        balance_section = tk.Frame(top_row, bg='white')
+        balance_section.pack(side=tk.RIGHT)
+        
+        self.balance_label = tk.Label(balance_section, text="", 
+                                      font=("Arial", 18, "bold"), bg='white', fg='#95a5a6')
+        self.balance_label.pack()
+        
+        # Bottom section: Account type and status
+        bottom_row = tk.Frame(content_frame, bg='white')
+        bottom_row.pack(fill=tk.X, pady=(5, 0))
+        
+        # Account type info
+        type_info_frame = tk.Frame(bottom_row, bg='#f8f9fa', relief=tk.GROOVE, bd=1)
+        type_info_frame.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 10))
+        
+        self.type_label = tk.Label(type_info_frame, text="\n", 
+                                   font=("Arial", 9), bg='#f8f9fa', fg='#2c3e50', justify=tk.LEFT)
+        self.type_label.pack(padx=10, pady=5)
+        
+        # Status indicator
+        status_frame = tk.Frame(bottom_row, bg='white')
+        status_frame.pack(side=tk.RIGHT)
+        
+        self.status_label = tk.Label(status_frame, text="", 
+                                     font=("Arial", 10, "bold"), bg='white', fg='#95a5a6')
+        self.status_label.pack()
+        
+        # Add hover effects (bound once per card, not per account)
+        for child in BankGUI.get_all_children(self.frame):
+            child.bind("<Enter>", lambda e: self.frame.config(relief=tk.RAISED, bd=3))
+            child.bind("<Leave>", lambda e: self.frame.config(relief=tk.RAISED, bd=2))
+    
+    def __set(self, widget, **options):
+        if self.shown.get(widget) != options:
+            self.shown[widget] = options
+            widget.config(**options)
+    
+    def bind(self, account, active):
+        # Determine card colors based on account type
+        if isinstance(account, SavingAccount):
+            card_color = '#27ae60'  # Green for savings
+            icon = '💰'
+            type_text = f"Savings Account\nInterest Rate: {account.interest_rate*100}%"
+        elif isinstance(account, CheckingAccount):
+            card_color = '#3498db'  # Blue for checking
+            icon = '💳'
+            type_text = f"Checking Account\nTransaction Fee: ${account.transaction_fee}"
+        else:
+            card_color = '#95a5a6'  # Gray for basic
+            icon = '🏛️'
+            type_text = "Standard Account"
+        
+        # Check if this is the currently logged-in account
+        if active:
+            status_text = "🟢 Active"
+            status_color = '#27ae60'
+        else:
+            status_text = "⚫ Inactive"
+            status_color = '#95a5a6'
+        
+        self.account = account
+        self.__set(self.header_strip, bg=card_color)
+        self.__set(self.icon_label, text=icon)
+        self.__set(self.name_label, text=account.get_name())
+        self.__set(self.email_label, text=f"📧 {account.email}")
+        self.__set(self.balance_label, text=f"${BankSystem.money.format(account.get_balance_minor())}", fg=card_color)
+        self.__set(self.type_label, text=type_text)
+        self.__set(self.status_label, text=status_text, fg=status_color)
+
+# Scrollable list of account cards that only builds enough cards to fill
+# the visible area. Every card has the same height, so the cards on screen
+# are accounts[offset // height ...] and scrolling just rebinds them.
+class AccountListView(tk.Frame):
+    GAP = 16  # vertical space between cards
+    
+    def __init__(self, parent, active_account=lambda: None):
+        super().__init__(parent, bg='#f8f9fa')
+        self.active_account = active_account
+        self.accounts = []
+        self.cards = []
+        self.offset = 0  # pixels scrolled from the top
+        
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.body = tk.Frame(self, bg='#f8f9fa')
+        self.body.pack(side="left", fill="both", expand=True)
+        
+        # Measure one card to get the row height
+        probe = AccountCard(self.body)
+        probe.frame.update_idletasks()
+        self.row_height = probe.frame.winfo_reqheight() + self.GAP
+        probe.frame.destroy()
+        
+        self.body.bind("<Configure>", lambda e: self.layout())
+        self.bind_all("<MouseWheel>", self.on_mousewheel)
+        self.bind("<Destroy>", lambda e: self.unbind_all("<MouseWheel>"))
+        self.refresh()
+    
+    # Pick up added/removed accounts and changed balances; cards are updated in place
+    def refresh(self):
+        self.accounts = list(BankSystem.accounts)
+        self.layout()
+    
+    def total_height(self):
+        return len(self.accounts) * self.row_height
+    
+    def scroll_to(self, offset):
+        view = self.body.winfo_height()
+        self.offset = max(0, min(int(offset), self.total_height() - view))
+        self.layout()
+    
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * self.total_height())
+        elif unit == "pages":
+            self.scroll_to(self.offset + int(amount) * self.body.winfo_height())
+        else:
+            self.scroll_to(self.offset + int(amount) * self.row_height // 4)
+    
+    def on_mousewheel(self, event):
+        self.scroll_to(self.offset - int(event.delta / 120) * self.row_height // 4)
+    
+    # Place the pooled cards over the rows that are on screen
+    def layout(self):
+        view = max(self.body.winfo_height(), 1)
+        self.offset = max(0, min(self.offset, self.total_height() - view))
+        needed = view // self.row_height + 2
+        while len(self.cards) < needed:
+            self.cards.append(AccountCard(self.body))
+        
+        first = self.offset // self.row_height
+        active = self.active_account()
+        for i, card in enumerate(self.cards):
+            index = first + i
+            if i < needed and index < len(self.accounts):
+                account = self.accounts[index]
+                card.bind(account, active is account)
+                card.frame.place(x=10, y=index * self.row_height - self.offset + self.GAP // 2,
+                                 relwidth=1, width=-20)
+            else:
+                card.frame.place_forget()
+        
+        total = max(self.total_height(), 1)
+        self.scrollbar.set(self.offset / total, min(1.0, (self.offset + view) / total))
 
 class AccountCreationDialog:
     def __init__(self, parent, title):
@@ -768,6 +808,16 @@ class AccountCreationDialog:
 
 # Main application
 if __name__ == "__main__":
+    import sys
+    # Optional storage: python BankSystemGUI.py bank.journal (or bank.db for SQLite)
+    if len(sys.argv) > 1 and sys.argv[1].endswith((".db", ".sqlite")):
+        from SqliteStore import open_sqlite
+        open_sqlite(sys.argv[1], BankSystem, SavingAccount, CheckingAccount)
+    elif len(sys.argv) > 1:
+        from Journal import open_journal
+        open_journal(sys.argv[1], BankSystem, SavingAccount, CheckingAccount)
+    BankSystem.hash_passwords = True
     root = tk.Tk()
     app = BankGUI(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    app.executor.shutdown()
\ No newline at end of file
@@ -0,0 +1,177 @@
+# Batch transfer engine with multilateral netting
+#
+# Records are (from, to, amount) where from/to are accounts or emails.
+# Settlement batches are pre-authorized, so no password is checked.
+# Every record is validated against running balances in input order, so
+# accepted/rejected records and final balances are the same as calling
+# transfer() once per record. Each account's net change is then applied once.
+# All touched accounts stay locked from validation to the last posting, and
+# accepted transfers count against velocity limits and show up in history
+# and the aggregate flows like transfer() does.
+
+import math
+
+ALL_OR_NOTHING = "all_or_nothing"
+BEST_EFFORT = "best_effort"
+
+
+class BatchResult:
+    def __init__(self):
+        self.applied = 0        # number of accepted transfers
+        self.rejected = []      # (index, record, reason)
+        self.net = {}           # account -> net balance change in minor units
+        self.committed = False
+
+    def __repr__(self):
+        return (f"BatchResult(applied={self.applied}, rejected={len(self.rejected)}, "
+                f"accounts={len(self.net)}, committed={self.committed})")
+
+
+# Minor units of a record's amount, or 0 when it isn't a finite number
+def _minor(money, amount):
+    if not isinstance(amount, (int, float)):
+        return 0
+    if isinstance(amount, float) and not math.isfinite(amount * money.minor_unit):
+        return 0
+    return money.to_minor(amount)
+
+
+def _resolve(bank, key):
+    if isinstance(key, str):
+        return bank.find_account_by_email(key)
+    return key
+
+
+# Validate, net and apply a batch of transfers
+# bank is the BankSystem class that owns the registry and journal
+def batch_transfer(bank, records, mode=BEST_EFFORT):
+    if mode not in (ALL_OR_NOTHING, BEST_EFFORT):
+        raise ValueError(f"Unknown batch mode: {mode}")
+    result = BatchResult()
+    money = bank.money
+    limits = bank.limits
+    candidates = []     # (index, record, source, target, minor)
+    for index, record in enumerate(records):
+        source_key, target_key, amount = record
+        source = _resolve(bank, source_key)
+        target = _resolve(bank, target_key)
+        if source is None or target is None:
+            result.rejected.append((index, record, "Unknown account"))
+            continue
+        minor = _minor(money, amount)
+        if minor <= 0:
+            result.rejected.append((index, record, "Invalid transfer amount"))
+            continue
+        candidates.append((index, record, source, target, minor))
+
+    touched = {account for _, _, source, target, _ in candidates for account in (source, target)}
+    with bank.lock_accounts(*touched):
+        running = {}    # account -> balance (minor units) after the records accepted so far
+        start = {}      # account -> balance (minor units) before the batch
+        accepted = []   # (source, target, minor, fee)
+        for index, record, source, target, minor in candidates:
+            for account in (source, target):
+                if account not in running:
+                    running[account] = start[account] = account.get_balance_minor()
+            # Same checks as transfer(): the amount, then the limits, then the amount plus any fee
+            fee = money.to_minor(getattr(source, 'transaction_fee', 0))
+            if running[source] < minor or minor + fee > running[source]:
+                result.rejected.append((index, record, "Insufficient funds"))
+                continue
+            if limits is not None:
+                broken = limits.reserve(source, "transfers", minor, target)
+                if broken is not None:
+                    result.rejected.append((index, record, f"Velocity limit exceeded: {broken}"))
+                    continue
+            running[source] -= minor + fee
+            running[target] += minor
+            accepted.append((source, target, minor, fee))
+
+        result.applied = len(accepted)
+        result.net = {account: running[account] - start[account] for account in running
+                      if running[account] != start[account]}
+        if (mode == ALL_OR_NOTHING and result.rejected) or not _apply_net(bank, result.net):
+            if limits is not None:
+                for source, target, minor, _ in accepted:
+                    limits.release(source, "transfers", minor, target)
+            result.applied = 0
+            result.net = {}
+            return result
+
+    for source, target, minor, fee in accepted:
+        if fee:
+            source.record_activity("fees", fee)
+        source.record_activity("transfers", minor, target)
+    result.committed = True
+    return result
+
+
+class _Rollback(Exception):
+    pass
+
+
+# One balance change per account, journaled as a single batch record.
+# Pending interest is posted first, since the running balances counted it.
+# Debits go first; if one fails, raising out of the transaction takes back
+# the ones already made and drops the batch record. Call with the accounts locked.
+def _apply_net(bank, net):
+    try:
+        with bank.transaction():
+            for account in net:
+                account.accrue()
+            for account, delta in net.items():
+                if delta < 0 and not bank.withdraw_minor(account, -delta):
+                    raise _Rollback
+            for account, delta in net.items():
+                if delta > 0:
+                    bank.deposit_minor(account, delta)
+    except _Rollback:
+        return False
+    return True
+
+
+# Benchmark: one transfer() per record vs. the netted batch
+if __name__ == "__main__":
+    import random
+    import sys
+    import time
+    from bank import BankSystem, SavingAccount, CheckingAccount
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    accounts = 10_000
+    rng = random.Random(7)
+    records = [(f"user{rng.randrange(accounts + 10)}@bank.com",
+                f"user{rng.randrange(accounts)}@bank.com",
+                round(rng.uniform(1, 400), 2)) for _ in range(count)]
+
+    def build():
+        BankSystem.accounts.clear()
+        for i in range(accounts):
+            if i % 2:
+                SavingAccount(f"user{i}", 500 + i % 100, f"user{i}@bank.com", "pw")
+            else:
+                CheckingAccount(f"user{i}", 500 + i % 100, f"user{i}@bank.com", "pw", 1)
+
+    build()
+    start = time.perf_counter()
+    failed = 0
+    for source, target, amount in records:
+        source = BankSystem.find_account_by_email(source)
+        target = BankSystem.find_account_by_email(target)
+        if source is None or target is None:
+            failed += 1
+        elif not source.transfer(target, amount, "pw").startswith("Transferred"):
+            failed += 1
+    sequential = time.perf_counter() - start
+    expected = [acc.get_balance_minor() for acc in BankSystem.accounts]
+
+    build()
+    start = time.perf_counter()
+    result = batch_transfer(BankSystem, records)
+    batch = time.perf_counter() - start
+    actual = [acc.get_balance_minor() for acc in BankSystem.accounts]
+
+    print(f"transfers: {count:,}  rejected: {len(result.rejected):,} (sequential: {failed:,})")
+    print(f"one at a time: {sequential:.3f} s  ({count / sequential:,.0f} /s)")
+    print(f"batch netted:  {batch:.3f} s  ({count / batch:,.0f} /s), {len(result.net):,} balance updates")
+    print("balances match:", actual == expected)
@@ -0,0 +1,230 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from bank import BankSystem, SavingAccount, CheckingAccount
+
+# Scale benchmarks for the banking core
+#
+#   python Benchmarks.py --sizes 1e3,1e4,1e5,1e6 --output results.json
+#   python Benchmarks.py --output new.json --compare results.json
+#
+# Each size gets a fresh bank of mixed savings/checking accounts. Every
+# operation is timed over up to --ops calls on random accounts and the best
+# of --repeat runs is kept, in ns per call. --compare flags any operation
+# that got slower than the baseline by more than --threshold and exits 1.
+# 1e7 accounts needs several GB of memory.
+#
+# The "startup" group times fresh interpreters: a bare one, `import bank`,
+# a `python -m bank balance` call and, for contrast, importing the GUI.
+
+OPERATIONS = ("create", "find_by_email", "find_by_name", "deposit", "withdraw_savings",
+              "withdraw_checking", "transfer", "add_interest", "total_scan", "total_aggregate")
+
+
+def reset_bank():
+    BankSystem.accounts.clear()
+    BankSystem.aggregates.reset()
+    BankSystem.number_of_accounts = 0
+    BankSystem.journal = None
+    gc.collect()
+
+
+def populate(size):
+    for i in range(size):
+        if i % 2:
+            SavingAccount(f"user{i}", 1000 + i % 500, f"user{i}@bank.com", "pw", 0.03)
+        else:
+            CheckingAccount(f"user{i}", 1000 + i % 500, f"user{i}@bank.com", "pw", 1)
+
+
+def best_of(repeat, run, calls):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e9
+
+
+def bench_size(size, ops, repeat, seed=1):
+    reset_bank()
+    start = time.perf_counter()
+    populate(size)
+    results = {"create": (time.perf_counter() - start) / size * 1e9}
+
+    rng = random.Random(seed)
+    calls = min(ops, size)
+    picks = [rng.randrange(size) for _ in range(calls)]
+    emails = [f"user{i}@bank.com" for i in picks]
+    names = [f"user{i}" for i in picks]
+    accounts = [BankSystem.find_account_by_email(email) for email in emails]
+    savings = [acc for acc in accounts if isinstance(acc, SavingAccount)]
+    checking = [acc for acc in accounts if isinstance(acc, CheckingAccount)]
+    targets = accounts[1:] + accounts[:1]
+    find_email = BankSystem.find_account_by_email
+    find_name = BankSystem.find_account_by_name
+
+    def lookups_by_email():
+        for email in emails:
+            find_email(email)
+
+    def lookups_by_name():
+        for name in names:
+            find_name(name)
+
+    def deposits():
+        for acc in accounts:
+            acc.deposit(2.5)
+
+    def withdrawals(group):
+        def run():
+            for acc in group:
+                acc.withdraw(1.25)
+        return run
+
+    def transfers():
+        for acc, target in zip(accounts, targets):
+            acc.transfer(target, 1, "pw")
+
+    def interest():
+        for acc in savings:
+            acc.add_interest()
+
+    # The GUI totals: a scan of every account vs. the running aggregate
+    def total_scan():
+        sum(acc.get_balance() for acc in BankSystem.accounts)
+
+    def total_aggregate():
+        BankSystem.money.to_major(BankSystem.aggregates.total_balance())
+
+    results["find_by_email"] = best_of(repeat, lookups_by_email, calls)
+    results["find_by_name"] = best_of(repeat, lookups_by_name, calls)
+    results["deposit"] = best_of(repeat, deposits, calls)
+    results["withdraw_savings"] = best_of(repeat, withdrawals(savings), max(len(savings), 1))
+    results["withdraw_checking"] = best_of(repeat, withdrawals(checking), max(len(checking), 1))
+    results["transfer"] = best_of(repeat, transfers, calls)
+    results["add_interest"] = best_of(repeat, interest, max(len(savings), 1))
+    results["total_scan"] = best_of(repeat, total_scan, 1)
+    results["total_aggregate"] = best_of(repeat, total_aggregate, 1)
+    assert not BankSystem.aggregates.recount(BankSystem.accounts), "aggregates drifted"
+    return results
+
+
+# Wall time of fresh interpreters, best of repeat, in ns
+def bench_startup(repeat):
+    root = os.path.dirname(os.path.abspath(__file__))
+    folder = tempfile.mkdtemp()
+    journal = os.path.join(folder, "bank.journal")
+    env = dict(os.environ, PYTHONPATH=root, BANK_JOURNAL=journal, BANK_PASSWORD="pw")
+    subprocess.run([sys.executable, "-m", "bank", "create", "savings", "Ada", "ada@bank.com", "100"],
+                   env=env, cwd=folder, check=True, capture_output=True)
+    commands = {
+        "startup_interpreter": ["-c", "pass"],
+        "startup_import_bank": ["-c", "import bank"],
+        "startup_cli_balance": ["-m", "bank", "balance", "ada@bank.com"],
+        "startup_import_gui": ["-c", "import BankSystemGUI"],
+    }
+    results = {}
+    for name, command in commands.items():
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            done = subprocess.run([sys.executable, *command], env=env, cwd=folder, capture_output=True)
+            elapsed = time.perf_counter() - start
+            if done.returncode != 0:
+                break       # no Tk on this machine
+            best = min(best, elapsed)
+        else:
+            results[name] = best * 1e9
+    check = "import sys; from bank.cli import main; main(); assert 'tkinter' not in sys.modules"
+    subprocess.run([sys.executable, "-c", check, "balance", "ada@bank.com"], env=env, cwd=folder,
+                   check=True, capture_output=True)
+    return results
+
+
+def run_suite(sizes, ops, repeat, startup=True):
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "ops": ops,
+            "repeat": repeat,
+        },
+        "results": {},
+    }
+    for size in sizes:
+        report["results"][str(size)] = bench_size(size, ops, repeat)
+        print_size(size, report["results"][str(size)])
+    reset_bank()
+    if startup:
+        results = report["results"]["startup"] = bench_startup(max(repeat, 5))
+        print("startup (fresh interpreter, wall time)")
+        for op, value in results.items():
+            print(f"  {op:<20} {value / 1e6:>11.1f} ms")
+    return report
+
+
+def print_size(size, results):
+    print(f"{size:,} accounts")
+    for op in OPERATIONS:
+        print(f"  {op:<20} {results[op]:>14,.0f} ns")
+
+
+# (size, op, baseline ns, current ns, ratio) for every op slower than allowed
+def compare(baseline, current, threshold):
+    regressions = []
+    for size, results in current["results"].items():
+        for op, value in results.items():
+            base = baseline.get("results", {}).get(size, {}).get(op)
+            if base and value / base > 1 + threshold:
+                regressions.append((size, op, base, value, value / base))
+    return regressions
+
+
+def parse_sizes(text):
+    return [int(float(part)) for part in text.split(",") if part]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banking core scale benchmarks")
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes("1e3,1e4,1e5"),
+                        help="comma separated account counts (default 1e3,1e4,1e5)")
+    parser.add_argument("--ops", type=int, default=100_000, help="calls per operation (capped at size)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per operation, best is kept")
+    parser.add_argument("--no-startup", action="store_true", help="skip the interpreter startup timings")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="allowed slowdown before flagging a regression (default 0.15)")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.sizes, args.ops, args.repeat, startup=not args.no_startup)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        for size, op, base, value, ratio in regressions:
+            label = f"{int(size):,}" if size.isdigit() else size
+            print(f"REGRESSION {op} @ {label}: {base:,.0f} -> {value:,.0f} ns ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional
+    numpy = None
+
+INT64_MAX = 2 ** 63 - 1
+
+
+# Interest for each balance (minor units) at each rate, as an array('q').
+# Same rounding as MoneyContext.apply_rate: balance * rate computed exactly
+# from the rate's decimal value, then rounded half to even; negative
+# results are 0. So every amount matches SavingAccount.add_interest.
+def interest_for(balances, rates, money, use_numpy=None):
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    if use_numpy and len(balances):
+        return _interest_numpy(balances, rates, money)
+    interest = array('q', bytes(8 * len(balances)))
+    for row, (minor, rate) in enumerate(zip(balances, rates)):
+        if rate:
+            interest[row] = max(money.apply_rate(minor, rate), 0)
+    return interest
+
+
+# Integer divmod per distinct rate (there are only a handful), so it stays exact
+def _interest_numpy(balances, rates, money):
+    balances = numpy.frombuffer(balances, dtype=numpy.int64)
+    rates = numpy.frombuffer(rates, dtype=numpy.float64)
+    cents = numpy.zeros(len(balances), dtype=numpy.int64)
+    for rate in numpy.unique(rates):
+        rate = float(rate)
+        if not rate:
+            continue
+        rows = numpy.nonzero(rates == rate)[0]
+        part = balances[rows]
+        numerator, denominator = money.ratio(rate)
+        if (denominator > INT64_MAX // 2
+                or int(numpy.abs(part).max()) > INT64_MAX // abs(numerator)):
+            # Would overflow int64: this rate goes through Python integers
+            cents[rows] = [money.apply_rate(int(minor), rate) for minor in part]
+            continue
+        quotient, remainder = numpy.divmod(part * numerator, denominator)
+        doubled = 2 * remainder
+        quotient += (doubled > denominator) | ((doubled == denominator) & (quotient % 2 == 1))
+        cents[rows] = quotient
+    cents[cents < 0] = 0
+    # Drop the buffer views so the caller's arrays can grow again
+    del balances, rates
+    interest = array('q')
+    interest.frombytes(cents.tobytes())
+    return interest
+
+
+# Post interest to every savings row of a CompactAccountStore in one pass
+# Returns (interest, total): per-row interest in minor units (0 for other
+# kinds, whose rate column is 0) and the total posted
+def add_interest_all(store, use_numpy=None):
+    interest = interest_for(store.balances, store.rates, store.money, use_numpy)
+    balances = store.balances
+    total = 0
+    for row, minor in enumerate(interest):
+        if minor:
+            balances[row] += minor
+            total += minor
+    return interest, total
+
+
+# Post interest to every SavingAccount of a bank (e.g. BankSystem) at once.
+# The amounts are computed in one vectorized pass, then posted `chunk`
+# accounts at a time: the chunk's locks are held until its journal record
+# is written, so a later withdrawal of the interest can't reach the journal
+# first. An account whose balance moved in between gets its interest
+# recomputed on the spot. Returns the total posted in minor units.
+def add_interest_bank(bank, use_numpy=None, chunk=1024):
+    accounts = [account for account in bank.accounts if account.kind == "savings"]
+    balances = array('q', (account.get_balance_minor() for account in accounts))
+    rates = array('d', (account.interest_rate for account in accounts))
+    interest = interest_for(balances, rates, bank.money, use_numpy)
+    total = 0
+    for start in range(0, len(accounts), chunk):
+        part = accounts[start:start + chunk]
+        with bank.lock_accounts(*part), bank.transaction():
+            for account, minor, amount in zip(part, balances[start:start + chunk], interest[start:start + chunk]):
+                if account.get_balance_minor() != minor:
+                    amount = bank.money.apply_rate(account.get_balance_minor(), account.interest_rate)
+                if account.deposit_minor(amount):
+                    account.record_activity("interest", amount)
+                    total += amount
+    return total
+
+
+# Benchmark: per-account add_interest vs. the bulk pass
+if __name__ == "__main__":
+    import sys
+    import time
+    from bank import BankSystem, SavingAccount
+    from CompactStore import CompactAccountStore, SavingAccountView
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    def build():
+        store = CompactAccountStore()
+        for i in range(count):
+            if i % 2:
+                store.add_saving(f"user{i}", 100 + i * 1.37, f"user{i}@bank.com", "pw", 0.01 + (i % 7) / 100)
+            else:
+                store.add_checking(f"user{i}", 100 + i * 1.37, f"user{i}@bank.com", "pw", 5)
+        return store
+
+    reference = build()
+    start = time.perf_counter()
+    expected = 0
+    for account in reference:
+        if isinstance(account, SavingAccountView):
+            expected += BankSystem.money.to_minor(account.add_interest())
+    loop = time.perf_counter() - start
+    print(f"add_interest loop: {loop:8.3f} s  total {expected / 100:,.2f}")
+
+    modes = [False] + ([True] if numpy is not None else [])
+    for use_numpy in modes:
+        store = build()
+        start = time.perf_counter()
+        interest, total = add_interest_all(store, use_numpy=use_numpy)
+        elapsed = time.perf_counter() - start
+        label = "numpy" if use_numpy else "pure python"
+        same = total == expected and store.balances == reference.balances
+        print(f"bulk ({label}): {elapsed:8.3f} s  total {total / 100:,.2f}  matches loop: {same}")
+
+    # The bank's own savings accounts, against SavingAccount.add_interest one by one
+    BankSystem.history = None
+    size = min(count, 200_000)
+    for use_numpy in modes:
+        BankSystem.accounts.clear()
+        accounts = [SavingAccount(f"user{i}", 100 + i * 1.37, f"user{i}@bank.com", "pw", 0.01 + (i % 7) / 100)
+                    for i in range(size)]
+        expected = [acc.get_balance_minor() + BankSystem.money.apply_rate(acc.get_balance_minor(), acc.interest_rate)
+                    for acc in accounts]
+        start = time.perf_counter()
+        add_interest_bank(BankSystem, use_numpy=use_numpy)
+        elapsed = time.perf_counter() - start
+        same = [acc.get_balance_minor() for acc in accounts] == expected
+        label = "numpy" if use_numpy else "pure python"
+        print(f"BankSystem savings ({size:,}, {label}): {elapsed:8.3f} s  matches add_interest: {same}")
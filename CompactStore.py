@@ -0,0 +1,232 @@
+from array import array
+
+from bank import BankSystem
+from Credentials import hash_password, is_hashed, verify_password
+
+# Account kinds stored in the kinds column
+BASIC = 0
+SAVINGS = 1
+CHECKING = 2
+
+
+# Compact storage mode: one row per account held in typed columns
+# Money is stored as integer minor units, rates as doubles, converted and
+# rounded by the same MoneyContext as the bank (BankSystem.money by default)
+# Rows are append-only, accounts are handed out as small __slots__ views
+class CompactAccountStore:
+    def __init__(self, money=None):
+        self.money = BankSystem.money if money is None else money
+        self.kinds = array('b')
+        self.balances = array('q')   # minor units
+        self.rates = array('d')      # interest rate (savings only)
+        self.fees = array('q')       # transaction fee in minor units (checking only)
+        self.names = []
+        self.emails = []
+        self.passwords = []
+        self.__by_email = {}         # email -> row
+        self.__by_name = {}          # name -> first row with that name
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __iter__(self):
+        for row in range(len(self.kinds)):
+            yield self.account(row)
+
+    # Same validation rules as BankSystem.__set_balance / __set_name
+    def __add_row(self, kind, name, balance, email, password, rate, fee):
+        if not (isinstance(balance, (int, float)) and balance > 0 and self.money.to_minor(balance) > 0):
+            raise ValueError("Invalid balance: must be a positive number")
+        if not (isinstance(name, str) and name.strip()):
+            raise ValueError("Invalid name: must be text")
+        if email in self.__by_email:
+            raise ValueError("An account with this email already exists")
+        if BankSystem.hash_passwords and not is_hashed(password):
+            password = hash_password(password)
+        row = len(self.kinds)
+        self.kinds.append(kind)
+        self.balances.append(self.money.to_minor(balance))
+        self.rates.append(rate)
+        self.fees.append(self.money.to_minor(fee))
+        self.names.append(name)
+        self.emails.append(email)
+        self.passwords.append(password)
+        self.__by_email[email] = row
+        self.__by_name.setdefault(name, row)
+        return self.account(row)
+
+    def add_account(self, name, balance, email, password):
+        return self.__add_row(BASIC, name, balance, email, password, 0.0, 0)
+
+    def add_saving(self, name, balance, email, password, interest_rate=0.03):
+        return self.__add_row(SAVINGS, name, balance, email, password, interest_rate, 0)
+
+    def add_checking(self, name, balance, email, password, transaction_fee=5):
+        return self.__add_row(CHECKING, name, balance, email, password, 0.0, transaction_fee)
+
+    # Build a view object for a row
+    def account(self, row):
+        return _VIEW_TYPES[self.kinds[row]](self, row)
+
+    def find_account_by_email(self, email):
+        row = self.__by_email.get(email)
+        if row is None:
+            return None
+        return self.account(row)
+
+    def find_account_by_name(self, name):
+        row = self.__by_name.get(name)
+        if row is None:
+            return None
+        return self.account(row)
+
+    def total_balance(self):
+        return self.money.to_major(sum(self.balances))
+
+
+# Row handle with the same API as BankSystem (GUI version)
+class AccountView:
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def __eq__(self, other):
+        return (isinstance(other, AccountView)
+                and self._store is other._store and self._row == other._row)
+
+    def __hash__(self):
+        return hash((id(self._store), self._row))
+
+    def __repr__(self):
+        return f"<{type(self).__name__} row={self._row} {self.get_name()!r}>"
+
+    @property
+    def email(self):
+        return self._store.emails[self._row]
+
+    @property
+    def password(self):
+        return self._store.passwords[self._row]
+
+    def authenticate(self, password):
+        return verify_password(password, self._store.passwords[self._row])
+
+    def get_balance(self):
+        return self._store.money.to_major(self._store.balances[self._row])
+
+    def get_balance_minor(self):
+        return self._store.balances[self._row]
+
+    def get_name(self):
+        return self._store.names[self._row]
+
+    # Amounts go through the store's MoneyContext; anything that rounds to
+    # zero minor units is refused, as in BankSystem
+    def deposit(self, amount):
+        return self.deposit_minor(self._store.money.to_minor(amount))
+
+    def withdraw(self, amount):
+        return self.withdraw_minor(self._store.money.to_minor(amount))
+
+    def deposit_minor(self, minor):
+        if minor > 0:
+            self._store.balances[self._row] += minor
+            return True
+        return False
+
+    def withdraw_minor(self, minor):
+        if 0 < minor <= self._store.balances[self._row]:
+            self._store.balances[self._row] -= minor
+            return True
+        return False
+
+    # Same checks as BankSystem.transfer, in minor units
+    def transfer(self, to_account, amount, password):
+        if not self.authenticate(password):
+            return "Authentication failed"
+        minor = self._store.money.to_minor(amount)
+        if minor <= 0:
+            return "Invalid transfer amount"
+        if self.get_balance_minor() < minor or not self.withdraw_minor(minor):
+            return "Insufficient funds"
+        to_account.deposit_minor(minor)
+        return f"Transferred ${amount:.2f} from {self.get_name()} to {to_account.get_name()}"
+
+
+class SavingAccountView(AccountView):
+    __slots__ = ()
+
+    @property
+    def interest_rate(self):
+        return self._store.rates[self._row]
+
+    # Interest is rounded half to even to the minor unit, as in SavingAccount
+    def add_interest(self):
+        money = self._store.money
+        interest = money.apply_rate(self.get_balance_minor(), self.interest_rate)
+        self.deposit_minor(interest)
+        return money.to_major(interest)
+
+    def get_account_type(self):
+        return f"Savings (Rate: {self.interest_rate*100}%)"
+
+
+class CheckingAccountView(AccountView):
+    __slots__ = ()
+
+    @property
+    def transaction_fee(self):
+        return self._store.money.to_major(self._store.fees[self._row])
+
+    # The fee comes on top of every withdrawal and outgoing transfer
+    def withdraw_minor(self, minor):
+        total = minor + self._store.fees[self._row]
+        if minor > 0 and total <= self._store.balances[self._row]:
+            self._store.balances[self._row] -= total
+            return True
+        return False
+
+    def get_account_type(self):
+        return f"Checking (Fee: ${self.transaction_fee})"
+
+
+_VIEW_TYPES = {BASIC: AccountView, SAVINGS: SavingAccountView, CHECKING: CheckingAccountView}
+
+
+# Benchmark: bytes per account, object mode vs. compact mode
+if __name__ == "__main__":
+    import sys
+    import tracemalloc
+    from bank import BankSystem, SavingAccount, CheckingAccount
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    # Build the strings up front so both modes are charged the same for them
+    names = [f"user{i}" for i in range(count)]
+    emails = [f"user{i}@bank.com" for i in range(count)]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        if i % 2:
+            SavingAccount(names[i], 100.5 + i, emails[i], "pw", 0.04)
+        else:
+            CheckingAccount(names[i], 100.5 + i, emails[i], "pw", 5)
+    objects = tracemalloc.get_traced_memory()[0] - before
+    BankSystem.accounts.clear()
+
+    before = tracemalloc.get_traced_memory()[0]
+    store = CompactAccountStore()
+    for i in range(count):
+        if i % 2:
+            store.add_saving(names[i], 100.5 + i, emails[i], "pw", 0.04)
+        else:
+            store.add_checking(names[i], 100.5 + i, emails[i], "pw", 5)
+    compact = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print(f"accounts: {count:,}")
+    print(f"object mode:  {objects / count:8.1f} bytes/account")
+    print(f"compact mode: {compact / count:8.1f} bytes/account")
+    print(f"saving:       {(1 - compact / objects) * 100:8.1f} %")
@@ -0,0 +1,128 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+# Salted scrypt password hashes, stored as "scrypt$n$r$p$salt$hash" (hex)
+PREFIX = "scrypt$"
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+# scrypt releases the GIL, so verification can run next to other work
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def hash_password(password, salt=None, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+    salt = salt or os.urandom(16)
+    digest = hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p, dklen=32)
+    return f"{PREFIX}{n}${r}${p}${salt.hex()}${digest.hex()}"
+
+
+def is_hashed(stored):
+    return isinstance(stored, str) and stored.startswith(PREFIX)
+
+
+# Check a password against a stored hash (plain stored values are compared directly)
+def verify_password(password, stored):
+    if not isinstance(password, str):
+        return False
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode('utf-8'), str(stored).encode('utf-8'))
+    _, n, r, p, salt, digest = stored.split('$')
+    candidate = hashlib.scrypt(password.encode('utf-8'), salt=bytes.fromhex(salt),
+                               n=int(n), r=int(r), p=int(p), dklen=32)
+    return hmac.compare_digest(candidate, bytes.fromhex(digest))
+
+
+def verifier_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix="kdf")
+        return _pool
+
+
+# Verify in the thread pool; returns a concurrent.futures.Future of bool
+def verify_async(password, stored):
+    return verifier_pool().submit(verify_password, password, stored)
+
+
+# Short-lived session tokens: token -> (account, expiry)
+# All tokens share one TTL, so insertion order is expiry order and
+# expired tokens can be dropped from the front in O(1) each
+class SessionCache:
+    def __init__(self, ttl=900, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self.__tokens = {}
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__tokens)
+
+    def issue(self, account):
+        import secrets  # imported on first login, keeps command-line startup short
+        token = secrets.token_urlsafe(32)
+        with self.__lock:
+            self.__purge()
+            self.__tokens[token] = (account, self.clock() + self.ttl)
+        return token
+
+    # The account a live token belongs to, else None
+    def check(self, token):
+        entry = self.__tokens.get(token)
+        if entry is None:
+            return None
+        account, expires = entry
+        if self.clock() >= expires:
+            self.revoke(token)
+            return None
+        return account
+
+    def revoke(self, token):
+        with self.__lock:
+            self.__tokens.pop(token, None)
+
+    def revoke_account(self, account):
+        with self.__lock:
+            for token in [t for t, (acc, _) in self.__tokens.items() if acc is account]:
+                del self.__tokens[token]
+
+    def __purge(self):
+        now = self.clock()
+        tokens = self.__tokens
+        while tokens:
+            token = next(iter(tokens))
+            if tokens[token][1] > now:
+                break
+            del tokens[token]
+
+
+# Benchmark: transfer authorized by password (scrypt) vs. by session token
+if __name__ == "__main__":
+    from bank import BankSystem, SavingAccount
+
+    BankSystem.hash_passwords = True
+    alice = SavingAccount("Alice", 1_000_000, "alice@bank.com", "secret")
+    bob = SavingAccount("Bob", 100, "bob@bank.com", "hunter2")
+    token = alice.login("secret")
+
+    rounds = 50
+    start = time.perf_counter()
+    for _ in range(rounds):
+        assert alice.transfer(bob, 1, "secret").startswith("Transferred")
+    by_password = (time.perf_counter() - start) / rounds
+
+    rounds = 100_000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        alice.transfer(bob, 1, token=token)
+    by_token = (time.perf_counter() - start) / rounds
+
+    print(f"password-authorized transfer: {by_password * 1e6:10.1f} us")
+    print(f"token-authorized transfer:    {by_token * 1e6:10.1f} us")
+    print(f"speedup: {by_password / by_token:,.0f}x")
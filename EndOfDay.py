@@ -0,0 +1,444 @@
+import bisect
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from Aggregates import BankAggregates
+from Money import MoneyContext
+
+# End-of-day batch pipeline: interest, checking fees, aggregate recount and
+# statements, run as stages over chunks of accounts.
+#
+# Every stage works in three steps per chunk:
+#   prepare(bank, accounts, index) -> payload   in this process, plain data
+#   compute(payload) -> result                  pure function, may run in a process pool
+#   apply(bank, accounts, result, key) -> part  in this process, touches the bank
+# Each stage walks the accounts in email order and chunks are applied in
+# order. After each one the journal is flushed and the checkpoint file is
+# rewritten (stage, next chunk, last email done, running totals), so a run
+# that dies part way resumes after the last finished account, even if
+# accounts were created or deleted in between. Interest
+# and fee postings are keyed by run and stage (BankSystem.run_keyed), and a
+# chunk's postings and keys are journaled as one batch: a chunk that was
+# durable but not yet checkpointed when the process died finds its keys
+# again after replay and is not posted twice, and a chunk cut short never
+# reached the journal at all. The idempotency cache must hold at least a
+# chunk's worth of keys, and postings are refused without one.
+
+
+# Add part into total: numbers add, lists add elementwise, dicts recurse
+def merge(total, part):
+    if isinstance(part, dict):
+        total = dict(total or {})
+        for key, value in part.items():
+            total[key] = merge(total.get(key), value)
+        return total
+    if isinstance(part, list):
+        return [a + b for a, b in zip(total, part)] if total else list(part)
+    return (total or 0) + part
+
+
+class Stage:
+    name = "stage"
+
+    def prepare(self, bank, accounts, index):
+        return None
+
+    @staticmethod
+    def compute(payload):
+        return payload
+
+    def apply(self, bank, accounts, result, key):
+        return result
+
+    # Summary once every chunk is done (total is the merged apply() results)
+    def finish(self, bank, total):
+        return total
+
+
+def _post(bank, account, key, fingerprint, post):
+    if bank.idempotency is None:
+        raise ValueError("End of day postings need BankSystem.idempotency to be set")
+    return bank.run_keyed(account.email, key, fingerprint, post)
+
+
+# ---- interest ----
+def compute_interest(payload):
+    minor_unit, rows = payload
+    money = MoneyContext(minor_unit)
+    return [(i, minor, money.apply_rate(minor, rate)) for i, minor, rate in rows]
+
+
+class InterestStage(Stage):
+    name = "interest"
+    compute = staticmethod(compute_interest)
+
+    def prepare(self, bank, accounts, index):
+        return bank.money.minor_unit, [(i, account.get_balance_minor(), account.interest_rate)
+                                       for i, account in enumerate(accounts) if account.kind == "savings"]
+
+    # Same posting as SavingAccount.add_interest
+    def apply(self, bank, accounts, result, key):
+        posted = total = 0
+        for i, minor, interest in result:
+            account = accounts[i]
+
+            def post():
+                with account.guard():
+                    amount = interest
+                    if account.get_balance_minor() != minor:
+                        amount = bank.money.apply_rate(account.get_balance_minor(), account.interest_rate)
+                    if account.deposit_minor(amount):
+                        account.record_activity("interest", amount)
+                        return amount
+                    return 0
+
+            amount = _post(bank, account, key, "interest", post)
+            posted += 1 if amount else 0
+            total += amount
+        return {"accounts": posted, "interest": total}
+
+
+# ---- lazy interest ----
+class AccrualStage(Stage):
+    name = "accrual"
+
+    # Post what each savings account earned since it last changed. Accruing
+    # twice on one day posts nothing the second time, so no keys are needed.
+    def apply(self, bank, accounts, result, key):
+        posted = total = 0
+        for account in accounts:
+            amount = account.accrue()
+            posted += 1 if amount else 0
+            total += amount
+        return {"accounts": posted, "interest": total}
+
+
+# ---- checking fees ----
+def compute_fees(payload):
+    minor_unit, rows = payload
+    money = MoneyContext(minor_unit)
+    return [(i, money.to_minor(fee)) for i, fee in rows]
+
+
+class FeeStage(Stage):
+    name = "fees"
+    compute = staticmethod(compute_fees)
+
+    def prepare(self, bank, accounts, index):
+        return bank.money.minor_unit, [(i, account.transaction_fee)
+                                       for i, account in enumerate(accounts) if account.kind == "checking"]
+
+    # One transaction_fee per checking account; accounts that can't cover it are skipped
+    def apply(self, bank, accounts, result, key):
+        charged = unpaid = total = 0
+        for i, fee in result:
+            account = accounts[i]
+
+            def post():
+                # The base class withdrawal, so the fee is not charged twice
+                if fee > 0 and bank.withdraw_minor(account, fee):
+                    account.record_activity("fees", fee)
+                    return fee
+                return 0
+
+            amount = _post(bank, account, key, "fee", post)
+            if amount:
+                charged += 1
+                total += amount
+            else:
+                unpaid += 1
+        return {"accounts": charged, "fees": total, "unpaid": unpaid}
+
+
+# ---- aggregate recount ----
+def compute_recount(payload):
+    edges, rows = payload
+    fresh = BankAggregates(minor_unit=1, edges=edges)
+    for kind, minor in rows:
+        fresh.add(kind, minor)
+    return {"count": fresh.count, "balance": fresh.balance, "by_type": fresh.by_type,
+            "histogram": fresh.histogram}
+
+
+class RecountStage(Stage):
+    name = "recount"
+    compute = staticmethod(compute_recount)
+
+    def prepare(self, bank, accounts, index):
+        return bank.aggregates.edges, [(account.kind, account.get_posted_balance_minor()) for account in accounts]
+
+    # Correct the running totals and report what had drifted
+    def finish(self, bank, total):
+        fresh = BankAggregates(minor_unit=1, edges=bank.aggregates.edges)
+        if total:
+            fresh.count, fresh.balance = total["count"], total["balance"]
+            fresh.by_type, fresh.histogram = total["by_type"], total["histogram"]
+        drift = bank.aggregates.correct(fresh)
+        return {"accounts": fresh.count, "drift": {field: list(values) for field, values in drift.items()}}
+
+
+# ---- statements ----
+def compute_statements(payload):
+    path, minor_unit, accounts = payload
+    money = MoneyContext(minor_unit)
+    lines = 0
+    temp = path + ".tmp"
+    with open(temp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(("email", "name", "time", "type", "amount", "other"))
+        for email, name, entries in accounts:
+            for when, kind, minor, other in entries:
+                writer.writerow((email, name, time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(when)),
+                                 kind, money.format(minor, grouping=False), other or ""))
+                lines += 1
+    # Rewriting a chunk after a resume just replaces the file
+    os.replace(temp, path)
+    return {"accounts": len(accounts), "lines": lines}
+
+
+class StatementStage(Stage):
+    name = "statements"
+    compute = staticmethod(compute_statements)
+
+    def __init__(self, directory, start, end):
+        self.directory = directory
+        self.start = start
+        self.end = end
+
+    def prepare(self, bank, accounts, index):
+        from History import KIND_NAMES
+        os.makedirs(self.directory, exist_ok=True)
+        rows = []
+        for account in accounts:
+            entries = bank.history.statement(account, self.start, self.end) if bank.history is not None else []
+            if entries:
+                rows.append((account.email, account.get_name(),
+                             [(when, KIND_NAMES[kind], minor, other) for when, kind, minor, other in entries]))
+        return os.path.join(self.directory, f"statements-{index:05d}.csv"), bank.money.minor_unit, rows
+
+
+def day_bounds(day=None):
+    day = day or time.strftime("%Y-%m-%d")
+    start = time.mktime(time.strptime(day, "%Y-%m-%d"))
+    return day, start, start + 86_400
+
+
+# The usual end-of-day stages (lazily accrued interest is posted instead of a day's interest)
+def default_stages(bank, statement_dir, day=None):
+    day, start, end = day_bounds(day)
+    stages = [AccrualStage()] if getattr(bank, "accrual", None) is not None else [InterestStage()]
+    return stages + [FeeStage(), RecountStage(), StatementStage(os.path.join(statement_dir, day), start, end)]
+
+
+class EndOfDay:
+    def __init__(self, bank, stages, checkpoint, run_id=None, chunk_size=10_000, workers=0):
+        self.bank = bank
+        self.stages = list(stages)
+        self.checkpoint = checkpoint
+        self.run_id = run_id or time.strftime("%Y-%m-%d")
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.state = self.__load()
+
+    def __load(self):
+        if os.path.exists(self.checkpoint):
+            with open(self.checkpoint, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("run") == self.run_id and state.get("chunk_size") == self.chunk_size:
+                return state
+        return {"run": self.run_id, "chunk_size": self.chunk_size, "stages": {}}
+
+    def __save(self):
+        temp = self.checkpoint + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.checkpoint)
+
+    @property
+    def done(self):
+        stages = self.state["stages"]
+        return all(stages.get(stage.name, {}).get("done") for stage in self.stages)
+
+    # Run (or resume) every stage; returns {stage name: stage state}
+    def run(self, log=print):
+        pool = None
+        if self.workers:
+            pool = ProcessPoolExecutor(self.workers)
+        try:
+            for stage in self.stages:
+                state = self.state["stages"].setdefault(
+                    stage.name, {"next": 0, "after": None, "chunks": 0, "total": None, "seconds": 0.0, "done": False})
+                if state["done"]:
+                    continue
+                resumed = state["next"]
+                self.__run_stage(stage, state, pool)
+                state["summary"] = stage.finish(self.bank, state["total"])
+                state["done"] = True
+                self.__save()
+                if log is not None:
+                    note = f" (resumed at chunk {resumed})" if resumed else ""
+                    log(f"{stage.name:<11} {state['chunks']:>5} chunks {state['seconds']:8.2f} s  "
+                        f"{state['summary']}{note}")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return self.state["stages"]
+
+    def __run_stage(self, stage, state, pool):
+        accounts = sorted(self.bank.accounts, key=lambda account: account.email)
+        if state.get("after") is not None:
+            accounts = accounts[bisect.bisect_right(accounts, state["after"], key=lambda account: account.email):]
+        size = self.chunk_size
+        first = state["next"]
+        state["chunks"] = first + (len(accounts) + size - 1) // size
+        key = f"eod:{self.run_id}:{stage.name}"
+        ahead = 2 * self.workers if pool is not None else 0
+        pending = deque()
+        for index in range(first, state["chunks"]):
+            started = time.perf_counter()
+            part = accounts[(index - first) * size:(index - first + 1) * size]
+            payload = stage.prepare(self.bank, part, index)
+            result = pool.submit(stage.compute, payload) if pool is not None else stage.compute(payload)
+            state["seconds"] += time.perf_counter() - started
+            pending.append((index, part, result))
+            while len(pending) > ahead:
+                self.__apply(stage, state, key, *pending.popleft())
+        while pending:
+            self.__apply(stage, state, key, *pending.popleft())
+
+    def __apply(self, stage, state, key, index, part, result):
+        started = time.perf_counter()
+        if isinstance(result, Future):
+            result = result.result()
+        # One journal batch per chunk. If apply fails part way, the postings
+        # it made are still journaled, so the journal matches memory and the
+        # keys let the next run skip those accounts.
+        error = None
+        with self.bank.transaction():
+            try:
+                applied = stage.apply(self.bank, part, result, key)
+            except BaseException as e:
+                error = e
+        if error is not None:
+            raise error
+        state["total"] = merge(state["total"], applied)
+        # The checkpoint must never get ahead of the journal
+        if self.bank.journal is not None:
+            self.bank.journal.flush()
+        state["next"] = index + 1
+        state["after"] = part[-1].email
+        self.__save()
+        state["seconds"] += time.perf_counter() - started
+
+
+# Benchmark: kill the process part way (twice), replay the journal, resume,
+# and check nothing was posted twice; then a clean run in one process vs.
+# with a process pool
+if __name__ == "__main__":
+    import argparse
+    import subprocess
+    import sys
+    import tempfile
+    from bank import BankSystem, SavingAccount, CheckingAccount
+    from Journal import Journal, open_journal, replay
+
+    parser = argparse.ArgumentParser(description="End-of-day pipeline demo")
+    parser.add_argument("--accounts", type=int, default=200_000)
+    parser.add_argument("--chunk", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--crash", choices=("mid", "flushed"), help=argparse.SUPPRESS)
+    parser.add_argument("--folder", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    def stages(folder, fees=FeeStage):
+        day, start, end = day_bounds()
+        return [InterestStage(), fees(), RecountStage(), StatementStage(folder, start, end)]
+
+    if args.crash:
+        # Child process: replay, run, and die with os._exit in fees chunk 7,
+        # either half way through it or once it is durable but not checkpointed
+        path = os.path.join(args.folder, "bank.journal")
+        replay(path, BankSystem, SavingAccount, CheckingAccount)
+        seventh = sorted(account.email for account in BankSystem.accounts)[7 * args.chunk]
+        armed = []
+
+        class CrashingJournal(Journal):
+            def flush(self):
+                super().flush()
+                if armed:
+                    os._exit(1)
+
+        class CrashingFees(FeeStage):
+            def apply(self, bank, accounts, result, key):
+                if accounts[0].email == seventh:
+                    if args.crash == "mid":
+                        FeeStage.apply(self, bank, accounts, result[:len(result) // 2], key)
+                        os._exit(1)
+                    armed.append(True)
+                return FeeStage.apply(self, bank, accounts, result, key)
+
+        BankSystem.journal = CrashingJournal(path, wait=False)
+        EndOfDay(BankSystem, stages(args.folder, CrashingFees), os.path.join(args.folder, "eod.json"),
+                 run_id="demo", chunk_size=args.chunk).run()
+        sys.exit(0)
+
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "bank.journal")
+    open_journal(path, BankSystem, SavingAccount, CheckingAccount, wait=False)
+    accounts = []
+    for i in range(args.accounts):
+        if i % 2:
+            accounts.append(SavingAccount(f"user{i}", 1_000 + i % 5_000, f"user{i}@bank.com", "pw", 0.001))
+        else:
+            accounts.append(CheckingAccount(f"user{i}", 50 + i % 500, f"user{i}@bank.com", "pw", 2))
+        accounts[-1].deposit(10)
+    BankSystem.journal.close()
+    money = BankSystem.money
+    expected = {acc.email: acc.get_balance_minor() + (money.apply_rate(acc.get_balance_minor(), acc.interest_rate)
+                                                      if acc.kind == "savings" else -money.to_minor(2))
+                for acc in accounts}
+    print(f"{args.accounts:,} accounts, chunks of {args.chunk:,}")
+
+    for crash, when in (("mid", "half way through fees chunk 7"),
+                        ("flushed", "after fees chunk 7 was journaled, before its checkpoint")):
+        child = subprocess.run([sys.executable, __file__, "--crash", crash, "--folder", folder,
+                                "--accounts", str(args.accounts), "--chunk", str(args.chunk)])
+        assert child.returncode == 1, f"child exited with {child.returncode}"
+        print(f"-- process killed {when}; replaying the journal and resuming --")
+
+    # Start over like a restarted process: everything comes from the journal
+    BankSystem.accounts.clear()
+    BankSystem.number_of_accounts = 0
+    BankSystem.aggregates.reset()
+    BankSystem.history.clear()
+    BankSystem.idempotency.clear()
+    open_journal(path, BankSystem, SavingAccount, CheckingAccount, wait=False)
+    # An account deleted and one created in finished chunks don't move where the resume starts
+    BankSystem.delete_account(BankSystem.find_account_by_email("user0@bank.com"))
+    del expected["user0@bank.com"]
+    CheckingAccount("late", 100, "user00@bank.com", "pw", 2)
+    expected["user00@bank.com"] = money.to_minor(100)
+    EndOfDay(BankSystem, stages(folder), os.path.join(folder, "eod.json"), run_id="demo",
+             chunk_size=args.chunk).run()
+    BankSystem.journal.close()
+    BankSystem.journal = None
+    wrong = [email for email, minor in expected.items()
+             if BankSystem.find_account_by_email(email).get_balance_minor() != minor]
+    assert not wrong, f"{len(wrong)} balances off after resume, e.g. {wrong[:3]}"
+    print("after two crashes + resume every account got its interest or fee exactly once")
+
+    # A second clean run in one process and with the pool (compute only; postings are keyed)
+    for workers in (0, args.workers):
+        BankSystem.idempotency.clear()
+        started = time.perf_counter()
+        label = f"{workers} worker processes" if workers else "in process"
+        print(f"-- {label} --")
+        EndOfDay(BankSystem, stages(folder), os.path.join(folder, f"eod-{workers}.json"), run_id=f"run-{workers}",
+                 chunk_size=args.chunk, workers=workers).run()
+        print(f"total {time.perf_counter() - started:.2f} s")
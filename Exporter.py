@@ -0,0 +1,240 @@
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+from decimal import Decimal
+
+from History import KIND_NAMES
+from Journal import KIND_SAVINGS, KIND_CHECKING
+
+# Streaming exports: account listings, per-account statements and the
+# bank-wide summary, as CSV or JSONL, optionally gzipped.
+#
+# Rows come from generators and are encoded into a small buffer that is
+# written out every chunk_rows rows, so the export runs in constant memory
+# whatever its size. "-" writes to stdout, so exports can be piped:
+#
+#   python Exporter.py accounts --journal bank.journal -o - | grep checking
+#   python Exporter.py summary --snapshot bank.snapshot --journal bank.journal -o summary.jsonl
+#   python Exporter.py accounts --db bank.db -o accounts.csv.gz
+#   python Exporter.py statement --journal bank.journal --email ada@example.com --start 2026-10-01
+#
+# Statements come from BankSystem.history, which loading rebuilds: journal
+# replay restores the entries, and a snapshot (its .history file) or the
+# database brings in an account's older entries when it is looked up.
+# The account listing reads rows that were never looked up straight from
+# the snapshot or database, without building account objects for them.
+
+ACCOUNT_FIELDS = ("type", "name", "email", "balance", "interest_rate", "transaction_fee")
+STATEMENT_FIELDS = ("time", "type", "amount", "other")
+SUMMARY_FIELDS = ("section", "key", "count", "amount")
+
+
+# ---- row generators ----
+def account_rows(bank):
+    money = bank.money
+    kinds = {KIND_SAVINGS: "savings", KIND_CHECKING: "checking"}
+    for account in bank.accounts.records():
+        if isinstance(account, tuple):
+            # A stored row: (kind, name, balance, email, password, extra, accrual state)
+            kind, name, minor, email, _, extra, accrued = account[:7]
+            # Shown with the interest earned since it was posted, like a loaded account
+            if kind == KIND_SAVINGS and accrued is not None and getattr(bank, "accrual", None) is not None:
+                minor += bank.accrual.pending(minor, Decimal(accrued[1]), extra, accrued[0])
+            yield {
+                "type": kinds.get(kind, bank.kind),
+                "name": name,
+                "email": email,
+                "balance": money.format(minor, grouping=False),
+                "interest_rate": extra if kind == KIND_SAVINGS else "",
+                "transaction_fee": extra if kind == KIND_CHECKING else "",
+            }
+            continue
+        yield {
+            "type": account.kind,
+            "name": account.get_name(),
+            "email": account.email,
+            "balance": money.format(account.get_balance_minor(), grouping=False),
+            "interest_rate": getattr(account, "interest_rate", ""),
+            "transaction_fee": getattr(account, "transaction_fee", ""),
+        }
+
+
+def statement_rows(bank, account, start=0.0, end=float("inf")):
+    money = bank.money
+    for when, kind, minor, other in bank.history.statement(account, start, end):
+        yield {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(when)),
+            "type": KIND_NAMES[kind],
+            "amount": money.format(minor, grouping=False),
+            "other": other or "",
+        }
+
+
+def summary_rows(bank):
+    totals = bank.aggregates
+    money = bank.money
+    yield {"section": "total", "key": "all", "count": totals.count,
+           "amount": money.format(totals.total_balance(), grouping=False)}
+    for kind in sorted(totals.by_type):
+        yield {"section": "type", "key": kind, "count": totals.type_count(kind),
+               "amount": money.format(totals.type_balance(kind), grouping=False)}
+    for label, count in totals.buckets():
+        yield {"section": "balance_bucket", "key": label, "count": count, "amount": ""}
+    for flow, amount in totals.flows.items():
+        yield {"section": "flow", "key": flow, "count": totals.flow_counts[flow],
+               "amount": money.format(amount, grouping=False)}
+
+
+# ---- writers ----
+def open_output(path):
+    if path in (None, "-"):
+        return open(sys.stdout.fileno(), "wb", closefd=False)
+    if path.endswith(".gz"):
+        # Level 6 is the usual size/speed trade-off
+        return gzip.open(path, "wb", compresslevel=6)
+    return open(path, "wb")
+
+
+def format_of(path, fmt=None):
+    if fmt:
+        return fmt
+    name = (path or "")[:-3] if (path or "").endswith(".gz") else (path or "")
+    return "jsonl" if name.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+# Encode rows into text chunks of chunk_rows rows each
+def encode(rows, fields, fmt, chunk_rows=10_000):
+    buffer = io.StringIO()
+    if fmt == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore", lineterminator="\n")
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+        def write(row):
+            buffer.write(dumps(row))
+            buffer.write("\n")
+    pending = 0
+    for row in rows:
+        write(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+# Stream rows to path (or stdout); returns (rows written, bytes before compression)
+def export(rows, fields, path=None, fmt=None, chunk_rows=10_000):
+    fmt = format_of(path, fmt)
+    counted = _Counter(rows)
+    written = 0
+    with open_output(path) as out:
+        for chunk in encode(counted, fields, fmt, chunk_rows):
+            data = chunk.encode("utf-8")
+            out.write(data)
+            written += len(data)
+    return counted.count, written
+
+
+class _Counter:
+    def __init__(self, rows):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+
+def export_accounts(bank, path=None, fmt=None, **options):
+    return export(account_rows(bank), ACCOUNT_FIELDS, path, fmt, **options)
+
+
+def export_statement(bank, account, path=None, fmt=None, start=0.0, end=float("inf"), **options):
+    return export(statement_rows(bank, account, start, end), STATEMENT_FIELDS, path, fmt, **options)
+
+
+def export_summary(bank, path=None, fmt=None, **options):
+    return export(summary_rows(bank), SUMMARY_FIELDS, path, fmt, **options)
+
+
+def _parse_time(text):
+    if text is None:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return time.mktime(time.strptime(text, "%Y-%m-%d"))
+
+
+# Headless command: load the bank from snapshot/journal and export
+def main(argv=None):
+    import argparse
+    import os
+    from bank import BankSystem, SavingAccount, CheckingAccount
+
+    parser = argparse.ArgumentParser(description="Export bank reports without the GUI")
+    parser.add_argument("report", choices=("accounts", "statement", "summary"))
+    parser.add_argument("-o", "--output", default="-", help="file (.csv, .jsonl, optionally .gz) or - for stdout")
+    parser.add_argument("--format", choices=("csv", "jsonl"))
+    parser.add_argument("--snapshot", help="snapshot file to start from")
+    parser.add_argument("--journal", help="journal file to replay")
+    parser.add_argument("--db", help="SQLite database to read from")
+    parser.add_argument("--email", help="account for the statement")
+    parser.add_argument("--start", help="statement start (YYYY-MM-DD or epoch seconds)")
+    parser.add_argument("--end", help="statement end, exclusive")
+    parser.add_argument("--chunk-rows", type=int, default=10_000)
+    parser.add_argument("--demo", type=int, metavar="N", help="export N generated accounts instead of loading")
+    args = parser.parse_args(argv)
+
+    if args.demo:
+        for i in range(args.demo):
+            if i % 2:
+                SavingAccount(f"user{i}", 100 + i % 1000, f"user{i}@bank.com", "pw", 0.03)
+            else:
+                CheckingAccount(f"user{i}", 100 + i % 1000, f"user{i}@bank.com", "pw", 1)
+    elif args.db:
+        from SqliteStore import open_sqlite
+        open_sqlite(args.db, BankSystem, SavingAccount, CheckingAccount)
+    elif args.snapshot:
+        from Snapshot import load_snapshot
+        from Journal import replay
+        offset = 0
+        if os.path.exists(args.snapshot):
+            offset = load_snapshot(args.snapshot, BankSystem, SavingAccount, CheckingAccount).journal_offset
+        if args.journal:
+            replay(args.journal, BankSystem, SavingAccount, CheckingAccount, start=offset)
+    elif args.journal:
+        from Journal import replay
+        replay(args.journal, BankSystem, SavingAccount, CheckingAccount)
+
+    started = time.perf_counter()
+    options = {"chunk_rows": args.chunk_rows}
+    if args.report == "accounts":
+        rows, size = export_accounts(BankSystem, args.output, args.format, **options)
+    elif args.report == "summary":
+        rows, size = export_summary(BankSystem, args.output, args.format, **options)
+    else:
+        account = BankSystem.find_account_by_email(args.email or "")
+        if account is None:
+            parser.error("--email must name an existing account")
+        rows, size = export_statement(BankSystem, account, args.output, args.format,
+                                      _parse_time(args.start) or 0.0,
+                                      _parse_time(args.end) or float("inf"), **options)
+    elapsed = time.perf_counter() - started
+    print(f"exported {rows:,} rows, {size / 1e6:.1f} MB in {elapsed:.2f} s "
+          f"({rows / elapsed if elapsed else 0:,.0f} rows/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+# Per-account transaction history.
+#
+# Each account gets three parallel append-only arrays: timestamp (float
+# seconds), type code and signed amount in minor units. Entries are
+# appended in time order, so statements for a date range and the last N
+# entries are found with bisect instead of a scan. Transfer legs also keep
+# the other account in a small side table.
+#
+# Entries are also handed to the storage hook (BankSystem.journal, see
+# log_history), so a process that loads the bank has the history too:
+# journal replay appends them again with restore(), and a snapshot or the
+# SQLite store attaches a loader that brings an account's older entries in
+# the first time that account's history is touched.
+
+DEPOSIT = 1
+WITHDRAWAL = 2
+FEE = 3
+INTEREST = 4
+TRANSFER_IN = 5
+TRANSFER_OUT = 6
+
+KIND_NAMES = {
+    DEPOSIT: "deposit",
+    WITHDRAWAL: "withdrawal",
+    FEE: "fee",
+    INTEREST: "interest",
+    TRANSFER_IN: "transfer in",
+    TRANSFER_OUT: "transfer out",
+}
+
+# Flow names used by BankSystem (see Aggregates.FLOWS) -> (type, sign)
+FLOW_KINDS = {
+    "deposits": (DEPOSIT, 1),
+    "withdrawals": (WITHDRAWAL, -1),
+    "fees": (FEE, -1),
+    "interest": (INTEREST, 1),
+}
+
+
+class AccountHistory:
+    __slots__ = ('times', 'kinds', 'amounts', 'others')
+
+    def __init__(self):
+        self.times = array('d')
+        self.kinds = array('B')
+        self.amounts = array('q')
+        self.others = {}        # entry index -> email of the other transfer leg
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, when, kind, minor, other=None):
+        # Keep timestamps sorted even if the clock steps back
+        if self.times and when < self.times[-1]:
+            when = self.times[-1]
+        if other is not None:
+            self.others[len(self.times)] = other
+        self.times.append(when)
+        self.kinds.append(kind)
+        self.amounts.append(minor)
+
+    # (timestamp, type, signed minor amount, other email or None)
+    def entry(self, index):
+        return self.times[index], self.kinds[index], self.amounts[index], self.others.get(index)
+
+    # Entries with start <= timestamp < end
+    def between(self, start, end):
+        first = bisect_left(self.times, start)
+        last = bisect_left(self.times, end, first)
+        return [self.entry(i) for i in range(first, last)]
+
+    # Newest first
+    def last(self, count):
+        size = len(self.times)
+        return [self.entry(i) for i in range(size - 1, max(size - count, 0) - 1, -1)]
+
+
+class TransactionHistory:
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.__accounts = {}    # account -> AccountHistory
+        self.__lock = threading.RLock()
+        self.__load = None      # email -> AccountHistory or None, for accounts not touched yet
+
+    def __len__(self):
+        return sum(len(history) for history in list(self.__accounts.values()))
+
+    def of(self, account):
+        history = self.__accounts.get(account)
+        if history is None and self.__load is not None:
+            with self.__lock:
+                history = self.__history(account)
+        return AccountHistory() if history is None else history
+
+    # Called with the lock held
+    def __history(self, account):
+        history = self.__accounts.get(account)
+        if history is None:
+            if self.__load is not None:
+                history = self.__load(account.email)
+            if history is None:
+                history = AccountHistory()
+            self.__accounts[account] = history
+        return history
+
+    # One money movement as reported by BankSystem.record_activity.
+    # log(email, timestamp, type, signed amount, other email) is called for
+    # each entry under the same lock, so frozen() sees both or neither.
+    def record(self, account, flow, minor, other=None, log=None):
+        now = self.clock()
+        with self.__lock:
+            if flow == "transfers":
+                self.__history(account).append(now, TRANSFER_OUT, -minor, other.email)
+                self.__history(other).append(now, TRANSFER_IN, minor, account.email)
+                if log is not None:
+                    log(account.email, now, TRANSFER_OUT, -minor, other.email)
+                    log(other.email, now, TRANSFER_IN, minor, account.email)
+            else:
+                kind, sign = FLOW_KINDS[flow]
+                self.__history(account).append(now, kind, sign * minor)
+                if log is not None:
+                    log(account.email, now, kind, sign * minor)
+
+    # An entry read back from storage (journal replay)
+    def restore(self, account, when, kind, minor, other=None):
+        with self.__lock:
+            self.__history(account).append(when, kind, minor, other)
+
+    # Hold to stop new entries while the history is saved with a journal offset
+    def frozen(self):
+        return self.__lock
+
+    # Where older entries of accounts not touched yet come from (a snapshot or database)
+    def attach(self, load):
+        with self.__lock:
+            self.__load = load
+
+    def forget(self, account):
+        with self.__lock:
+            self.__accounts.pop(account, None)
+
+    def clear(self):
+        with self.__lock:
+            self.__accounts.clear()
+            self.__load = None
+
+    # ---- queries ----
+    def statement(self, account, start, end):
+        return self.of(account).between(start, end)
+
+    def recent(self, account, count=10):
+        return self.of(account).last(count)
+
+
+# Histories as JSON lines (email, times, types, amounts, other legs), written
+# to a temporary file and moved into place; read back as {email: AccountHistory}
+def write_histories(path, histories):
+    import json
+    import os
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        for email, history in histories:
+            if len(history):
+                f.write(json.dumps([email, history.times.tolist(), history.kinds.tolist(),
+                                    history.amounts.tolist(), sorted(history.others.items())]) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+def read_histories(path):
+    import json
+    import os
+    histories = {}
+    if not os.path.exists(path):
+        return histories
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            email, times, kinds, amounts, others = json.loads(line)
+            history = histories[email] = AccountHistory()
+            history.times.extend(times)
+            history.kinds.extend(kinds)
+            history.amounts.extend(amounts)
+            history.others = dict(others)
+    return histories
+
+
+# Human-readable line for an entry, amounts through a MoneyContext
+def describe(entry, money):
+    when, kind, minor, other = entry
+    stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(when))
+    text = KIND_NAMES[kind]
+    if other is not None:
+        text += f" {'to' if kind == TRANSFER_OUT else 'from'} {other}"
+    sign = "-" if minor < 0 else "+"
+    return f"{stamp}  {text:<34} {sign}${money.format(abs(minor))}"
+
+
+# Benchmark: statement query by bisect vs. a linear scan
+if __name__ == "__main__":
+    import random
+    from bank import BankSystem, SavingAccount, CheckingAccount
+
+    fake_now = [1_700_000_000.0]
+    BankSystem.history = TransactionHistory(clock=lambda: fake_now[0])
+    alice = CheckingAccount("Alice", 10_000_000, "alice@bank.com", "pw", 1)
+    bob = SavingAccount("Bob", 1_000_000, "bob@bank.com", "pw", 0.000001)
+    rng = random.Random(5)
+    entries = 1_000_000
+    while len(BankSystem.history.of(alice)) < entries:
+        fake_now[0] += rng.uniform(1, 120)
+        choice = rng.randrange(4)
+        if choice == 0:
+            alice.deposit(rng.randrange(1, 500))
+        elif choice == 1:
+            alice.withdraw(rng.randrange(1, 50))
+        elif choice == 2:
+            alice.transfer(bob, 3, "pw")
+        else:
+            bob.add_interest()
+    history = BankSystem.history.of(alice)
+    print(f"{len(history):,} entries for alice, {len(BankSystem.history):,} total")
+    print(f"memory per entry: {(history.times.itemsize + history.kinds.itemsize + history.amounts.itemsize)} bytes"
+          f" + transfer side table")
+
+    day = 86_400
+    starts = [rng.uniform(history.times[0], history.times[-1] - day) for _ in range(20)]
+
+    started = time.perf_counter()
+    for start in starts:
+        by_bisect = history.between(start, start + day)
+    bisected = (time.perf_counter() - started) / len(starts)
+
+    started = time.perf_counter()
+    for start in starts:
+        by_scan = [history.entry(i) for i, t in enumerate(history.times) if start <= t < start + day]
+    scanned = (time.perf_counter() - started) / len(starts)
+    assert by_scan == by_bisect
+
+    print(f"one-day statement: bisect {bisected * 1e6:,.0f} us, scan {scanned * 1e6:,.0f} us")
+    started = time.perf_counter()
+    recent = BankSystem.history.recent(alice, 10)
+    print(f"last 10: {(time.perf_counter() - started) * 1e6:.1f} us")
+    for entry in recent[:5]:
+        print("  " + describe(entry, BankSystem.money))
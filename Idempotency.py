@@ -0,0 +1,213 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Idempotency keys for balance-changing requests.
+#
+# A client that retries a deposit, withdrawal or transfer (after a timeout,
+# say) sends the same key again; the cache hands back the outcome of the
+# first attempt instead of moving the money twice. Keys are scoped by the
+# account they were used on, and each entry remembers a fingerprint of the
+# request so a key reused for a different request is refused.
+#
+# The cache holds at most `capacity` entries: least recently used entries
+# are dropped first and every entry expires `ttl` seconds after it was
+# stored. With a path, entries are also appended to a file and read back on
+# start, so retries keep working across restarts; the file is rewritten
+# with only the live entries whenever it grows past twice the capacity.
+#
+# A bank with a journal or database doesn't need the file: BankSystem
+# records each key in the same batch as the money movement it guards (see
+# BankSystem.run_keyed), and replay, snapshots and the SQLite store put the
+# entries back with restore(). If that batch fails the key is forgotten
+# along with the money movement, so a retry runs it again. Keys written to a file of their own can get
+# ahead of a journal that hasn't reached the disk yet.
+
+
+class IdempotencyCache:
+    def __init__(self, capacity=100_000, ttl=24 * 3600, path=None, clock=time.time):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.clock = clock
+        self.path = path
+        self.hits = 0
+        self.__entries = OrderedDict()   # (scope, key) -> (fingerprint, result, expires)
+        self.__lock = threading.Lock()
+        self.__file = None
+        self.__lines = 0
+        if path is not None:
+            self.__load()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    # The stored outcome for this key, else None (refuses reuse for another request)
+    def lookup(self, scope, key, fingerprint):
+        with self.__lock:
+            entry = self.__entries.get((scope, key))
+            if entry is None:
+                return None
+            if entry[2] <= self.clock():
+                del self.__entries[(scope, key)]
+                return None
+            if entry[0] != fingerprint:
+                raise ValueError("Idempotency key was already used for a different request")
+            self.__entries.move_to_end((scope, key))
+            self.hits += 1
+            return entry
+
+    # Returns when the entry expires
+    def store(self, scope, key, fingerprint, result):
+        expires = self.clock() + self.ttl
+        with self.__lock:
+            self.__put(scope, key, fingerprint, result, expires)
+            if self.__file is not None:
+                import json
+                self.__file.write(json.dumps([scope, key, fingerprint, result, expires]) + "\n")
+                self.__file.flush()
+                self.__lines += 1
+                if self.__lines > 2 * self.capacity:
+                    self.__compact()
+        return expires
+
+    # Put back an entry recorded elsewhere (journal, snapshot, database); not written to the file
+    def restore(self, scope, key, fingerprint, result, expires):
+        if expires <= self.clock():
+            return
+        with self.__lock:
+            self.__put(scope, key, fingerprint, result, expires)
+
+    # Live entries as (scope, key, fingerprint, result, expires), least recently used first
+    def entries(self):
+        now = self.clock()
+        with self.__lock:
+            return [(scope, key, *entry) for (scope, key), entry in self.__entries.items() if entry[2] > now]
+
+    # Drop an entry whose operation was rolled back (its batch never reached the journal)
+    def forget(self, scope, key):
+        with self.__lock:
+            if self.__entries.pop((scope, key), None) is not None and self.__file is not None:
+                self.__compact()
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            if self.__file is not None:
+                self.__compact()
+
+    def close(self):
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+    def __put(self, scope, key, fingerprint, result, expires):
+        entries = self.__entries
+        entries[(scope, key)] = (fingerprint, result, expires)
+        entries.move_to_end((scope, key))
+        # Expired entries at the old end go first, then whatever is over capacity
+        now = self.clock()
+        while entries:
+            oldest = next(iter(entries))
+            if entries[oldest][2] > now and len(entries) <= self.capacity:
+                break
+            del entries[oldest]
+
+    # ---- persistence ----
+    def __load(self):
+        for scope, key, fingerprint, result, expires in read_entries(self.path):
+            self.__put(scope, key, fingerprint, result, expires)
+        self.__compact()
+
+    # Rewrite the file with the live entries only (least recently used first)
+    def __compact(self):
+        if self.__file is not None:
+            self.__file.close()
+        write_entries(self.path, ((scope, key, *entry) for (scope, key), entry in self.__entries.items()))
+        self.__file = open(self.path, "a", encoding="utf-8")
+        self.__lines = len(self.__entries)
+
+
+# Entries as JSON lines, written to a temporary file and moved into place.
+# json is only imported when something is persisted.
+def write_entries(path, entries):
+    import json
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(list(entry)) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+def read_entries(path):
+    import json
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                scope, key, fingerprint, result, expires = json.loads(line)
+            except ValueError:
+                continue    # torn last line after a crash
+            yield scope, key, fingerprint, result, expires
+
+
+# Benchmark: duplicate cost, memory under a sustained stream of new keys, restart
+if __name__ == "__main__":
+    import tempfile
+    import tracemalloc
+    from bank import BankSystem, SavingAccount
+
+    BankSystem.idempotency = IdempotencyCache(capacity=50_000)
+    alice = SavingAccount("Alice", 1_000_000, "alice@bank.com", "pw")
+    bob = SavingAccount("Bob", 100, "bob@bank.com", "pw")
+
+    rounds = 200_000
+    start = time.perf_counter()
+    for i in range(rounds):
+        alice.deposit(1)
+    plain = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    for i in range(rounds):
+        alice.deposit(1, key=f"k{i}")
+    first = (time.perf_counter() - start) / rounds
+
+    balance = alice.get_balance_minor()
+    start = time.perf_counter()
+    for i in range(rounds - 10_000, rounds):
+        alice.deposit(1, key=f"k{i}")
+    duplicate = (time.perf_counter() - start) / 10_000
+    assert alice.get_balance_minor() == balance, "a duplicate moved money"
+
+    result = alice.transfer(bob, 5, "pw", key="t1")
+    assert alice.transfer(bob, 5, "pw", key="t1") == result and bob.get_balance() == 105
+
+    print(f"deposit without key:   {plain * 1e9:7.0f} ns")
+    print(f"deposit with new key:  {first * 1e9:7.0f} ns")
+    print(f"duplicate deposit:     {duplicate * 1e9:7.0f} ns (balance untouched)")
+
+    # Sustained stream of fresh keys: memory levels off at capacity
+    cache = IdempotencyCache(capacity=50_000)
+    tracemalloc.start()
+    for step in range(1, 5):
+        for i in range(step * 100_000, (step + 1) * 100_000):
+            cache.store("alice@bank.com", f"req-{i}", "deposit:100", True)
+        print(f"after {step * 100_000:>7,} keys: {len(cache):,} entries, "
+              f"{tracemalloc.get_traced_memory()[0] / 1e6:.1f} MB")
+    tracemalloc.stop()
+
+    # Restart: a persisted cache still recognises the retry
+    path = os.path.join(tempfile.mkdtemp(), "idempotency.jsonl")
+    BankSystem.idempotency = IdempotencyCache(path=path)
+    alice.withdraw(7, key="w1")
+    BankSystem.idempotency.close()
+    balance = alice.get_balance_minor()
+    start = time.perf_counter()
+    BankSystem.idempotency = IdempotencyCache(path=path)
+    reload = time.perf_counter() - start
+    assert alice.withdraw(7, key="w1") and alice.get_balance_minor() == balance
+    print(f"restart: reloaded {len(BankSystem.idempotency)} key(s) in {reload * 1e3:.2f} ms, retry not applied")
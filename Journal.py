@@ -0,0 +1,416 @@
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from decimal import Decimal
+
+# Record types
+OP_CREATE = 1
+OP_DEPOSIT = 2
+OP_WITHDRAW = 3
+OP_EMAIL = 4
+OP_DELETE = 5
+OP_BATCH = 6    # several records that must be replayed together (e.g. a transfer)
+OP_KEY = 7      # an idempotency key and its outcome, batched with the request it guards
+OP_ACCRUE = 8   # a savings account's accrual state (see Accrual.py)
+OP_HISTORY = 9  # a history entry (see History.py); replay doesn't move money for it
+
+# Account kinds in OP_CREATE records
+KIND_BASIC = 0
+KIND_SAVINGS = 1
+KIND_CHECKING = 2
+
+# Frame: payload length, crc32 of op + payload, op
+HEADER = struct.Struct('<IIB')
+AMOUNT = struct.Struct('<q')          # minor units (cents)
+CREATE = struct.Struct('<Bqd')        # kind, opening balance in minor units, rate or fee
+STRLEN = struct.Struct('<H')
+EXPIRES = struct.Struct('<d')         # idempotency key expiry, epoch seconds
+ACCRUED = struct.Struct('<q')         # day accrued to, followed by the carried fraction as text
+ENTRY = struct.Struct('<dBq')         # history entry: timestamp, type, signed amount in minor units
+
+
+def _pack_str(text):
+    data = text.encode('utf-8')
+    return STRLEN.pack(len(data)) + data
+
+
+def _unpack_str(buf, pos):
+    (size,) = STRLEN.unpack_from(buf, pos)
+    pos += STRLEN.size
+    return bytes(buf[pos:pos + size]).decode('utf-8'), pos + size
+
+
+def _pack_accrued(account):
+    return ACCRUED.pack(account.accrued_day) + _pack_str(str(account.accrued_fraction))
+
+
+def _unpack_accrued(buf, pos, account):
+    (account.accrued_day,) = ACCRUED.unpack_from(buf, pos)
+    fraction, pos = _unpack_str(buf, pos + ACCRUED.size)
+    account.accrued_fraction = Decimal(fraction)
+    return pos
+
+
+def _frame(op, payload):
+    crc = zlib.crc32(payload, zlib.crc32(bytes((op,))))
+    return HEADER.pack(len(payload), crc, op) + payload
+
+
+# Append-only write-ahead journal of balance-changing operations
+# group_commit=False: every record is written and fsynced on its own
+# group_commit=True:  a writer thread fsyncs records in batches, at most
+#                     max_batch records or max_delay seconds per batch
+# wait=True (the default) makes each operation block until its batch is
+# durable, so nothing is acknowledged that a crash could lose; records from
+# other threads that arrive during an fsync go out together in the next one.
+# wait=False acknowledges from the buffer: callers must flush() before
+# they report an operation as done.
+# If the writer thread fails, the error is raised to every waiter and to
+# every later operation.
+class Journal:
+    def __init__(self, path, group_commit=True, max_batch=512, max_delay=0.005, wait=True):
+        self.path = path
+        self.group_commit = group_commit
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.wait = wait
+        self.fsyncs = 0
+        self.__file = open(path, 'ab')
+        self.__cond = threading.Condition()
+        self.__pending = bytearray()
+        self.__pending_count = 0
+        self.__pending_since = 0.0
+        self.__appended = 0      # sequence number of the last appended record
+        self.__durable = 0       # sequence number of the last fsynced record
+        self.__flush_now = False
+        self.__closed = False
+        self.__error = None
+        self.__local = threading.local()
+        self.__writer = None
+        if group_commit:
+            self.__writer = threading.Thread(target=self.__run_writer, name="journal-writer", daemon=True)
+            self.__writer.start()
+
+    # ---- record builders ----
+    def log_create(self, account):
+        if hasattr(account, 'interest_rate'):
+            kind, extra = KIND_SAVINGS, account.interest_rate
+        elif hasattr(account, 'transaction_fee'):
+            kind, extra = KIND_CHECKING, account.transaction_fee
+        else:
+            kind, extra = KIND_BASIC, 0.0
+        payload = (CREATE.pack(kind, account.get_posted_balance_minor(), extra) + _pack_str(account.get_name())
+                   + _pack_str(account.email) + _pack_str(account.password))
+        # Savings accounts created with accrual on also carry the day they start from
+        if getattr(account, 'accrued_day', None) is not None:
+            payload += _pack_accrued(account)
+        self.__append(_frame(OP_CREATE, payload))
+
+    def log_deposit(self, email, minor):
+        self.__append(_frame(OP_DEPOSIT, _pack_str(email) + AMOUNT.pack(minor)))
+
+    def log_withdraw(self, email, minor):
+        self.__append(_frame(OP_WITHDRAW, _pack_str(email) + AMOUNT.pack(minor)))
+
+    def log_email(self, old_email, new_email):
+        self.__append(_frame(OP_EMAIL, _pack_str(old_email) + _pack_str(new_email)))
+
+    def log_delete(self, email):
+        self.__append(_frame(OP_DELETE, _pack_str(email)))
+
+    def log_accrue(self, account):
+        self.__append(_frame(OP_ACCRUE, _pack_str(account.email) + _pack_accrued(account)))
+
+    # History rides along with the money records: it doesn't wait for the disk itself
+    def log_history(self, email, when, kind, minor, other=None):
+        payload = _pack_str(email) + ENTRY.pack(when, kind, minor) + _pack_str(other or "")
+        self.__append(_frame(OP_HISTORY, payload), wait=False)
+
+    # json is only imported once a keyed request comes in
+    def log_key(self, scope, key, fingerprint, result, expires):
+        import json
+        payload = (_pack_str(scope) + _pack_str(key) + _pack_str(fingerprint)
+                   + _pack_str(json.dumps(result)) + EXPIRES.pack(expires))
+        self.__append(_frame(OP_KEY, payload))
+
+    # Records logged inside this block are written as one atomic batch record
+    @contextmanager
+    def transaction(self):
+        stack = self.__local.__dict__.setdefault('stack', [])
+        stack.append(bytearray())
+        try:
+            yield self
+        except BaseException:
+            stack.pop()
+            raise
+        records = stack.pop()
+        if records:
+            self.__append(_frame(OP_BATCH, bytes(records)))
+
+    # ---- writing ----
+    def __append(self, frame, wait=True):
+        stack = getattr(self.__local, 'stack', None)
+        if stack:
+            stack[-1] += frame
+            return
+        with self.__cond:
+            if self.__error is not None:
+                raise self.__error
+            if self.__closed:
+                raise ValueError("Journal is closed")
+            if not self.group_commit:
+                self.__file.write(frame)
+                if not wait:
+                    return      # written with the next record's fsync
+                self.__sync()
+                self.__appended += 1
+                self.__durable = self.__appended
+                return
+            if not self.__pending:
+                self.__pending_since = time.monotonic()
+                self.__cond.notify_all()
+            self.__pending += frame
+            self.__pending_count += 1
+            self.__appended += 1
+            seq = self.__appended
+            if self.wait and wait:
+                # Someone is waiting, so don't hold the batch for max_delay
+                self.__flush_now = True
+                self.__cond.notify_all()
+                self.__wait_for(seq)
+            elif self.__pending_count >= self.max_batch:
+                self.__cond.notify_all()
+
+    # Called with the condition held
+    def __wait_for(self, seq):
+        while self.__durable < seq:
+            if self.__error is not None:
+                raise self.__error
+            self.__cond.wait()
+
+    def __sync(self):
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+        self.fsyncs += 1
+
+    def __run_writer(self):
+        with self.__cond:
+            while True:
+                if not self.__pending:
+                    if self.__closed:
+                        return
+                    self.__cond.wait()
+                    continue
+                deadline = self.__pending_since + self.max_delay
+                while (self.__pending_count < self.max_batch and not self.__flush_now
+                       and not self.__closed):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.__cond.wait(remaining)
+                data = self.__pending
+                seq = self.__appended
+                self.__pending = bytearray()
+                self.__pending_count = 0
+                self.__flush_now = False
+                # Write outside the lock so new records can queue up meanwhile
+                self.__cond.release()
+                try:
+                    self.__file.write(data)
+                    self.__sync()
+                except Exception as e:
+                    self.__cond.acquire()
+                    self.__error = e
+                    self.__cond.notify_all()
+                    return
+                self.__cond.acquire()
+                self.__durable = seq
+                self.__cond.notify_all()
+
+    # Block until every record appended so far is on disk
+    def flush(self):
+        with self.__cond:
+            self.__flush_now = True
+            self.__cond.notify_all()
+            self.__wait_for(self.__appended)
+
+    def close(self):
+        if self.__closed:
+            return
+        try:
+            self.flush()
+        finally:
+            with self.__cond:
+                self.__closed = True
+                self.__cond.notify_all()
+            if self.__writer is not None:
+                self.__writer.join()
+            self.__file.close()
+
+
+# ---- replay ----
+def read_records(path, start=0):
+    """Yield (op, payload, end offset) per intact record; stops at a torn tail"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read()
+    pos = 0
+    while pos + HEADER.size <= len(data):
+        size, crc, op = HEADER.unpack_from(data, pos)
+        end = pos + HEADER.size + size
+        if end > len(data):
+            break
+        payload = data[pos + HEADER.size:end]
+        if zlib.crc32(payload, zlib.crc32(bytes((op,)))) != crc:
+            break
+        pos = end
+        yield op, payload, start + pos
+
+
+def _split_batch(payload):
+    pos = 0
+    while pos < len(payload):
+        size, _, op = HEADER.unpack_from(payload, pos)
+        start = pos + HEADER.size
+        pos = start + size
+        yield op, payload[start:pos]
+
+
+def _account(base, email):
+    account = base.find_account_by_email(email)
+    if account is None:
+        raise ValueError(f"Journal refers to an unknown account: {email}")
+    return account
+
+
+def _apply(op, payload, base, saving, checking):
+    if op == OP_BATCH:
+        for inner_op, inner_payload in _split_batch(payload):
+            _apply(inner_op, inner_payload, base, saving, checking)
+    elif op == OP_DEPOSIT or op == OP_WITHDRAW:
+        email, pos = _unpack_str(payload, 0)
+        (minor,) = AMOUNT.unpack_from(payload, pos)
+        account = _account(base, email)
+        # Call the base methods directly: fees are already part of the amount.
+        # A movement that no longer fits means the journal and the starting
+        # state (snapshot, earlier records) have diverged.
+        applied = (base.deposit_minor if op == OP_DEPOSIT else base.withdraw_minor)(account, minor)
+        if not applied:
+            raise ValueError(f"Journal record can't be applied to {email}: "
+                             f"{'deposit' if op == OP_DEPOSIT else 'withdrawal'} of {minor}")
+    elif op == OP_CREATE:
+        kind, minor, extra = CREATE.unpack_from(payload, 0)
+        balance = base.money.to_major(minor)
+        name, pos = _unpack_str(payload, CREATE.size)
+        email, pos = _unpack_str(payload, pos)
+        password, pos = _unpack_str(payload, pos)
+        if kind == KIND_SAVINGS:
+            account = saving(name, balance, email, password, extra)
+            if pos < len(payload):
+                _unpack_accrued(payload, pos, account)
+            else:
+                account.accrued_day = None  # created before accrual was on, like the original
+        elif kind == KIND_CHECKING:
+            checking(name, balance, email, password, extra)
+        else:
+            base(name, balance, email, password)
+    elif op == OP_EMAIL:
+        old_email, pos = _unpack_str(payload, 0)
+        new_email, pos = _unpack_str(payload, pos)
+        _account(base, old_email).email = new_email
+    elif op == OP_DELETE:
+        email, _ = _unpack_str(payload, 0)
+        base.delete_account(_account(base, email))
+    elif op == OP_KEY:
+        if base.idempotency is not None:
+            import json
+            scope, pos = _unpack_str(payload, 0)
+            key, pos = _unpack_str(payload, pos)
+            fingerprint, pos = _unpack_str(payload, pos)
+            result, pos = _unpack_str(payload, pos)
+            (expires,) = EXPIRES.unpack_from(payload, pos)
+            base.idempotency.restore(scope, key, fingerprint, json.loads(result), expires)
+    elif op == OP_HISTORY:
+        if base.history is not None:
+            email, pos = _unpack_str(payload, 0)
+            when, kind, minor = ENTRY.unpack_from(payload, pos)
+            other, _ = _unpack_str(payload, pos + ENTRY.size)
+            base.history.restore(_account(base, email), when, kind, minor, other or None)
+    elif op == OP_ACCRUE:
+        email, pos = _unpack_str(payload, 0)
+        _unpack_accrued(payload, pos, _account(base, email))
+
+
+# Rebuild the accounts of `base` from a journal file
+# Returns the number of records replayed; a torn tail is cut off
+def replay(path, base, saving, checking, start=0):
+    if not os.path.exists(path):
+        return 0
+    journal, base.journal = base.journal, None
+    count = 0
+    good = start
+    try:
+        for op, payload, good in read_records(path, start):
+            _apply(op, payload, base, saving, checking)
+            count += 1
+    finally:
+        base.journal = journal
+    if os.path.getsize(path) > good:
+        with open(path, 'r+b') as f:
+            f.truncate(good)
+    return count
+
+
+# Replay an existing journal and attach it so new operations are logged
+def open_journal(path, base, saving, checking, **options):
+    replay(path, base, saving, checking)
+    base.journal = Journal(path, **options)
+    return base.journal
+
+
+# Benchmark: fsync per operation vs. group commit
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    from bank import BankSystem, SavingAccount, CheckingAccount
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = 8
+
+    def run(label, ops_per_thread, workers, **options):
+        path = os.path.join(tempfile.mkdtemp(), "bank.journal")
+        BankSystem.accounts.clear()
+        journal = open_journal(path, BankSystem, SavingAccount, CheckingAccount, **options)
+        accounts = [SavingAccount(f"user{i}", 100, f"user{i}@bank.com", "pw") for i in range(workers)]
+
+        def work(account):
+            for _ in range(ops_per_thread):
+                account.deposit(1)
+
+        pool = [threading.Thread(target=work, args=(acc,)) for acc in accounts]
+        start = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        journal.close()
+        elapsed = time.perf_counter() - start
+        total = ops_per_thread * workers
+        print(f"{label:<36} {total / elapsed:>12,.0f} ops/s  fsyncs: {journal.fsyncs}")
+
+        # Replay must rebuild the same balances
+        expected = [acc.get_balance() for acc in accounts]
+        BankSystem.accounts.clear()
+        BankSystem.journal = None
+        replay(path, BankSystem, SavingAccount, CheckingAccount)
+        rebuilt = [BankSystem.find_account_by_email(acc.email).get_balance() for acc in accounts]
+        assert rebuilt == expected, "replay mismatch"
+
+    run("fsync per op", count, 1, group_commit=False)
+    run("group commit, durable ack", count, 1)
+    run("group commit, async ack", count * 10, 1, wait=False)
+    run(f"group commit, durable ack, {threads} thr", count // threads, threads, wait=True, max_delay=0)
+    run(f"fsync per op, {threads} threads", count // threads, threads, group_commit=False)
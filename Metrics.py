@@ -0,0 +1,267 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Per-operation call counts, failure reasons and latency histograms.
+#
+# enable() swaps timing wrappers in for the instrumented methods and
+# disable() puts the original functions back, so when metrics are off the
+# classes are exactly what they were: no flag checks, no extra calls.
+# Results are available as a dict (snapshot()) and in Prometheus text format
+# (render_prometheus(), or serve() for a local /metrics endpoint).
+
+# Latency buckets are powers of two in nanoseconds: 128 ns .. ~17 s
+MIN_BUCKET = 7
+MAX_BUCKET = 34
+BUCKET_BOUNDS = [2 ** k for k in range(MIN_BUCKET, MAX_BUCKET + 1)]
+
+
+def _reason(text):
+    return "_".join(text.lower().replace("!", "").split()) or "failed"
+
+
+# Decide whether a call failed from its result: None for success, else a reason
+def _withdraw_result(result, args):
+    if result is False:
+        amount = args[1] if len(args) > 1 else None
+        if isinstance(amount, (int, float)) and amount <= 0:
+            return "invalid_amount"
+        return "insufficient_funds" if amount is not None else "rejected"
+    return None
+
+
+def _transfer_result(result, args):
+    if isinstance(result, str) and not result.startswith("Transferred"):
+        return _reason(result)
+    return None
+
+
+def _auth_result(result, args):
+    return "bad_password" if result is False else None
+
+
+def _lookup_result(result, args):
+    return "not_found" if result is None else None
+
+
+def _deposit_result(result, args):
+    return "invalid_amount" if result is False else None
+
+
+# Instrumented method name -> failure classifier
+OPERATIONS = {
+    "deposit": _deposit_result,
+    "withdraw": _withdraw_result,
+    "transfer": _transfer_result,
+    "authenticate": _auth_result,
+    "find_account_by_email": _lookup_result,
+    "find_account_by_name": _lookup_result,
+}
+
+
+class OperationStats:
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total_ns = 0
+        self.failures = {}      # reason -> count
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)   # last one is +Inf
+        self.lock = threading.Lock()
+
+    def observe(self, elapsed_ns, reason):
+        index = min(max(elapsed_ns.bit_length() - MIN_BUCKET, 0), len(BUCKET_BOUNDS))
+        with self.lock:
+            self.count += 1
+            self.total_ns += elapsed_ns
+            self.buckets[index] += 1
+            if reason is not None:
+                self.failures[reason] = self.failures.get(reason, 0) + 1
+
+    # Smallest bucket bound (ns) covering the given fraction of calls
+    def quantile(self, q):
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS, self.buckets):
+            seen += count
+            if seen >= target and seen:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "count": self.count,
+                "failures": dict(self.failures),
+                "sum_seconds": self.total_ns / 1e9,
+                "buckets": dict(zip(BUCKET_BOUNDS, self.buckets)),
+                "over": self.buckets[-1],
+            }
+
+
+class Metrics:
+    def __init__(self):
+        self.stats = {}         # operation name -> OperationStats
+        self.gauges = {}        # metric name -> (help, callable)
+        self.__patched = []     # (class, name, original attribute)
+        self.__lock = threading.RLock()
+
+    @property
+    def enabled(self):
+        return bool(self.__patched)
+
+    def operation(self, name):
+        stats = self.stats.get(name)
+        if stats is None:
+            with self.__lock:
+                stats = self.stats.setdefault(name, OperationStats(name))
+        return stats
+
+    def __wrap(self, function, name, classify):
+        stats = self.operation(name)
+        clock = time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                result = function(*args, **kwargs)
+            except Exception as e:
+                stats.observe(clock() - start, type(e).__name__)
+                raise
+            stats.observe(clock() - start, classify(result, args))
+            return result
+
+        timed.__name__ = function.__name__
+        timed.__doc__ = function.__doc__
+        timed.__wrapped__ = function
+        return timed
+
+    # Instrument the operations each class defines itself (not inherited ones,
+    # so a call is only counted once)
+    def enable(self, *classes, operations=OPERATIONS):
+        with self.__lock:
+            if self.__patched:
+                return
+            for cls in classes:
+                for name, classify in operations.items():
+                    original = cls.__dict__.get(name)
+                    if original is None:
+                        continue
+                    if isinstance(original, classmethod):
+                        wrapped = classmethod(self.__wrap(original.__func__, name, classify))
+                    else:
+                        wrapped = self.__wrap(original, name, classify)
+                    setattr(cls, name, wrapped)
+                    self.__patched.append((cls, name, original))
+            aggregates = getattr(classes[0], "aggregates", None) if classes else None
+            if aggregates is not None:
+                self.gauges["bank_accounts"] = ("Open accounts", lambda: aggregates.count)
+                self.gauges["bank_balance_minor_units"] = ("Total balance in minor units",
+                                                           lambda: aggregates.total_balance())
+
+    # Put the original methods back; recorded numbers are kept
+    def disable(self):
+        with self.__lock:
+            for cls, name, original in reversed(self.__patched):
+                setattr(cls, name, original)
+            self.__patched = []
+
+    def reset(self):
+        with self.__lock:
+            self.stats = {}
+
+    def snapshot(self):
+        return {name: stats.snapshot() for name, stats in list(self.stats.items())}
+
+    def render_prometheus(self):
+        lines = []
+        snapshot = self.snapshot()
+        lines.append("# HELP bank_operations_total Calls per operation")
+        lines.append("# TYPE bank_operations_total counter")
+        for name, data in snapshot.items():
+            lines.append(f'bank_operations_total{{op="{name}"}} {data["count"]}')
+        lines.append("# HELP bank_operation_failures_total Failed calls per operation and reason")
+        lines.append("# TYPE bank_operation_failures_total counter")
+        for name, data in snapshot.items():
+            for reason, count in sorted(data["failures"].items()):
+                lines.append(f'bank_operation_failures_total{{op="{name}",reason="{reason}"}} {count}')
+        lines.append("# HELP bank_operation_duration_seconds Operation latency")
+        lines.append("# TYPE bank_operation_duration_seconds histogram")
+        for name, data in snapshot.items():
+            cumulative = 0
+            for bound, count in data["buckets"].items():
+                cumulative += count
+                lines.append(f'bank_operation_duration_seconds_bucket{{op="{name}",le="{bound / 1e9:.9g}"}} {cumulative}')
+            lines.append(f'bank_operation_duration_seconds_bucket{{op="{name}",le="+Inf"}} {data["count"]}')
+            lines.append(f'bank_operation_duration_seconds_sum{{op="{name}"}} {data["sum_seconds"]:.9f}')
+            lines.append(f'bank_operation_duration_seconds_count{{op="{name}"}} {data["count"]}')
+        for metric, (text, read) in self.gauges.items():
+            lines.append(f"# HELP {metric} {text}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {read()}")
+        return "\n".join(lines) + "\n"
+
+    # Serve /metrics on a background thread; returns the server (call shutdown() to stop)
+    def serve(self, host="127.0.0.1", port=9108):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+METRICS = Metrics()
+
+
+# Benchmark: deposit/withdraw/transfer cost with metrics off vs. on
+if __name__ == "__main__":
+    import urllib.request
+    from bank import BankSystem, SavingAccount, CheckingAccount
+
+    alice = SavingAccount("Alice", 1_000_000, "alice@bank.com", "pw")
+    bob = CheckingAccount("Bob", 1_000, "bob@bank.com", "pw", 1)
+    rounds = 100_000
+
+    def workload():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            alice.deposit(2)
+            bob.withdraw(1)
+            alice.transfer(bob, 1, "pw")
+            BankSystem.find_account_by_email("bob@bank.com")
+        return (time.perf_counter() - start) / (rounds * 4) * 1e9
+
+    off = workload()
+    METRICS.enable(BankSystem, SavingAccount, CheckingAccount)
+    on = workload()
+    METRICS.disable()
+    assert BankSystem.deposit is BankSystem.__dict__["deposit"] and not hasattr(BankSystem.deposit, "__wrapped__")
+    again = workload()
+    print(f"metrics off:      {off:7.0f} ns/op")
+    print(f"metrics on:       {on:7.0f} ns/op")
+    print(f"off again:        {again:7.0f} ns/op")
+
+    server = METRICS.serve(port=0)
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    text = urllib.request.urlopen(url).read().decode()
+    server.shutdown()
+    print("\n".join(line for line in text.splitlines()
+                    if line.startswith(("bank_operations_total", "bank_operation_failures_total"))))
+    for name in ("deposit", "transfer"):
+        stats = METRICS.stats[name]
+        print(f"{name} p50 <= {stats.quantile(0.5)} ns, p99 <= {stats.quantile(0.99)} ns")
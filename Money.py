@@ -0,0 +1,219 @@
+from decimal import Decimal, ROUND_HALF_EVEN
+
+# Fixed-point money: amounts are held as integers in the minor unit
+# (cents by default). Rounding rules:
+#   - amounts coming in (deposits, fees, opening balances) are rounded to
+#     the minor unit, half to even, using their decimal value (0.1 is 10 cents)
+#   - interest is balance * rate computed exactly, then rounded half to even
+#   - everything after that is integer arithmetic, so it never drifts
+
+
+class MoneyContext:
+    def __init__(self, minor_unit=100):
+        self.minor_unit = minor_unit
+        self.__quantum = Decimal(1) / minor_unit
+        self.__rates = {}   # rate -> (numerator, denominator)
+
+    def __repr__(self):
+        return f"MoneyContext(minor_unit={self.minor_unit})"
+
+    # Amount in major units (int, float, str, Decimal) -> integer minor units
+    def to_minor(self, amount):
+        if isinstance(amount, int):
+            return amount * self.minor_unit
+        if isinstance(amount, float):
+            # Fast path: most float amounts are within rounding noise of a whole minor unit
+            scaled = amount * self.minor_unit
+            nearest = round(scaled)
+            if abs(scaled - nearest) < 1e-6:
+                return int(nearest)
+            amount = repr(amount)
+        if isinstance(amount, Money):
+            return amount.minor
+        value = Decimal(amount).quantize(self.__quantum, rounding=ROUND_HALF_EVEN)
+        return int(value * self.minor_unit)
+
+    def to_major(self, minor):
+        return minor / self.minor_unit
+
+    def to_decimal(self, minor):
+        return Decimal(minor) / self.minor_unit
+
+    # "1,234.50"; grouping=False gives "1234.50" for files
+    def format(self, minor, grouping=True):
+        return f"{self.to_decimal(minor):{',' if grouping else ''}.{len(str(self.minor_unit)) - 1}f}"
+
+    # The rate's decimal value as an exact (numerator, denominator)
+    def ratio(self, rate):
+        ratio = self.__rates.get(rate)
+        if ratio is None:
+            ratio = self.__rates[rate] = Decimal(repr(rate) if isinstance(rate, float) else rate).as_integer_ratio()
+        return ratio
+
+    # minor * rate, exact, rounded half to even
+    def apply_rate(self, minor, rate):
+        numerator, denominator = self.ratio(rate)
+        quotient, remainder = divmod(minor * numerator, denominator)
+        doubled = 2 * remainder
+        if doubled > denominator or (doubled == denominator and quotient % 2):
+            quotient += 1
+        return quotient
+
+
+DEFAULT = MoneyContext()
+
+
+# Immutable money value for callers that want a type instead of bare ints
+class Money:
+    __slots__ = ('minor', 'context')
+
+    def __init__(self, minor=0, context=DEFAULT):
+        self.minor = minor
+        self.context = context
+
+    @classmethod
+    def of(cls, amount, context=DEFAULT):
+        return cls(context.to_minor(amount), context)
+
+    def __add__(self, other):
+        return Money(self.minor + self.context.to_minor(other), self.context)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Money(self.minor - self.context.to_minor(other), self.context)
+
+    def __rsub__(self, other):
+        return Money(self.context.to_minor(other) - self.minor, self.context)
+
+    def __neg__(self):
+        return Money(-self.minor, self.context)
+
+    def __mul__(self, rate):
+        return Money(self.context.apply_rate(self.minor, rate), self.context)
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other):
+        if isinstance(other, (Money, int, float, str, Decimal)):
+            return self.minor == self.context.to_minor(other)
+        return NotImplemented
+
+    def __lt__(self, other):
+        return self.minor < self.context.to_minor(other)
+
+    def __le__(self, other):
+        return self.minor <= self.context.to_minor(other)
+
+    def __gt__(self, other):
+        return self.minor > self.context.to_minor(other)
+
+    def __ge__(self, other):
+        return self.minor >= self.context.to_minor(other)
+
+    def __hash__(self):
+        return hash(self.minor)
+
+    def __bool__(self):
+        return self.minor != 0
+
+    def __float__(self):
+        return self.context.to_major(self.minor)
+
+    def __format__(self, spec):
+        return format(self.context.to_decimal(self.minor), spec)
+
+    def __str__(self):
+        return self.context.format(self.minor)
+
+    def __repr__(self):
+        return f"Money('{self.context.to_decimal(self.minor)}')"
+
+
+# Benchmark: float vs. Decimal vs. integer minor units
+if __name__ == "__main__":
+    import time
+
+    rounds = 1_000_000
+    amounts = [round(1 + (i % 997) * 0.37, 2) for i in range(1000)]
+    rate = 0.0375
+
+    def bench(label, run):
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<34} {elapsed / rounds * 1e9:8.0f} ns/op   result {result}")
+
+    def float_loop():
+        balance = 1000.0
+        for i in range(rounds):
+            balance += amounts[i % 1000]
+            balance -= amounts[(i * 7) % 1000]
+        return repr(balance)    # drifts away from the exact result
+
+    def decimal_loop():
+        balance = Decimal("1000")
+        decimals = [Decimal(repr(a)) for a in amounts]
+        for i in range(rounds):
+            balance += decimals[i % 1000]
+            balance -= decimals[(i * 7) % 1000]
+        return balance
+
+    def minor_loop():
+        balance = DEFAULT.to_minor(1000)
+        minors = [DEFAULT.to_minor(a) for a in amounts]
+        for i in range(rounds):
+            balance += minors[i % 1000]
+            balance -= minors[(i * 7) % 1000]
+        return DEFAULT.format(balance)
+
+    print("deposit + withdraw loop")
+    bench("  float", float_loop)
+    bench("  Decimal", decimal_loop)
+    bench("  integer cents", minor_loop)
+
+    # Interest posted on many balances, rounded to the cent each time
+    balances = [1000 + i * 13.37 for i in range(1000)]
+
+    def float_interest():
+        total = 0.0
+        for i in range(rounds):
+            total += round(balances[i % 1000] * rate, 2)
+        return f"{total:.2f}"
+
+    def decimal_interest():
+        total = Decimal(0)
+        decimals = [Decimal(repr(b)) for b in balances]
+        exact_rate = Decimal(repr(rate))
+        cent = Decimal("0.01")
+        for i in range(rounds):
+            total += (decimals[i % 1000] * exact_rate).quantize(cent, rounding=ROUND_HALF_EVEN)
+        return total
+
+    def minor_interest():
+        total = 0
+        minors = [DEFAULT.to_minor(b) for b in balances]
+        for i in range(rounds):
+            total += DEFAULT.apply_rate(minors[i % 1000], rate)
+        return DEFAULT.format(total)
+
+    print("interest posting loop")
+    bench("  float", float_interest)
+    bench("  Decimal", decimal_interest)
+    bench("  integer cents", minor_interest)
+
+    from bank import SavingAccount, CheckingAccount
+    saver = SavingAccount("Saver", 1000, "saver@bank.com", "pw", 0.000001)
+    checker = CheckingAccount("Checker", 100_000_000, "checker@bank.com", "pw", 0.25)
+
+    def account_loop():
+        for i in range(rounds):
+            amount = amounts[i % 1000]
+            saver.deposit(amount)
+            checker.withdraw(amount)
+            saver.add_interest()
+        return f"{saver.get_balance():.2f} / {checker.get_balance():.2f}"
+
+    rounds //= 10
+    print("SavingAccount/CheckingAccount (deposit + withdraw w/ fee + interest)")
+    bench("  integer cents core", account_loop)
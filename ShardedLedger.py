@@ -0,0 +1,278 @@
+import itertools
+import multiprocessing
+import zlib
+
+# Sharded deployment: accounts are partitioned by email hash across worker
+# processes, each with its own BankSystem registry. ShardedBank routes
+# single-account operations to the owning shard; a transfer between two
+# shards runs as a two-phase commit (prepare debit + prepare credit, then
+# commit both or abort both).
+
+
+def shard_of(email, shards):
+    return zlib.crc32(email.encode('utf-8')) % shards
+
+
+# ---- worker process ----
+class _Shard:
+    def __init__(self):
+        from bank import BankSystem, SavingAccount, CheckingAccount
+        self.bank = BankSystem
+        self.saving = SavingAccount
+        self.checking = CheckingAccount
+        self.pending = {}    # txid -> (account, amount to undo or credit)
+
+    def __find(self, email):
+        account = self.bank.find_account_by_email(email)
+        if account is None:
+            raise ValueError("Account not found!")
+        return account
+
+    def create(self, email, kind, name, balance, password, extra):
+        if kind == "savings":
+            self.saving(name, balance, email, password, extra)
+        elif kind == "checking":
+            self.checking(name, balance, email, password, extra)
+        else:
+            raise ValueError(f"Unknown account type: {kind}")
+        return email
+
+    def deposit(self, email, amount):
+        account = self.__find(email)
+        if not account.deposit(amount):
+            raise ValueError("Invalid deposit amount!")
+        return account.get_balance()
+
+    def withdraw(self, email, amount):
+        account = self.__find(email)
+        if not account.withdraw(amount):
+            raise ValueError("Insufficient funds or invalid amount!")
+        return account.get_balance()
+
+    def balance(self, email):
+        return self.__find(email).get_balance()
+
+    def lookup(self, email):
+        account = self.bank.find_account_by_email(email)
+        return None if account is None else (account.get_name(), account.email)
+
+    def lookup_name(self, name):
+        account = self.bank.find_account_by_name(name)
+        return None if account is None else (account.get_name(), account.email)
+
+    def authenticate(self, email, password):
+        return self.__find(email).authenticate(password)
+
+    # Both accounts live on this shard
+    def transfer(self, email, password, to_email, amount):
+        result = self.__find(email).transfer(self.__find(to_email), amount, password)
+        if not result.startswith("Transferred"):
+            raise ValueError(result)
+        return result
+
+    # Phase 1 on the source shard: take the money out (fee included) and hold it
+    def prepare_debit(self, txid, email, password, amount):
+        account = self.__find(email)
+        if not account.authenticate(password):
+            raise ValueError("Authentication failed")
+        if amount <= 0:
+            raise ValueError("Invalid transfer amount")
+        before = account.get_balance_minor()
+        if before < self.bank.money.to_minor(amount) or not account.withdraw(amount):
+            raise ValueError("Insufficient funds")
+        self.pending[txid] = (account, before - account.get_balance_minor())
+        return account.get_name()
+
+    # Phase 1 on the target shard: the account must exist
+    def prepare_credit(self, txid, email, amount):
+        account = self.__find(email)
+        self.pending[txid] = (account, amount)
+        return account.get_name()
+
+    def commit(self, txid, side):
+        account, amount = self.pending.pop(txid)
+        if side == "credit":
+            account.deposit(amount)
+        return True
+
+    def abort(self, txid, side):
+        entry = self.pending.pop(txid, None)
+        if entry is not None and side == "debit":
+            account, debited = entry
+            # Base deposit: give back exactly what was taken, fee included
+            self.bank.deposit_minor(account, debited)
+        return True
+
+    def stats(self):
+        accounts = list(self.bank.accounts)
+        return len(accounts), sum(acc.get_balance_minor() for acc in accounts)
+
+
+def _shard_main(conn):
+    shard = _Shard()
+    while True:
+        batch = conn.recv()
+        if batch is None:
+            break
+        results = []
+        for op, args in batch:
+            try:
+                # A command that fails part way is rolled back by the undo log
+                with shard.bank.transaction():
+                    value = getattr(shard, op)(*args)
+                results.append((True, value))
+            except (ValueError, KeyError, TypeError) as e:
+                results.append((False, str(e)))
+            except Exception as e:
+                # Anything else fails this command only; the shard keeps serving
+                results.append((False, f"{type(e).__name__}: {e}"))
+        conn.send(results)
+    conn.close()
+
+
+class ShardError(Exception):
+    pass
+
+
+# ---- router ----
+class ShardedBank:
+    def __init__(self, shards=None):
+        self.shards = shards or multiprocessing.cpu_count()
+        self.__txids = itertools.count(1)
+        self.__conns = []
+        self.__procs = []
+        for i in range(self.shards):
+            parent, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(target=_shard_main, args=(child,), name=f"bank-shard-{i}", daemon=True)
+            proc.start()
+            child.close()
+            self.__conns.append(parent)
+            self.__procs.append(proc)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for conn, proc in zip(self.__conns, self.__procs):
+            conn.send(None)
+            proc.join()
+            conn.close()
+        self.__conns = []
+
+    def shard_for(self, email):
+        return shard_of(email, self.shards)
+
+    def __call(self, shard, op, *args):
+        self.__conns[shard].send([(op, args)])
+        ok, value = self.__conns[shard].recv()[0]
+        if not ok:
+            raise ShardError(value)
+        return value
+
+    # Run many (op, email, *args) commands: one message per shard, shards in parallel
+    # Returns (ok, value) per command in input order
+    def execute(self, commands):
+        per_shard = {}
+        for index, (op, email, *args) in enumerate(commands):
+            per_shard.setdefault(self.shard_for(email), []).append((index, (op, (email, *args))))
+        for shard, items in per_shard.items():
+            self.__conns[shard].send([command for _, command in items])
+        results = [None] * len(commands)
+        for shard, items in per_shard.items():
+            for (index, _), result in zip(items, self.__conns[shard].recv()):
+                results[index] = result
+        return results
+
+    # ---- single-account operations ----
+    def create_savings(self, name, balance, email, password, interest_rate=0.03):
+        return self.__call(self.shard_for(email), "create", email, "savings", name, balance, password, interest_rate)
+
+    def create_checking(self, name, balance, email, password, transaction_fee=5):
+        return self.__call(self.shard_for(email), "create", email, "checking", name, balance, password, transaction_fee)
+
+    def deposit(self, email, amount):
+        return self.__call(self.shard_for(email), "deposit", email, amount)
+
+    def withdraw(self, email, amount):
+        return self.__call(self.shard_for(email), "withdraw", email, amount)
+
+    def balance(self, email):
+        return self.__call(self.shard_for(email), "balance", email)
+
+    def authenticate(self, email, password):
+        return self.__call(self.shard_for(email), "authenticate", email, password)
+
+    def find_account_by_email(self, email):
+        return self.__call(self.shard_for(email), "lookup", email)
+
+    # Names are not the shard key, so ask every shard
+    def find_account_by_name(self, name):
+        for shard in range(self.shards):
+            found = self.__call(shard, "lookup_name", name)
+            if found is not None:
+                return found
+        return None
+
+    def transfer(self, email, to_email, amount, password):
+        source = self.shard_for(email)
+        target = self.shard_for(to_email)
+        if source == target:
+            try:
+                return self.__call(source, "transfer", email, password, to_email, amount)
+            except ShardError as e:
+                return str(e)
+        txid = next(self.__txids)
+        # Phase 1: prepare both sides
+        try:
+            target_name = self.__call(target, "prepare_credit", txid, to_email, amount)
+        except ShardError:
+            return "Recipient account not found!"
+        try:
+            source_name = self.__call(source, "prepare_debit", txid, email, password, amount)
+        except ShardError as e:
+            self.__call(target, "abort", txid, "credit")
+            return str(e)
+        # Phase 2: both prepared, commit both
+        self.__call(source, "commit", txid, "debit")
+        self.__call(target, "commit", txid, "credit")
+        return f"Transferred ${amount:.2f} from {source_name} to {target_name}"
+
+    # (accounts, total balance in minor units) per shard
+    def stats(self):
+        return [self.__call(shard, "stats") for shard in range(self.shards)]
+
+
+# Benchmark: aggregate deposit throughput with 1..N shards
+if __name__ == "__main__":
+    import sys
+    import time
+
+    max_shards = int(sys.argv[1]) if len(sys.argv) > 1 else multiprocessing.cpu_count()
+    accounts = 20_000
+    operations = 400_000
+    chunk = 2_000
+    emails = [f"user{i}@bank.com" for i in range(accounts)]
+
+    print(f"{'shards':>7} {'deposits/s':>14}")
+    for shards in sorted({1, 2, 4, max_shards} & set(range(1, max_shards + 1))):
+        with ShardedBank(shards) as bank:
+            created = bank.execute([("create", email, "savings", f"user{i}", 100, "pw", 0.03)
+                                    for i, email in enumerate(emails)])
+            assert all(ok for ok, _ in created)
+            commands = [("deposit", emails[i % accounts], 1) for i in range(operations)]
+            start = time.perf_counter()
+            for i in range(0, operations, chunk):
+                results = bank.execute(commands[i:i + chunk])
+            assert all(ok for ok, _ in results)
+            elapsed = time.perf_counter() - start
+            print(f"{shards:>7} {operations / elapsed:>14,.0f}")
+
+            # Cross-shard 2PC transfers keep the bank total unchanged
+            before = sum(total for _, total in bank.stats())
+            for i in range(200):
+                assert bank.transfer(emails[i], emails[-1 - i], 10, "pw").startswith("Transferred")
+            after = sum(total for _, total in bank.stats())
+            assert before == after, "transfers changed the bank total"
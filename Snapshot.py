@@ -0,0 +1,297 @@
+import mmap
+import os
+import struct
+import zlib
+from contextlib import nullcontext
+from decimal import Decimal
+
+from History import read_histories, write_histories
+from Idempotency import read_entries, write_entries
+from Journal import KIND_BASIC, KIND_SAVINGS, KIND_CHECKING, replay, Journal
+
+# File layout (little endian):
+#   header
+#   rows         one fixed-size ROW per account, in creation order
+#   email table  hash table of uint32 slots (row + 1, 0 = empty)
+#   name table   same, pointing at the first row with that name
+#   string heap  name + email + password (+ accrued fraction) of each row, back to back
+MAGIC = b'BANKSNP2'
+HEADER = struct.Struct('<8sIIQQQQ')   # magic, count, slots, journal offset, rows, tables, heap
+# kind, balance (minor units), extra, heap pos, 3 string lengths, next row with same name,
+# accrued day (-1 when not accruing), accrued fraction length
+ROW = struct.Struct('<BqdQHHHiqH')
+# Version 1 rows, without the accrual state; still readable
+MAGIC_V1 = b'BANKSNP1'
+ROW_V1 = struct.Struct('<BqdQHHHi')
+SLOT = struct.Struct('<I')
+
+
+def _slot(key, slots):
+    return zlib.crc32(key) & (slots - 1)
+
+
+def _table_size(count):
+    slots = 8
+    while slots < count * 2:
+        slots *= 2
+    return slots
+
+
+# Write the accounts to a snapshot file (atomically replaces path)
+# journal_offset is the journal size the snapshot is consistent with
+def write_snapshot(path, accounts, journal_offset=0):
+    accounts = list(accounts)
+    count = len(accounts)
+    slots = _table_size(count)
+    email_table = bytearray(SLOT.size * slots)
+    name_table = bytearray(SLOT.size * slots)
+    last_by_name = {}
+    rows = bytearray(ROW.size * count)
+    heap = bytearray()
+    next_name = [-1] * count
+    strings = []
+
+    for row, account in enumerate(accounts):
+        name = account.get_name().encode('utf-8')
+        email = account.email.encode('utf-8')
+        strings.append((name, email, account.password.encode('utf-8')))
+        for table, key in ((email_table, email), (name_table, name)):
+            if table is name_table and name in last_by_name:
+                next_name[last_by_name[name]] = row
+                continue
+            slot = _slot(key, slots)
+            while SLOT.unpack_from(table, slot * SLOT.size)[0]:
+                slot = (slot + 1) & (slots - 1)
+            SLOT.pack_into(table, slot * SLOT.size, row + 1)
+        last_by_name[name] = row
+
+    for row, account in enumerate(accounts):
+        if hasattr(account, 'interest_rate'):
+            kind, extra = KIND_SAVINGS, account.interest_rate
+        elif hasattr(account, 'transaction_fee'):
+            kind, extra = KIND_CHECKING, account.transaction_fee
+        else:
+            kind, extra = KIND_BASIC, 0.0
+        name, email, password = strings[row]
+        day = getattr(account, 'accrued_day', None)
+        fraction = b'' if day is None else str(account.accrued_fraction).encode('utf-8')
+        ROW.pack_into(rows, row * ROW.size, kind, account.get_posted_balance_minor(), extra, len(heap),
+                      len(name), len(email), len(password), next_name[row],
+                      -1 if day is None else day, len(fraction))
+        heap += name + email + password + fraction
+
+    rows_at = HEADER.size
+    tables_at = rows_at + len(rows)
+    heap_at = tables_at + len(email_table) + len(name_table)
+    temp = path + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, count, slots, journal_offset, rows_at, tables_at, heap_at))
+        f.write(rows)
+        f.write(email_table)
+        f.write(name_table)
+        f.write(heap)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+    return count
+
+
+# Read-only view of a snapshot file through mmap
+# Nothing is decoded until a row is asked for
+class Snapshot:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.count, self.__slots, self.journal_offset,
+         self.__rows, self.__tables, self.__heap) = HEADER.unpack_from(self.__map, 0)
+        if magic == MAGIC:
+            self.__row_struct = ROW
+        elif magic == MAGIC_V1:
+            self.__row_struct = ROW_V1
+        else:
+            raise ValueError(f"{path} is not a bank snapshot")
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.__map.close()
+
+    def __row(self, row):
+        size = self.__row_struct.size
+        return self.__row_struct.unpack_from(self.__map, self.__rows + row * size)
+
+    def __strings(self, row):
+        pos, name_len, email_len, pw_len = self.__row(row)[3:7]
+        start = self.__heap + pos
+        data = self.__map[start:start + name_len + email_len + pw_len]
+        return data[:name_len], data[name_len:name_len + email_len], data[name_len + email_len:]
+
+    def __lookup(self, table, key, part):
+        slots = self.__slots
+        slot = _slot(key, slots)
+        while True:
+            (value,) = SLOT.unpack_from(self.__map, table + slot * SLOT.size)
+            if not value:
+                return None
+            if self.__strings(value - 1)[part] == key:
+                return value - 1
+            slot = (slot + 1) & (slots - 1)
+
+    def find_email(self, email):
+        return self.__lookup(self.__tables, email.encode('utf-8'), 1)
+
+    # Rows with this name, in creation order
+    def rows_by_name(self, name):
+        row = self.__lookup(self.__tables + SLOT.size * self.__slots, name.encode('utf-8'), 0)
+        while row is not None and row >= 0:
+            yield row
+            row = self.__row(row)[7]
+
+    # Balance in minor units, straight from the file
+    def balance_minor(self, row):
+        return self.__row(row)[1]
+
+    # (kind, balance in minor units) of every row, without decoding strings
+    def balances(self):
+        row_struct = self.__row_struct
+        rows = memoryview(self.__map)[self.__rows:self.__rows + self.count * row_struct.size]
+        try:
+            for kind, balance, *_ in row_struct.iter_unpack(rows):
+                yield kind, balance
+        finally:
+            rows.release()
+
+    # (kind, name, balance in minor units, email, password, extra, (accrued day, fraction) or None)
+    def record(self, row):
+        fields = self.__row(row)
+        kind, balance, extra = fields[:3]
+        name, email, password = (s.decode('utf-8') for s in self.__strings(row))
+        accrued = None
+        if len(fields) > 8 and fields[8] >= 0:
+            start = self.__heap + fields[3] + sum(fields[4:7])
+            accrued = fields[8], self.__map[start:start + fields[9]].decode('utf-8')
+        return kind, name, balance, email, password, extra, accrued
+
+
+# Map the snapshot into base.accounts; objects are built on first touch.
+# Idempotency keys and history journaled before the snapshot come from its
+# .keys and .history files; an account's history is attached when touched.
+def load_snapshot(path, base, saving, checking):
+    snapshot = Snapshot(path)
+    attach_store(snapshot, base, saving, checking)
+    if base.idempotency is not None:
+        for entry in read_entries(path + ".keys"):
+            base.idempotency.restore(*entry)
+    history = getattr(base, 'history', None)
+    if history is not None:
+        histories = read_histories(path + ".history")
+        history.attach(lambda email: histories.pop(email, None))
+    return snapshot
+
+
+# Attach a lazy backing store (a Snapshot, or anything with count, find_email,
+# rows_by_name, record and balances) to an empty base.accounts. A savings
+# record's accrual state, when it has one, replaces the constructor's.
+def attach_store(store, base, saving, checking):
+    def materialize(record):
+        kind, name, minor, email, password, extra, accrued = record
+        balance = base.money.to_major(minor)
+        # Already journaled, counted and aggregated when the store was attached
+        with base.restoring():
+            if kind == KIND_SAVINGS:
+                account = saving(name, balance, email, password, extra)
+                if accrued is not None:
+                    account.accrued_day, fraction = accrued
+                    account.accrued_fraction = Decimal(fraction)
+                else:
+                    account.accrued_day = None  # starts on its first accrual, which logs it
+                return account
+            if kind == KIND_CHECKING:
+                return checking(name, balance, email, password, extra)
+            return base(name, balance, email, password)
+
+    base.accounts.clear()
+    base.accounts.attach_snapshot(store, materialize, base.registry_lock)
+    base.number_of_accounts = store.count
+    aggregates = getattr(base, 'aggregates', None)
+    if aggregates is not None:
+        kinds = {KIND_BASIC: base.kind, KIND_SAVINGS: saving.kind, KIND_CHECKING: checking.kind}
+        aggregates.reset()
+        for kind, balance in store.balances():
+            aggregates.add(kinds[kind], balance)
+
+
+# Snapshot the current accounts together with the journal position they include.
+# Creates and deletes wait on the registry lock and balance changes on the
+# account locks, so nothing moves between reading the offset and the rows.
+def checkpoint(path, base):
+    history = getattr(base, 'history', None)
+    with base.registry_lock:
+        accounts = list(base.accounts)
+        # History after the account locks: keyed operations record it while holding them
+        with base.lock_accounts(*accounts), history.frozen() if history is not None else nullcontext():
+            # Rows hold the posted balance and accrual state; unposted interest stays pending
+            offset = 0
+            if base.journal is not None:
+                base.journal.flush()
+                offset = os.path.getsize(base.journal.path)
+            # The keys journaled before offset, which replay will skip
+            if base.idempotency is not None:
+                write_entries(path + ".keys", base.idempotency.entries())
+            if history is not None:
+                write_histories(path + ".history", ((account.email, history.of(account)) for account in accounts))
+            return write_snapshot(path, accounts, offset)
+
+
+# Startup: map the snapshot, replay newer journal records, attach the journal
+def open_bank(snapshot_path, journal_path, base, saving, checking, **journal_options):
+    offset = 0
+    if os.path.exists(snapshot_path):
+        offset = load_snapshot(snapshot_path, base, saving, checking).journal_offset
+    replay(journal_path, base, saving, checking, start=offset)
+    base.journal = Journal(journal_path, **journal_options)
+    return base.journal
+
+
+# Benchmark: startup time of journal replay vs. mapping a snapshot
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    import time
+    from bank import BankSystem, SavingAccount, CheckingAccount
+    from Journal import open_journal
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    folder = tempfile.mkdtemp()
+    journal_path = os.path.join(folder, "bank.journal")
+    snapshot_path = os.path.join(folder, "bank.snapshot")
+
+    journal = open_journal(journal_path, BankSystem, SavingAccount, CheckingAccount, wait=False)
+    for i in range(count):
+        if i % 2:
+            SavingAccount(f"user{i}", 100 + i, f"user{i}@bank.com", "pw", 0.04)
+        else:
+            CheckingAccount(f"user{i}", 100 + i, f"user{i}@bank.com", "pw", 5)
+    start = time.perf_counter()
+    checkpoint(snapshot_path, BankSystem)
+    print(f"write snapshot ({count:,} accounts): {time.perf_counter() - start:.3f} s")
+    # Activity after the checkpoint only lives in the journal
+    BankSystem.find_account_by_email("user7@bank.com").deposit(50)
+    journal.close()
+    BankSystem.journal = None
+
+    BankSystem.accounts.clear()
+    start = time.perf_counter()
+    replay(journal_path, BankSystem, SavingAccount, CheckingAccount)
+    print(f"startup by full journal replay:     {time.perf_counter() - start:.3f} s")
+
+    BankSystem.accounts.clear()
+    start = time.perf_counter()
+    open_bank(snapshot_path, journal_path, BankSystem, SavingAccount, CheckingAccount).close()
+    print(f"startup from snapshot + journal:    {time.perf_counter() - start:.3f} s")
+    start = time.perf_counter()
+    balance = BankSystem.find_account_by_email(f"user{count - 1}@bank.com").get_balance()
+    print(f"first lookup: {(time.perf_counter() - start) * 1e6:.0f} us (balance {balance})")
+    print("user7 balance after replay:", BankSystem.find_account_by_email("user7@bank.com").get_balance())
@@ -0,0 +1,449 @@
+import queue
+import sqlite3
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from Journal import KIND_BASIC, KIND_SAVINGS, KIND_CHECKING
+
+# SQLite storage backend.
+#
+# SqliteStore plugs into the same hook as Journal (BankSystem.journal): the
+# core reports creates, balance changes, email changes and deletes, and a
+# writer thread applies them to the database in batched transactions (at
+# most max_batch operations or max_delay seconds per commit). Records
+# logged inside BankSystem.transaction() always land in the same commit.
+# As with Journal, wait=True (the default) returns only once the commit is
+# done, and an error in the writer is raised to waiters and later calls.
+#
+# Reads go through the registry first, which acts as the cache: the store is
+# attached as the registry's lazy backing store, so an account is read from
+# the database (through a small pool of reader connections) only the first
+# time it is looked up. The database runs in WAL mode so those readers never
+# wait for the writer.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    id INTEGER PRIMARY KEY,
+    kind INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    balance INTEGER NOT NULL,   -- minor units
+    extra REAL NOT NULL,        -- interest rate or transaction fee
+    accrued_day INTEGER,        -- savings accrual state (see Accrual.py), NULL when not accruing
+    accrued_fraction TEXT NOT NULL DEFAULT '0'
+);
+CREATE INDEX IF NOT EXISTS accounts_name ON accounts (name, id);
+CREATE TABLE IF NOT EXISTS history (
+    email TEXT NOT NULL,
+    time REAL NOT NULL,
+    kind INTEGER NOT NULL,      -- History type code
+    amount INTEGER NOT NULL,    -- signed, minor units
+    other TEXT                  -- the other account of a transfer
+);
+CREATE INDEX IF NOT EXISTS history_email ON history (email, time);
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    result TEXT NOT NULL,       -- JSON
+    expires REAL NOT NULL,
+    PRIMARY KEY (scope, key)
+);
+"""
+
+# Fixed SQL text, so every connection's statement cache keeps them prepared
+SQL_INSERT = ("INSERT INTO accounts (kind, name, email, password, balance, extra, accrued_day, accrued_fraction) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+SQL_ADD = "UPDATE accounts SET balance = balance + ? WHERE email = ?"
+SQL_SUBTRACT = "UPDATE accounts SET balance = balance - ? WHERE email = ?"
+SQL_EMAIL = "UPDATE accounts SET email = ? WHERE email = ?"
+SQL_DELETE = "DELETE FROM accounts WHERE email = ?"
+SQL_HISTORY = "INSERT INTO history (email, time, kind, amount, other) VALUES (?, ?, ?, ?, ?)"
+SQL_HISTORY_EMAIL = "UPDATE history SET email = ? WHERE email = ?"
+SQL_HISTORY_DELETE = "DELETE FROM history WHERE email = ?"
+SQL_ACCRUE = "UPDATE accounts SET accrued_day = ?, accrued_fraction = ? WHERE email = ?"
+SQL_KEY = "INSERT OR REPLACE INTO idempotency_keys (scope, key, fingerprint, result, expires) VALUES (?, ?, ?, ?, ?)"
+SQL_FIND_EMAIL = "SELECT id FROM accounts WHERE email = ?"
+SQL_FIND_NAME = "SELECT id FROM accounts WHERE name = ? ORDER BY id"
+SQL_RECORD = ("SELECT kind, name, balance, email, password, extra, accrued_day, accrued_fraction "
+              "FROM accounts WHERE id = ?")
+
+
+def _connect(path, durable=False):
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=64)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # NORMAL survives a process crash; FULL also survives power loss
+    conn.execute(f"PRAGMA synchronous={'FULL' if durable else 'NORMAL'}")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+# Reader connections handed out one per thread at a time
+class ConnectionPool:
+    def __init__(self, path, size=4):
+        self.path = path
+        self.size = size
+        self.__idle = queue.LifoQueue()
+        self.__created = 0
+        self.__lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self.__idle.get_nowait()
+        except queue.Empty:
+            with self.__lock:
+                grow = self.__created < self.size
+                if grow:
+                    self.__created += 1
+            conn = _connect(self.path) if grow else self.__idle.get()
+        try:
+            yield conn
+        finally:
+            self.__idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self.__idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class SqliteStore:
+    def __init__(self, path, readers=4, max_batch=512, max_delay=0.005, wait=True, durable=False):
+        self.path = path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.wait = wait
+        self.commits = 0
+        self.pool = ConnectionPool(path, readers)
+        self.__db = _connect(path, durable)
+        self.__db.executescript(SCHEMA)
+        # Databases from before the accrual columns
+        columns = [column[1] for column in self.__db.execute("PRAGMA table_info(accounts)")]
+        if "accrued_day" not in columns:
+            self.__db.execute("ALTER TABLE accounts ADD COLUMN accrued_day INTEGER")
+            self.__db.execute("ALTER TABLE accounts ADD COLUMN accrued_fraction TEXT NOT NULL DEFAULT '0'")
+        self.__cond = threading.Condition()
+        self.__pending = []      # (sql, params) in order
+        self.__pending_since = 0.0
+        self.__appended = 0
+        self.__durable = 0
+        self.__flush_now = False
+        self.__closed = False
+        self.__error = None
+        self.__local = threading.local()
+        self.__db.execute("DELETE FROM idempotency_keys WHERE expires <= ?", (time.time(),))
+        # Rows present when the store was opened, as the registry's lazy backing store
+        self.__rowids = array('q', (row for (row,) in self.__db.execute("SELECT id FROM accounts ORDER BY id")))
+        self.count = len(self.__rowids)
+        self.__writer = threading.Thread(target=self.__run_writer, name="sqlite-writer", daemon=True)
+        self.__writer.start()
+
+    # ---- the Journal interface ----
+    def log_create(self, account):
+        if hasattr(account, 'interest_rate'):
+            kind, extra = KIND_SAVINGS, account.interest_rate
+        elif hasattr(account, 'transaction_fee'):
+            kind, extra = KIND_CHECKING, account.transaction_fee
+        else:
+            kind, extra = KIND_BASIC, 0.0
+        self.__append(SQL_INSERT, (kind, account.get_name(), account.email, account.password,
+                                   account.get_posted_balance_minor(), extra, getattr(account, 'accrued_day', None),
+                                   str(getattr(account, 'accrued_fraction', 0))))
+
+    def log_deposit(self, email, minor):
+        self.__append(SQL_ADD, (minor, email))
+
+    def log_withdraw(self, email, minor):
+        self.__append(SQL_SUBTRACT, (minor, email))
+
+    def log_email(self, old_email, new_email):
+        self.__append(None, [(SQL_EMAIL, (new_email, old_email)), (SQL_HISTORY_EMAIL, (new_email, old_email))])
+
+    def log_delete(self, email):
+        self.__append(None, [(SQL_DELETE, (email,)), (SQL_HISTORY_DELETE, (email,))])
+
+    # History rides along with the money commits: it doesn't wait for the disk itself
+    def log_history(self, email, when, kind, minor, other=None):
+        self.__append(SQL_HISTORY, (email, when, kind, minor, other), wait=False)
+
+    def log_accrue(self, account):
+        self.__append(SQL_ACCRUE, (account.accrued_day, str(account.accrued_fraction), account.email))
+
+    def log_key(self, scope, key, fingerprint, result, expires):
+        import json
+        self.__append(SQL_KEY, (scope, key, fingerprint, json.dumps(result), expires))
+
+    # Operations logged inside this block are committed together
+    @contextmanager
+    def transaction(self):
+        stack = self.__local.__dict__.setdefault('stack', [])
+        stack.append([])
+        try:
+            yield self
+        except BaseException:
+            stack.pop()
+            raise
+        operations = stack.pop()
+        if operations:
+            self.__append(None, operations)
+
+    # ---- writing ----
+    def __append(self, sql, params, wait=True):
+        stack = getattr(self.__local, 'stack', None)
+        if stack:
+            if sql is None:
+                stack[-1].extend(params)
+            else:
+                stack[-1].append((sql, params))
+            return
+        with self.__cond:
+            if self.__error is not None:
+                raise self.__error
+            if self.__closed:
+                raise ValueError("Store is closed")
+            if not self.__pending:
+                self.__pending_since = time.monotonic()
+                self.__cond.notify_all()
+            if sql is None:
+                self.__pending.extend(params)
+            else:
+                self.__pending.append((sql, params))
+            self.__appended += 1
+            seq = self.__appended
+            if self.wait and wait:
+                # Someone is waiting, so don't hold the batch for max_delay
+                self.__flush_now = True
+                self.__cond.notify_all()
+                self.__wait_for(seq)
+            elif len(self.__pending) >= self.max_batch:
+                self.__cond.notify_all()
+
+    # Called with the condition held
+    def __wait_for(self, seq):
+        while self.__durable < seq:
+            if self.__error is not None:
+                raise self.__error
+            self.__cond.wait()
+
+    def __commit(self, operations):
+        db = self.__db
+        db.execute("BEGIN")
+        try:
+            # Runs of the same statement go through executemany
+            start = 0
+            while start < len(operations):
+                sql = operations[start][0]
+                end = start + 1
+                while end < len(operations) and operations[end][0] == sql:
+                    end += 1
+                if end - start == 1:
+                    db.execute(sql, operations[start][1])
+                else:
+                    db.executemany(sql, [params for _, params in operations[start:end]])
+                start = end
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        self.commits += 1
+
+    def __run_writer(self):
+        with self.__cond:
+            while True:
+                if not self.__pending:
+                    if self.__closed:
+                        return
+                    self.__cond.wait()
+                    continue
+                deadline = self.__pending_since + self.max_delay
+                while (len(self.__pending) < self.max_batch and not self.__flush_now
+                       and not self.__closed):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.__cond.wait(remaining)
+                operations = self.__pending
+                seq = self.__appended
+                self.__pending = []
+                self.__flush_now = False
+                # Commit outside the lock so new operations can queue up meanwhile
+                self.__cond.release()
+                try:
+                    self.__commit(operations)
+                except Exception as e:
+                    self.__cond.acquire()
+                    self.__error = e
+                    self.__cond.notify_all()
+                    return
+                self.__cond.acquire()
+                self.__durable = seq
+                self.__cond.notify_all()
+
+    # Block until everything logged so far is committed
+    def flush(self):
+        with self.__cond:
+            self.__flush_now = True
+            self.__cond.notify_all()
+            self.__wait_for(self.__appended)
+
+    def close(self):
+        if self.__closed:
+            return
+        try:
+            self.flush()
+        finally:
+            with self.__cond:
+                self.__closed = True
+                self.__cond.notify_all()
+            self.__writer.join()
+            self.pool.close()
+            self.__db.close()
+
+    # ---- lazy backing store for AccountRegistry (rows are 0..count-1) ----
+    def __row(self, rowid):
+        row = bisect_left(self.__rowids, rowid)
+        if row < self.count and self.__rowids[row] == rowid:
+            return row
+        return None
+
+    def find_email(self, email):
+        with self.pool.connection() as conn:
+            found = conn.execute(SQL_FIND_EMAIL, (email,)).fetchone()
+        return None if found is None else self.__row(found[0])
+
+    def rows_by_name(self, name):
+        with self.pool.connection() as conn:
+            rowids = [rowid for (rowid,) in conn.execute(SQL_FIND_NAME, (name,))]
+        for rowid in rowids:
+            row = self.__row(rowid)
+            if row is not None:
+                yield row
+
+    # (kind, name, balance in minor units, email, password, extra, (accrued day, fraction) or None)
+    def record(self, row):
+        with self.pool.connection() as conn:
+            *record, day, fraction = conn.execute(SQL_RECORD, (self.__rowids[row],)).fetchone()
+        return (*record, None if day is None else (day, fraction))
+
+    def balances(self):
+        with self.pool.connection() as conn:
+            yield from conn.execute("SELECT kind, balance FROM accounts ORDER BY id")
+
+    # An account's stored history (see TransactionHistory.attach), or None
+    def history(self, email):
+        from History import AccountHistory
+        with self.pool.connection() as conn:
+            rows = conn.execute("SELECT time, kind, amount, other FROM history WHERE email = ? ORDER BY rowid",
+                                (email,)).fetchall()
+        if not rows:
+            return None
+        history = AccountHistory()
+        for when, kind, minor, other in rows:
+            history.append(when, kind, minor, other)
+        return history
+
+    # Idempotency keys that have not expired, oldest first (see log_key)
+    def keys(self, now):
+        import json
+        with self.pool.connection() as conn:
+            rows = conn.execute("SELECT scope, key, fingerprint, result, expires FROM idempotency_keys "
+                                "WHERE expires > ? ORDER BY expires", (now,)).fetchall()
+        for scope, key, fingerprint, result, expires in rows:
+            yield scope, key, fingerprint, json.loads(result), expires
+
+
+# Startup: attach the database behind base.accounts and send writes to it
+def open_sqlite(path, base, saving, checking, **options):
+    from Snapshot import attach_store
+    store = SqliteStore(path, **options)
+    # attach_store builds accounts through base.restoring(), which never logs
+    attach_store(store, base, saving, checking)
+    if base.idempotency is not None:
+        for entry in store.keys(base.idempotency.clock()):
+            base.idempotency.restore(*entry)
+    if base.history is not None:
+        base.history.attach(store.history)
+    journal, base.journal = base.journal, store
+    if journal is not None:
+        journal.close()
+    return store
+
+
+# Benchmark: ops/s in memory vs. on SQLite (batched and commit-per-op)
+if __name__ == "__main__":
+    import os
+    import sys
+    import tempfile
+    from bank import BankSystem, SavingAccount, CheckingAccount
+
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    operations = 100_000
+    folder = tempfile.mkdtemp()
+
+    def workload():
+        bank = [BankSystem.find_account_by_email(f"user{i}@bank.com") for i in range(accounts)]
+        start = time.perf_counter()
+        for i in range(operations):
+            account = bank[i % accounts]
+            if i % 3 == 0:
+                account.deposit(5)
+            elif i % 3 == 1:
+                account.withdraw(1)
+            else:
+                account.transfer(bank[(i * 7) % accounts], 2, "pw")
+        if BankSystem.journal is not None:
+            BankSystem.journal.flush()
+        return operations / (time.perf_counter() - start)
+
+    def populate():
+        with BankSystem.transaction():
+            for i in range(accounts):
+                if i % 2:
+                    SavingAccount(f"user{i}", 1000, f"user{i}@bank.com", "pw", 0.02)
+                else:
+                    CheckingAccount(f"user{i}", 1000, f"user{i}@bank.com", "pw", 1)
+
+    def reset():
+        if BankSystem.journal is not None:
+            BankSystem.journal.close()
+            BankSystem.journal = None
+        BankSystem.accounts.clear()
+        BankSystem.aggregates.reset()
+        BankSystem.history.clear()
+
+    populate()
+    memory = workload()
+    expected = sorted((acc.email, acc.get_balance_minor()) for acc in BankSystem.accounts)
+
+    results = [("in memory", memory, 0)]
+    for label, options in (("sqlite, async ack", {"wait": False}),
+                           ("sqlite, durable ack", {}),
+                           ("sqlite, commit per op", {"max_batch": 1, "max_delay": 0})):
+        reset()
+        path = os.path.join(folder, f"bank{len(results)}.db")
+        store = open_sqlite(path, BankSystem, SavingAccount, CheckingAccount, **options)
+        populate()
+        rate = workload()
+        results.append((label, rate, store.commits))
+
+    # Reopen the batched database: the lazy registry must see the same balances
+    reset()
+    store = open_sqlite(os.path.join(folder, "bank1.db"), BankSystem, SavingAccount, CheckingAccount)
+    start = time.perf_counter()
+    BankSystem.find_account_by_email("user3@bank.com")
+    lookup = time.perf_counter() - start
+    reopened = sorted((acc.email, acc.get_balance_minor()) for acc in BankSystem.accounts)
+    assert reopened == expected, "database does not match the in-memory run"
+    store.close()
+
+    print(f"{accounts:,} accounts, {operations:,} deposit/withdraw/transfer ops")
+    for label, rate, commits in results:
+        print(f"  {label:<26} {rate:>10,.0f} ops/s   commits: {commits:,}")
+    print(f"reopen + first lookup: {lookup * 1e6:.0f} us; balances match the in-memory run")
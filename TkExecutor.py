@@ -0,0 +1,122 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+# Runs slow work (journal fsync, password hashing, a remote backend) on
+# worker threads and hands the results back on the Tk thread. Workers never
+# touch widgets: finished futures go on a queue, and root.after() polls
+# that queue only while something is in flight.
+
+
+class TkExecutor:
+    def __init__(self, root, workers=2, poll_ms=15):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.pending = 0
+        self.busy_listeners = []    # called with the pending count when it changes
+        self.__pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gui-worker")
+        self.__results = queue.SimpleQueue()
+        self.__polling = False
+        self.__closed = False
+
+    @property
+    def busy(self):
+        return self.pending > 0
+
+    def on_busy(self, listener):
+        self.busy_listeners.append(listener)
+
+    # Run fn(*args) on a worker; callback(result) or errback(exception) runs on the Tk thread
+    def submit(self, fn, *args, callback=None, errback=None):
+        if self.__closed:
+            raise RuntimeError("executor is shut down")
+        self.__set_pending(self.pending + 1)
+        future = self.__pool.submit(fn, *args)
+        future.add_done_callback(lambda f: self.__results.put((f, callback, errback)))
+        if not self.__polling:
+            self.__polling = True
+            self.root.after(self.poll_ms, self.__poll)
+        return future
+
+    def __poll(self):
+        while True:
+            try:
+                future, callback, errback = self.__results.get_nowait()
+            except queue.Empty:
+                break
+            self.__set_pending(self.pending - 1)
+            error = future.exception()
+            try:
+                if error is not None:
+                    if errback is None:
+                        raise error
+                    errback(error)
+                elif callback is not None:
+                    callback(future.result())
+            except Exception as e:
+                # Keep polling for the other operations; report like any Tk callback error
+                self.root.report_callback_exception(type(e), e, e.__traceback__)
+        if self.pending and not self.__closed:
+            self.root.after(self.poll_ms, self.__poll)
+        else:
+            self.__polling = False
+
+    def __set_pending(self, pending):
+        self.pending = pending
+        for listener in self.busy_listeners:
+            listener(pending)
+
+    def shutdown(self, wait=True):
+        self.__closed = True
+        self.__pool.shutdown(wait=wait)
+
+
+# Benchmark: Tk-thread stall with the work inline vs. on the executor
+# Uses a stand-in for root.after so it runs without a display
+if __name__ == "__main__":
+    import time
+    from bank import BankSystem, SavingAccount
+
+    class Loop:
+        def __init__(self):
+            self.timers = []
+
+        def after(self, ms, fn):
+            self.timers.append((time.perf_counter() + ms / 1000, fn))
+
+        def report_callback_exception(self, *exc):
+            raise exc[1]
+
+        # One tick every 10 ms; returns the worst gap between ticks
+        def run(self, seconds, work=None):
+            worst, last = 0.0, time.perf_counter()
+            end = last + seconds
+            while time.perf_counter() < end:
+                now = time.perf_counter()
+                worst, last = max(worst, now - last), now
+                due = [t for t in self.timers if t[0] <= now]
+                self.timers = [t for t in self.timers if t[0] > now]
+                for _, fn in due:
+                    fn()
+                if work is not None:
+                    work()
+                    work = None
+                time.sleep(0.01)
+            return worst
+
+    BankSystem.hash_passwords = True
+    alice = SavingAccount("Alice", 1000, "alice@bank.com", "secret")
+    logins = 5
+
+    loop = Loop()
+    inline = loop.run(0.5, lambda: [alice.login("secret") for _ in range(logins)])
+
+    loop = Loop()
+    executor = TkExecutor(loop)
+    tokens = []
+    worker = loop.run(0.5, lambda: [executor.submit(alice.login, "secret", callback=tokens.append)
+                                    for _ in range(logins)])
+    executor.shutdown()
+    assert len(tokens) == logins and all(tokens)
+    print(f"{logins} scrypt logins, longest event-loop stall:")
+    print(f"  inline on the Tk thread: {inline * 1000:7.1f} ms")
+    print(f"  TkExecutor workers:      {worker * 1000:7.1f} ms")
@@ -0,0 +1,72 @@
+import random
+import sys
+import threading
+import time
+
+from bank import BankSystem, SavingAccount, CheckingAccount
+
+
+def build(count):
+    BankSystem.accounts.clear()
+    BankSystem.number_of_accounts = 0
+    accounts = []
+    for i in range(count):
+        if i % 2:
+            accounts.append(SavingAccount(f"user{i}", 1000, f"user{i}@bank.com", "pw"))
+        else:
+            accounts.append(CheckingAccount(f"user{i}", 1000, f"user{i}@bank.com", "pw", 1))
+    return accounts
+
+
+# Run random transfers from several threads; returns (seconds, fees charged)
+def run(accounts, threads, transfers_per_thread, seed=0):
+    fees = [0] * threads
+    barrier = threading.Barrier(threads + 1)
+
+    def work(index):
+        rng = random.Random(seed + index)
+        barrier.wait()
+        for _ in range(transfers_per_thread):
+            source, target = rng.sample(accounts, 2)
+            result = source.transfer(target, rng.randrange(1, 300), "pw")
+            if result.startswith("Transferred"):
+                fees[index] += getattr(source, 'transaction_fee', 0)
+
+    pool = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - start, sum(fees)
+
+
+# Stress test: money is conserved (only fees leave) and no balance goes negative
+def stress(threads=16, transfers_per_thread=20_000, count=50):
+    BankSystem.concurrent = True
+    # Switch threads often to shake out races
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        accounts = build(count)
+        before = sum(acc.get_balance() for acc in accounts)
+        _, fees = run(accounts, threads, transfers_per_thread)
+        after = sum(acc.get_balance() for acc in accounts)
+    finally:
+        sys.setswitchinterval(interval)
+    assert before - fees == after, f"money not conserved: {before} - {fees} != {after}"
+    assert all(acc.get_balance() >= 0 for acc in accounts), "negative balance"
+    print(f"stress: {threads * transfers_per_thread:,} transfers on {count} accounts, "
+          f"{before:,} - fees {fees:,} = {after:,}  OK")
+
+
+if __name__ == "__main__":
+    stress()
+    BankSystem.concurrent = True
+    total = 200_000
+    print(f"{'threads':>8} {'transfers/s':>14}")
+    for threads in (1, 2, 4, 8, 16):
+        accounts = build(100_000)
+        elapsed, _ = run(accounts, threads, total // threads)
+        print(f"{threads:>8} {total / elapsed:>14,.0f}")
@@ -0,0 +1,226 @@
+import json
+import time
+from array import array
+
+# Velocity limits: "at most N transfers / $X out per rolling hour" style
+# rules, checked inline on withdraw and transfer.
+#
+# Each rule keeps one sliding window per account (or per sender/recipient
+# pair for per_counterparty rules). A window is a ring of `buckets` time
+# buckets holding a count and an amount, plus running totals, so a check
+# reads two numbers and an update touches one bucket: O(1) per operation
+# and fixed memory per account, with no history scan. The window slides a
+# bucket at a time, so its span is accurate to window / buckets.
+#
+# Rules come from code or a JSON list:
+#   [{"name": "hourly-out", "window": 3600, "max_amount": 5000},
+#    {"name": "burst", "window": 60, "max_count": 10, "flows": ["transfers"]},
+#    {"name": "per-payee", "window": 86400, "max_amount": 2000, "per_counterparty": true}]
+#
+# A per_counterparty rule only counts transfers: a withdrawal has no
+# counterparty, so it is left out of that rule even with the default flows.
+
+FLOWS = ("withdrawals", "transfers")
+
+
+class VelocityRule:
+    def __init__(self, name, window=3600, max_count=None, max_amount=None, flows=FLOWS,
+                 per_counterparty=False, buckets=12):
+        if max_count is None and max_amount is None:
+            raise ValueError(f"Rule {name} needs max_count or max_amount")
+        if window <= 0 or buckets <= 0:
+            raise ValueError(f"Rule {name} needs a positive window and bucket count")
+        unknown = set(flows) - set(FLOWS)
+        if unknown:
+            raise ValueError(f"Rule {name} has unknown flows: {', '.join(sorted(unknown))}")
+        self.name = name
+        self.window = window
+        self.max_count = max_count
+        self.max_amount = max_amount      # major units
+        self.flows = tuple(flows)
+        self.per_counterparty = per_counterparty
+        self.buckets = buckets
+        self.width = window / buckets
+
+    def __repr__(self):
+        return f"VelocityRule({self.name!r}, window={self.window})"
+
+
+class SlidingWindow:
+    __slots__ = ('slots', 'epoch', 'count', 'amount')
+
+    def __init__(self, buckets):
+        self.slots = array('q', bytes(16 * buckets))   # counts, then amounts
+        self.epoch = 0          # bucket number of the newest bucket
+        self.count = 0
+        self.amount = 0
+
+    # Drop buckets that slid out of the window by bucket number `now`
+    def advance(self, now):
+        stale = now - self.epoch
+        if stale <= 0:
+            return
+        slots = self.slots
+        size = len(slots) // 2
+        if stale >= size:
+            self.slots = array('q', bytes(16 * size))
+            self.count = self.amount = 0
+        else:
+            for step in range(1, stale + 1):
+                i = (self.epoch + step) % size
+                self.count -= slots[i]
+                self.amount -= slots[size + i]
+                slots[i] = slots[size + i] = 0
+        self.epoch = now
+
+    def add(self, minor, count=1):
+        slots = self.slots
+        size = len(slots) // 2
+        i = self.epoch % size
+        slots[i] += count
+        slots[size + i] += minor
+        self.count += count
+        self.amount += minor
+
+
+class VelocityLimits:
+    def __init__(self, rules, minor_unit=100, clock=time.monotonic, max_counterparties=64):
+        self.rules = list(rules)
+        self.clock = clock
+        self.max_counterparties = max_counterparties
+        self.rejected = {rule.name: 0 for rule in self.rules}
+        # flow -> [(rule index, rule, limit in minor units or None)]
+        self.__by_flow = {flow: [] for flow in FLOWS}
+        for index, rule in enumerate(self.rules):
+            limit = None if rule.max_amount is None else round(rule.max_amount * minor_unit)
+            for flow in rule.flows:
+                if rule.per_counterparty and flow != "transfers":
+                    continue
+                self.__by_flow[flow].append((index, rule, limit))
+        self.__windows = {}     # account -> per rule: window, or {other email: window} for pair rules
+
+    @classmethod
+    def from_config(cls, rules, **options):
+        return cls([VelocityRule(**rule) for rule in rules], **options)
+
+    @classmethod
+    def load(cls, path, **options):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_config(json.load(f), **options)
+
+    def __window(self, account, index, rule, other, now):
+        windows = self.__windows.get(account)
+        if windows is None:
+            windows = self.__windows[account] = [None] * len(self.rules)
+        window = windows[index]
+        if rule.per_counterparty:
+            pairs = window
+            if pairs is None:
+                pairs = windows[index] = {}
+            window = pairs.pop(other.email, None)
+            if window is None:
+                # Bounded pair windows: the least recently used counterparty goes
+                if len(pairs) >= self.max_counterparties:
+                    del pairs[next(iter(pairs))]
+                window = SlidingWindow(rule.buckets)
+            pairs[other.email] = window
+        elif window is None:
+            window = windows[index] = SlidingWindow(rule.buckets)
+        slot = int(now / rule.width)
+        if slot != window.epoch:
+            window.advance(slot)
+        return window
+
+    # Count the movement against every rule it falls under, or return the
+    # name of the first rule it would break (nothing counted then).
+    # Call under the account's lock, before moving the money.
+    def reserve(self, account, flow, minor, other=None):
+        now = self.clock()
+        windows = []
+        for index, rule, limit in self.__by_flow[flow]:
+            window = self.__window(account, index, rule, other, now)
+            if ((rule.max_count is not None and window.count >= rule.max_count)
+                    or (limit is not None and window.amount + minor > limit)):
+                self.rejected[rule.name] += 1
+                return rule.name
+            windows.append(window)
+        for window in windows:
+            window.add(minor)
+        return None
+
+    # Undo a reservation whose movement did not go through after all
+    def release(self, account, flow, minor, other=None):
+        now = self.clock()
+        for index, rule, _ in self.__by_flow[flow]:
+            self.__window(account, index, rule, other, now).add(-minor, -1)
+
+    # Totals for one rule's window: (count, amount in minor units)
+    def usage(self, account, rule_name, other=None):
+        for index, rule in enumerate(self.rules):
+            if rule.name == rule_name:
+                if rule.per_counterparty and other is None:
+                    raise ValueError(f"Rule {rule_name} is per counterparty: pass other")
+                window = self.__window(account, index, rule, other, self.clock())
+                return window.count, window.amount
+        raise KeyError(rule_name)
+
+    def forget(self, account):
+        self.__windows.pop(account, None)
+
+    def clear(self):
+        self.__windows.clear()
+
+
+# Benchmark: transfer cost with and without limits at 1M accounts
+if __name__ == "__main__":
+    import random
+    import sys
+    from bank import BankSystem, SavingAccount
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    BankSystem.history = None
+    BankSystem.idempotency = None
+    accounts = [SavingAccount(f"user{i}", 1_000_000, f"user{i}@bank.com", "pw") for i in range(size)]
+    rng = random.Random(22)
+    pairs = [(accounts[rng.randrange(size)], accounts[rng.randrange(size)]) for _ in range(200_000)]
+    tokens = {}
+
+    def run():
+        start = time.perf_counter()
+        for sender, recipient in pairs:
+            token = tokens.get(sender)
+            if token is None:
+                token = tokens[sender] = sender.login("pw")
+            sender.transfer(recipient, 1, token=token)
+        return (time.perf_counter() - start) / len(pairs)
+
+    # Warm the session tokens so both runs do the same work
+    run()
+    without = min(run(), run())
+
+    fake_now = [0.0]
+    BankSystem.limits = VelocityLimits.from_config([
+        {"name": "hourly-out", "window": 3600, "max_amount": 5000},
+        {"name": "burst", "window": 60, "max_count": 10, "flows": ["transfers"]},
+        {"name": "per-payee", "window": 86400, "max_amount": 2000, "per_counterparty": True},
+    ], clock=lambda: fake_now[0])
+    first = run()           # creates the windows
+    fake_now[0] += 30       # then half a minute later, so the windows slide
+    with_limits = run()
+    fake_now[0] += 30
+    with_limits = min(with_limits, run())
+
+    print(f"{size:,} accounts, {len(pairs):,} random transfers")
+    print(f"transfer without limits: {without * 1e6:6.2f} us")
+    print(f"transfer with 3 rules:   {with_limits * 1e6:6.2f} us (+{(with_limits - without) * 1e6:.2f} us), "
+          f"{first * 1e6:.2f} us when the windows are first created")
+
+    # The burst rule stops the 11th transfer within a minute, then the window slides on
+    alice, bob = accounts[0], accounts[1]
+    token = alice.login("pw")
+    BankSystem.limits.clear()
+    outcomes = [alice.transfer(bob, 1, token=token) for _ in range(11)]
+    assert outcomes[-1] == "Velocity limit exceeded: burst", outcomes[-1]
+    fake_now[0] += 61
+    assert alice.transfer(bob, 1, token=token).startswith("Transferred")
+    print(f"burst rule: 10 allowed, 11th refused, allowed again after the window; rejections {BankSystem.limits.rejected}")
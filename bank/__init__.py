@@ -0,0 +1,41 @@
+from importlib import import_module
+
+from bank.core import BankSystem, SavingAccount, CheckingAccount
+
+# Headless bank core: `import bank` loads the account classes only.
+# Storage, reporting and batch subsystems are imported the first time
+# one of their names is used, e.g. bank.open_journal or bank.EndOfDay,
+# so short-lived scripts only pay for what they touch.
+
+_LAZY = {
+    "Journal": "Journal",
+    "open_journal": "Journal",
+    "replay": "Journal",
+    "Snapshot": "Snapshot",
+    "load_snapshot": "Snapshot",
+    "open_bank": "Snapshot",
+    "checkpoint": "Snapshot",
+    "SqliteStore": "SqliteStore",
+    "open_sqlite": "SqliteStore",
+    "Importer": "Importer",
+    "batch_transfer": "BatchTransfer",
+    "export_accounts": "Exporter",
+    "export_statement": "Exporter",
+    "export_summary": "Exporter",
+    "VelocityLimits": "Velocity",
+    "InterestAccrual": "Accrual",
+    "EndOfDay": "EndOfDay",
+    "IdempotencyCache": "Idempotency",
+    "METRICS": "Metrics",
+}
+
+__all__ = ["BankSystem", "SavingAccount", "CheckingAccount", *_LAZY]
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module 'bank' has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
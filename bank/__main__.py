@@ -0,0 +1,5 @@
+import sys
+
+from bank.cli import main
+
+sys.exit(main())
@@ -0,0 +1,188 @@
+import argparse
+import math
+import os
+import sys
+
+from bank import BankSystem, SavingAccount, CheckingAccount
+
+# bank: command line over the headless core, for scripts and cron jobs
+#
+#   python -m bank create savings "Ada Lovelace" ada@example.com 100 --rate 0.02
+#   python -m bank deposit ada@example.com 25 --key payroll-2026-10
+#   python -m bank withdraw ada@example.com 10
+#   python -m bank transfer ada@example.com bob@example.com 5
+#   python -m bank balance ada@example.com
+#   python -m bank batch settlements.csv        (same file format as Importer.py)
+#
+# State is a journal (--journal, $BANK_JOURNAL, default ./bank.journal),
+# optionally started from a snapshot (--snapshot), or a SQLite database
+# (--db, $BANK_DB). Passwords come from --password, $BANK_PASSWORD or a
+# prompt. Only the storage that is asked for gets imported, and never Tk.
+# A --key is stored with the movement it guards, in the same journal batch
+# or database commit, so a repeat after a crash is still recognised.
+#
+# Exit status: 0 done, 1 refused (wrong password, insufficient funds, bad
+# rows in a batch), 2 usage error.
+
+
+class CommandError(Exception):
+    pass
+
+
+def _amount(text):
+    try:
+        value = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an amount: {text}")
+    if not math.isfinite(value):
+        raise argparse.ArgumentTypeError(f"not an amount: {text}")
+    return int(value) if value.is_integer() and "." not in text else value
+
+
+def _password(args):
+    if args.password is not None:
+        return args.password
+    if "BANK_PASSWORD" in os.environ:
+        return os.environ["BANK_PASSWORD"]
+    from getpass import getpass
+    return getpass("Password: ")
+
+
+def _account(email):
+    account = BankSystem.find_account_by_email(email)
+    if account is None:
+        raise CommandError(f"Account not found: {email}")
+    return account
+
+
+def _authorized(args):
+    account = _account(args.email)
+    if not account.authenticate(_password(args)):
+        raise CommandError("Authentication failed")
+    return account
+
+
+def _balance(account):
+    return BankSystem.money.format(account.get_balance_minor(), grouping=False)
+
+
+# ---- commands (return the line to print, raise CommandError to refuse) ----
+def cmd_create(args):
+    password = _password(args)
+    if args.type == "savings":
+        account = SavingAccount(args.name, args.balance, args.email, password, args.rate)
+    else:
+        account = CheckingAccount(args.name, args.balance, args.email, password, args.fee)
+    return f"created {account.kind} account {account.email} balance {_balance(account)}"
+
+
+def cmd_deposit(args):
+    account = _authorized(args)
+    if not account.deposit(args.amount, key=args.key):
+        raise CommandError("Invalid deposit amount")
+    return _balance(account)
+
+
+def cmd_withdraw(args):
+    account = _authorized(args)
+    if not account.withdraw(args.amount, key=args.key):
+        raise CommandError("Insufficient funds or invalid amount")
+    return _balance(account)
+
+
+def cmd_transfer(args):
+    account = _account(args.email)
+    recipient = _account(args.to)
+    # transfer() checks the password itself
+    result = account.transfer(recipient, args.amount, _password(args), key=args.key)
+    if not result.startswith("Transferred"):
+        raise CommandError(result)
+    return result
+
+
+def cmd_balance(args):
+    return _balance(_authorized(args))
+
+
+def cmd_batch(args):
+    from Importer import Importer
+    report = Importer(BankSystem, SavingAccount, CheckingAccount, chunk_size=args.chunk).import_file(
+        args.path, args.format)
+    for line, reason in report.errors:
+        print(f"{args.path}:{line}: {reason}", file=sys.stderr)
+    summary = (f"{report.rows:,} rows: {report.accounts:,} accounts, {report.transactions:,} transactions, "
+               f"{report.rejected:,} rejected")
+    if report.rejected:
+        raise CommandError(summary)
+    return summary
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bank", description="Headless bank command line")
+    parser.add_argument("--journal", default=os.environ.get("BANK_JOURNAL", "bank.journal"),
+                        help="journal file to replay and append to (default: %(default)s)")
+    parser.add_argument("--snapshot", default=os.environ.get("BANK_SNAPSHOT"),
+                        help="snapshot to start from before the journal")
+    parser.add_argument("--db", default=os.environ.get("BANK_DB"), help="SQLite database instead of a journal")
+    parser.add_argument("--password", help="account password (else $BANK_PASSWORD or a prompt)")
+    parser.add_argument("--hash-passwords", action="store_true", help="store new passwords as scrypt hashes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="open an account")
+    create.add_argument("type", choices=("savings", "checking"))
+    create.add_argument("name")
+    create.add_argument("email")
+    create.add_argument("balance", type=_amount)
+    create.add_argument("--rate", type=float, default=0.03, help="savings interest rate")
+    create.add_argument("--fee", type=_amount, default=5, help="checking transaction fee")
+    create.set_defaults(run=cmd_create)
+
+    for name, run in (("deposit", cmd_deposit), ("withdraw", cmd_withdraw)):
+        command = commands.add_parser(name, help=f"{name} money")
+        command.add_argument("email")
+        command.add_argument("amount", type=_amount)
+        command.add_argument("--key", help="idempotency key: a repeat with the same key is not applied again")
+        command.set_defaults(run=run)
+
+    transfer = commands.add_parser("transfer", help="move money to another account")
+    transfer.add_argument("email")
+    transfer.add_argument("to")
+    transfer.add_argument("amount", type=_amount)
+    transfer.add_argument("--key", help="idempotency key: a repeat with the same key is not applied again")
+    transfer.set_defaults(run=cmd_transfer)
+
+    balance = commands.add_parser("balance", help="print an account's balance")
+    balance.add_argument("email")
+    balance.set_defaults(run=cmd_balance)
+
+    batch = commands.add_parser("batch", help="apply a CSV or JSONL file of accounts and transactions")
+    batch.add_argument("path")
+    batch.add_argument("--format", choices=("csv", "jsonl"))
+    batch.add_argument("--chunk", type=int, default=5000)
+    batch.set_defaults(run=cmd_batch)
+    return parser
+
+
+def open_storage(args):
+    if args.db:
+        from SqliteStore import open_sqlite
+        return open_sqlite(args.db, BankSystem, SavingAccount, CheckingAccount)
+    if args.snapshot:
+        from Snapshot import open_bank
+        return open_bank(args.snapshot, args.journal, BankSystem, SavingAccount, CheckingAccount)
+    from Journal import open_journal
+    return open_journal(args.journal, BankSystem, SavingAccount, CheckingAccount)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    BankSystem.hash_passwords = args.hash_passwords
+    store = open_storage(args)
+    try:
+        print(args.run(args))
+        return 0
+    except (CommandError, ValueError) as e:
+        print(f"bank: {e}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
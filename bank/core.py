@@ -0,0 +1,451 @@
+from contextlib import contextmanager, nullcontext
+import itertools
+import threading
+from AccountRegistry import AccountRegistry
+from Credentials import SessionCache, hash_password, is_hashed, verify_password
+from Money import MoneyContext
+from Aggregates import BankAggregates
+from History import TransactionHistory
+from Idempotency import IdempotencyCache
+
+# The account classes shared by the GUI, the console demo, the server and
+# the bank command line. Nothing here imports tkinter.
+
+NO_LOCK = nullcontext()
+RESTORING = threading.local()  # depth of BankSystem.restoring() blocks on this thread
+UNDO = threading.local()  # per open BankSystem.transaction() on this thread: its undo actions
+
+# Remember how to take back a change made inside BankSystem.transaction()
+def _undo(action, *args):
+    stack = getattr(UNDO, 'stack', None)
+    if stack:
+        stack[-1].append((action, args))
+
+class BankSystem:
+    number_of_accounts = 0 
+    accounts = AccountRegistry()
+    journal = None  # Journal that records balance changes (see Journal.py)
+    concurrent = False  # True makes deposit/withdraw/transfer thread-safe
+    registry_lock = threading.RLock()  # guards account creation and deletion
+    lock_order = itertools.count()
+    hash_passwords = False  # True stores new passwords as salted scrypt hashes
+    sessions = SessionCache(ttl=900)  # login tokens for follow-up operations
+    money = MoneyContext(minor_unit=100)  # balances are integers in this minor unit
+    aggregates = BankAggregates(minor_unit=100)  # running bank-wide totals (see Aggregates.py)
+    history = TransactionHistory()  # per-account transaction log (see History.py)
+    idempotency = IdempotencyCache()  # outcomes of keyed requests, so retries apply once
+    limits = None  # VelocityLimits checked on withdraw and transfer (see Velocity.py)
+    accrual = None  # InterestAccrual that compounds savings interest lazily (see Accrual.py)
+    kind = "basic"
+    
+    # Initialize account info
+    def __init__(self, name, balance, email, password):
+        self.__set_balance(balance) 
+        self.__set_name(name)
+        self.email = email
+        if BankSystem.hash_passwords and not is_hashed(password):
+            password = hash_password(password)
+        self.password = password 
+        # Per-account lock; transfers take locks in lock_id order
+        self.lock = threading.RLock()
+        self.lock_id = next(BankSystem.lock_order)
+        with BankSystem.registry_lock:
+            BankSystem.accounts.add(self)
+            if getattr(RESTORING, 'depth', 0):
+                return
+            # Journal first: an account whose create record can't be logged
+            # (e.g. a balance or rate the record can't hold) is not kept
+            if BankSystem.journal is not None:
+                try:
+                    BankSystem.journal.log_create(self)
+                except BaseException:
+                    BankSystem.accounts.remove(self)
+                    raise
+            BankSystem.number_of_accounts += 1
+            if BankSystem.aggregates is not None:
+                BankSystem.aggregates.add(self.kind, self.__balance)
+            _undo(BankSystem.__unregister, self)
+   
+    # Check password
+    def authenticate(self, password):
+        return verify_password(password, self.password)
+    
+    # Check the password once and hand out a session token (None if wrong)
+    def login(self, password):
+        if self.authenticate(password):
+            return BankSystem.sessions.issue(self)
+        return None
+    
+    # Session token (O(1)) or password
+    def authorize(self, password=None, token=None):
+        if token is not None and BankSystem.sessions.check(token) is self:
+            return True
+        return password is not None and self.authenticate(password)
+    
+    # Set balance (must be positive), kept in minor units (cents)
+    def __set_balance(self, balance):
+        if isinstance(balance, (int, float)) and balance > 0 and BankSystem.money.to_minor(balance) > 0:
+            self.__balance = BankSystem.money.to_minor(balance)
+        else:
+            raise ValueError("Invalid balance: must be a positive number")
+    
+    def get_balance(self):
+        return BankSystem.money.to_major(self.get_balance_minor())
+    
+    def get_balance_minor(self):
+        return self.__balance
+    
+    # The balance as journaled and stored: no interest that is earned but not posted yet
+    def get_posted_balance_minor(self):
+        return self.__balance
+    
+    # Post interest earned up to today (only savings accounts earn any)
+    def accrue(self):
+        return 0
+    # Set name (must be string)    
+    def __set_name(self, name):
+        if isinstance(name, str) and name.strip():
+            self.__name = name
+        else:
+            raise ValueError("Invalid name: must be text")
+   
+    def get_name(self):
+        return self.__name
+    
+    # Email is the login key, so keep the registry index in sync
+    @property
+    def email(self):
+        return self.__email
+    
+    # Checked and journaled before anything changes
+    @email.setter
+    def email(self, email):
+        with BankSystem.registry_lock:
+            if self not in BankSystem.accounts:
+                self.__email = email
+                return
+            old = self.__email
+            if email == old:
+                return
+            if BankSystem.accounts.has_email(email):
+                raise ValueError("An account with this email already exists")
+            if BankSystem.journal is not None:
+                BankSystem.journal.log_email(old, email)
+            BankSystem.accounts.change_email(self, email)
+            self.__email = email
+            _undo(self.__restore_email, old)
+    
+    def __restore_email(self, old):
+        with BankSystem.registry_lock:
+            BankSystem.accounts.change_email(self, old)
+            self.__email = old
+    
+    # This account's lock in concurrent mode, otherwise a no-op
+    def guard(self):
+        return self.lock if BankSystem.concurrent else NO_LOCK
+    
+    # With a key, a repeated request returns the first outcome without moving money again
+    def deposit(self, amount, key=None):
+        if key is not None and BankSystem.idempotency is not None:
+            fingerprint = f"deposit:{BankSystem.money.to_minor(amount)}"
+            with self.guard():
+                return BankSystem.run_keyed(self.email, key, fingerprint, self.__deposit, amount)
+        return self.__deposit(amount)
+    
+    def __deposit(self, amount):
+        minor = BankSystem.money.to_minor(amount)
+        if self.deposit_minor(minor):
+            self.record_activity("deposits", minor)
+            return True
+        return False
+    
+    def withdraw(self, amount, key=None):
+        if key is not None and BankSystem.idempotency is not None:
+            fingerprint = f"withdraw:{BankSystem.money.to_minor(amount)}"
+            with self.guard():
+                return BankSystem.run_keyed(self.email, key, fingerprint, self.__withdraw, amount)
+        return self.__withdraw(amount)
+    
+    def __withdraw(self, amount):
+        minor = BankSystem.money.to_minor(amount)
+        limits = BankSystem.limits
+        if limits is None:
+            if self.withdraw_minor(minor):
+                self.record_activity("withdrawals", minor)
+                return True
+            return False
+        with self.guard():
+            if limits.reserve(self, "withdrawals", minor) is not None:
+                return False
+            if not self.withdraw_minor(minor):
+                limits.release(self, "withdrawals", minor)
+                return False
+        self.record_activity("withdrawals", minor)
+        return True
+    
+    # Running totals and history for one money movement (flow names as in Aggregates.FLOWS)
+    def record_activity(self, flow, minor, other=None):
+        if BankSystem.aggregates is not None:
+            BankSystem.aggregates.record(flow, minor)
+        if BankSystem.history is not None:
+            journal = BankSystem.journal
+            BankSystem.history.record(self, flow, minor, other, None if journal is None else journal.log_history)
+    
+    # Balance changes in minor units (deposit/withdraw convert and call these)
+    def deposit_minor(self, minor):
+        with self.guard():
+            if minor > 0:
+                if BankSystem.journal is not None:
+                    BankSystem.journal.log_deposit(self.email, minor)
+                self.__balance += minor
+                if BankSystem.aggregates is not None:
+                    BankSystem.aggregates.move(self.kind, self.__balance - minor, self.__balance)
+                _undo(self.__adjust, -minor)
+                return True
+            return False
+    
+    def withdraw_minor(self, minor):
+        with self.guard():
+            if 0 < minor <= self.__balance:
+                if BankSystem.journal is not None:
+                    BankSystem.journal.log_withdraw(self.email, minor)
+                self.__balance -= minor
+                if BankSystem.aggregates is not None:
+                    BankSystem.aggregates.move(self.kind, self.__balance + minor, self.__balance)
+                _undo(self.__adjust, minor)
+                return True
+            return False
+    
+    # Undo of a balance change (never journaled: the batch that had it is dropped)
+    def __adjust(self, delta):
+        with self.guard():
+            self.__balance += delta
+            if BankSystem.aggregates is not None:
+                BankSystem.aggregates.move(self.kind, self.__balance - delta, self.__balance)
+    # Transfer money between accounts    
+    def transfer(self, to_account, amount, password=None, token=None, key=None):
+        if not self.authorize(password, token):
+            return "Authentication failed"
+        if key is not None and BankSystem.idempotency is not None:
+            fingerprint = f"transfer:{to_account.email}:{BankSystem.money.to_minor(amount)}"
+            with BankSystem.lock_accounts(self, to_account):
+                return BankSystem.run_keyed(self.email, key, fingerprint, self.__transfer, to_account, amount)
+        return self.__transfer(to_account, amount)
+    
+    def __transfer(self, to_account, amount):
+        minor = BankSystem.money.to_minor(amount)
+        if minor <= 0:
+            return "Invalid transfer amount"
+        # Hold both accounts so the balance check and the two legs are atomic
+        with BankSystem.lock_accounts(self, to_account):
+            if self.get_balance_minor() < minor:
+                return "Insufficient funds"
+            limits = BankSystem.limits
+            if limits is not None:
+                broken = limits.reserve(self, "transfers", minor, to_account)
+                if broken is not None:
+                    return f"Velocity limit exceeded: {broken}"
+            # Both legs are journaled as one record
+            with BankSystem.transaction():
+                # Checking accounts also need to cover the fee
+                if not self.withdraw_minor(minor):
+                    if limits is not None:
+                        limits.release(self, "transfers", minor, to_account)
+                    return "Insufficient funds"
+                to_account.deposit_minor(minor)
+        self.record_activity("transfers", minor, to_account)
+        return f"Transferred ${amount:.2f} from {self.get_name()} to {to_account.get_name()}"
+    
+    @classmethod
+    def find_account_by_email(cls, email):
+        return cls.accounts.find_by_email(email)
+    
+    @classmethod
+    def find_account_by_name(cls, name):
+        return cls.accounts.find_by_name(name)
+    
+    # Remove an account from the bank
+    @classmethod
+    def delete_account(cls, account):
+        with BankSystem.registry_lock:
+            if account not in cls.accounts:
+                raise ValueError("Account is not registered")
+            if BankSystem.journal is not None:
+                BankSystem.journal.log_delete(account.email)
+            BankSystem.__unregister(account)
+            _undo(BankSystem.__reregister, account)
+            # Login tokens for a deleted account must stop working
+            BankSystem.sessions.revoke_account(account)
+            if BankSystem.history is not None:
+                BankSystem.history.forget(account)
+            if BankSystem.limits is not None:
+                BankSystem.limits.forget(account)
+    
+    # Registry, count and aggregates for a create or delete (and their undo)
+    @staticmethod
+    def __unregister(account):
+        with BankSystem.registry_lock:
+            BankSystem.accounts.remove(account)
+            BankSystem.number_of_accounts -= 1
+            if BankSystem.aggregates is not None:
+                BankSystem.aggregates.remove(account.kind, account.__balance)
+    
+    @staticmethod
+    def __reregister(account):
+        with BankSystem.registry_lock:
+            BankSystem.accounts.add(account)
+            BankSystem.number_of_accounts += 1
+            if BankSystem.aggregates is not None:
+                BankSystem.aggregates.add(account.kind, account.__balance)
+    
+    # Accounts built inside this block come from storage (a snapshot or
+    # database row): they are registered but not journaled, counted or added
+    # to the aggregates again. Only affects the calling thread.
+    @classmethod
+    @contextmanager
+    def restoring(cls):
+        RESTORING.depth = getattr(RESTORING, 'depth', 0) + 1
+        try:
+            yield
+        finally:
+            RESTORING.depth -= 1
+    
+    # Run operation(*args) once per key (callers hold the account locks).
+    # The outcome is journaled in the same batch as the operation's own
+    # records, so after a crash a retry finds the key exactly when the money
+    # moved; a key file of its own could get ahead of the journal. If the
+    # batch fails, the key is forgotten along with the money movement.
+    @classmethod
+    def run_keyed(cls, scope, key, fingerprint, operation, *args):
+        cache = BankSystem.idempotency
+        entry = cache.lookup(scope, key, fingerprint)
+        if entry is not None:
+            return entry[1]
+        with BankSystem.transaction():
+            result = operation(*args)
+            expires = cache.store(scope, key, fingerprint, result)
+            _undo(cache.forget, scope, key)
+            if BankSystem.journal is not None:
+                BankSystem.journal.log_key(scope, key, fingerprint, result, expires)
+        return result
+    
+    # Group journal records so they are replayed all-or-nothing. Memory
+    # follows the journal: if the block raises, or its batch can't be
+    # written, the balance, create, delete and email changes and the
+    # idempotency keys stored in it are taken back. A nested block's changes are kept by the outer one.
+    @classmethod
+    @contextmanager
+    def transaction(cls):
+        stack = UNDO.__dict__.setdefault('stack', [])
+        stack.append([])
+        try:
+            with BankSystem.journal.transaction() if BankSystem.journal is not None else NO_LOCK:
+                yield
+        except BaseException:
+            for action, args in reversed(stack.pop()):
+                action(*args)
+            raise
+        done = stack.pop()
+        if stack:
+            stack[-1] += done
+    
+    # Lock accounts in one global order (by lock_id) so transfers can't deadlock
+    @classmethod
+    @contextmanager
+    def lock_accounts(cls, *accounts):
+        if not BankSystem.concurrent:
+            yield
+            return
+        ordered = sorted(set(accounts), key=lambda account: account.lock_id)
+        for account in ordered:
+            account.lock.acquire()
+        try:
+            yield
+        finally:
+            for account in reversed(ordered):
+                account.lock.release()
+
+# Inherits from BankSystem (adds interest)
+class SavingAccount(BankSystem):
+    kind = "savings"
+    
+    def __init__(self, name, balance, email, password, interest_rate=0.03):
+        # Set before the base class journals the new account
+        self.accrued_day = None if BankSystem.accrual is None else BankSystem.accrual.today()
+        self.accrued_fraction = 0   # earned but not yet credited, in minor units
+        self.__pending = None, 0    # (what it was computed for, pending interest) for repeated reads
+        self.interest_rate = interest_rate
+        super().__init__(name, balance, email, password)
+    
+    # A rate change applies from now on: accrue at the old rate first
+    @property
+    def interest_rate(self):
+        return self.__interest_rate
+    
+    @interest_rate.setter
+    def interest_rate(self, rate):
+        if BankSystem.accrual is not None and hasattr(self, 'lock'):
+            self.accrue()
+        self.__interest_rate = rate
+    
+    # Post interest up to today when accrual is on (no-op otherwise)
+    def accrue(self):
+        if BankSystem.accrual is None:
+            return 0
+        with self.guard():
+            return BankSystem.accrual.accrue(self, BankSystem)
+    
+    # Reads include the interest earned so far without posting it
+    def get_balance_minor(self):
+        accrual = BankSystem.accrual
+        if accrual is None:
+            return super().get_balance_minor()
+        with self.guard():
+            minor = super().get_balance_minor()
+            seen = (accrual.today(), self.accrued_day, minor, self.interest_rate)
+            if self.__pending[0] != seen:
+                self.__pending = seen, accrual.pending(minor, self.accrued_fraction, self.interest_rate,
+                                                       self.accrued_day)
+            return minor + self.__pending[1]
+    
+    # Every balance change posts the interest first
+    def deposit_minor(self, minor):
+        if BankSystem.accrual is not None:
+            self.accrue()
+        return super().deposit_minor(minor)
+    
+    def withdraw_minor(self, minor):
+        if BankSystem.accrual is not None:
+            self.accrue()
+        return super().withdraw_minor(minor)
+    
+    # Interest is rounded half to even to the minor unit
+    def add_interest(self):
+        with self.guard():
+            interest = BankSystem.money.apply_rate(self.get_balance_minor(), self.interest_rate)
+            if self.deposit_minor(interest):
+                self.record_activity("interest", interest)
+        return BankSystem.money.to_major(interest)
+    
+    def get_account_type(self):
+        return f"Savings (Rate: {self.interest_rate*100}%)"
+
+# Inherits from BankSystem (adds transaction fee)
+class CheckingAccount(BankSystem):
+    kind = "checking"
+    
+    def __init__(self, name, balance, email, password, transaction_fee=5):
+        # Set before the base class journals the new account
+        self.transaction_fee = transaction_fee
+        super().__init__(name, balance, email, password)
+
+    def withdraw_minor(self, minor):
+        with self.guard():
+            fee = BankSystem.money.to_minor(self.transaction_fee)
+            if minor > 0 and minor + fee <= self.get_balance_minor() and super().withdraw_minor(minor + fee):
+                self.record_activity("fees", fee)
+                return True
+            return False
+    
+    def get_account_type(self):
+        return f"Checking (Fee: ${self.transaction_fee})"